@@ -0,0 +1,253 @@
+from functools import cached_property
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from result_store import DEFAULT_CHUNK_ROWS, iter_genx_csv, read_genx_header
+
+
+##########################################
+        # RESOURCE NAME PARSING #
+##########################################
+
+# Resource names look like <zone>_<tech>_<unit>, where <zone> is either
+# NY_Z_<x> (NY_Z_A, NY_Z_G-I, NY_Z_C&E) or two tokens (NENG_Rest, PJM_EMAC).
+UNIT_RE = r"^(?P<base>.*)_(?P<unit>[^_]+)$"
+ZONE_RE = r"^(?P<zone>NY_Z_[^_]+|[^_]+_[^_]+)_(?P<tech>.*)$"
+
+
+def build_resource_index(columns, zone_ids=None):
+    """
+    Parse resource column names once into a (zone, tech, unit) MultiIndex
+    with categorical levels. Columns named "Total" must be removed first.
+
+    zone_ids (e.g. the "Zone" header row of power.csv) makes the zone
+    assignment authoritative: each GenX zone ID gets one label (the most
+    common name prefix among its resources), and the tech is whatever follows
+    that prefix. Without zone_ids the zone is taken from the name alone.
+    """
+    names = pd.Series(pd.Index(columns).astype(str), dtype=object)
+
+    parts = names.str.extract(UNIT_RE)
+    base = parts["base"].fillna(names)
+    unit = parts["unit"].fillna("")
+
+    guess = base.str.extract(ZONE_RE)
+    zone = guess["zone"].fillna(base)
+    tech = guess["tech"].fillna("Unknown")
+
+    if zone_ids is not None:
+        ids = pd.Series(np.asarray(zone_ids), index=names.index)
+        # One label per GenX zone ID: the most common name-based guess
+        labels = zone.groupby(ids).agg(lambda z: z.value_counts().index[0])
+        zone = ids.map(labels)
+
+        # Tech = text after "<zone label>_" when the name starts with it
+        prefix = zone + "_"
+        has_prefix = np.array([b.startswith(p) for b, p in zip(base, prefix)])
+        tech = tech.where(~has_prefix, [b[len(p):] for b, p in zip(base, prefix)])
+
+    def categorical(values):
+        values = pd.Series(values).astype(str)
+        return pd.Categorical(values, categories=pd.unique(values))
+
+    return pd.MultiIndex.from_arrays(
+        [categorical(zone), categorical(tech), categorical(unit)],
+        names=["zone", "tech", "unit"],
+    )
+
+
+def grouped_sum(values, codes, n_groups):
+    """
+    Sum the columns of a 2-D array by integer group code in a single
+    np.add.reduceat pass. Returns an array of shape (rows, n_groups).
+    NaN counts as 0, as in pandas' sum (an all-NaN group sums to 0).
+    """
+    if codes.size == 0:  # no columns at all: every group sums to 0
+        return np.zeros((values.shape[0], n_groups), dtype=values.dtype)
+    order = np.argsort(codes, kind="stable")
+    sorted_codes = codes[order]
+    starts = np.flatnonzero(np.r_[True, sorted_codes[1:] != sorted_codes[:-1]])
+    columns = np.nan_to_num(values[:, order], copy=False)  # the fancy index already copied
+    sums = np.add.reduceat(columns, starts, axis=1)
+
+    out = np.zeros((values.shape[0], n_groups), dtype=values.dtype)
+    out[:, sorted_codes[starts]] = sums
+    return out
+
+
+##########################################
+          # AGGREGATION ENGINE #
+##########################################
+
+class _GroupedViews:
+    """
+    Zone/tech views shared by ResourceAggregates and StreamingAggregates.
+    Subclasses set self.index, self.columns and self.resources and provide
+    by_zone_tech; everything else is derived from it.
+    """
+
+    @cached_property
+    def zones(self):
+        return list(self.resources.levels[0])
+
+    @cached_property
+    def techs(self):
+        return list(self.resources.levels[1])
+
+    @cached_property
+    def _zone_tech_codes(self):
+        zone_codes = self.resources.codes[0].astype(np.int64)
+        tech_codes = self.resources.codes[1].astype(np.int64)
+        pair_codes, pairs = pd.factorize(zone_codes * len(self.techs) + tech_codes, sort=True)
+        return pair_codes, pairs // len(self.techs), pairs % len(self.techs)
+
+    def _zone_tech_columns(self):
+        _, pair_zone, pair_tech = self._zone_tech_codes
+        return pd.MultiIndex.from_arrays(
+            [np.asarray(self.zones, dtype=object)[pair_zone], np.asarray(self.techs, dtype=object)[pair_tech]],
+            names=["zone", "tech"],
+        )
+
+    @cached_property
+    def by_zone(self):
+        """Sum over all resources in each zone."""
+        _, pair_zone, _ = self._zone_tech_codes
+        sums = grouped_sum(self.by_zone_tech.to_numpy(), pair_zone, len(self.zones))
+        return pd.DataFrame(sums, index=self.index, columns=pd.Index(self.zones, name="zone"))
+
+    @cached_property
+    def by_tech(self):
+        """Sum over all zones for each technology."""
+        _, _, pair_tech = self._zone_tech_codes
+        sums = grouped_sum(self.by_zone_tech.to_numpy(), pair_tech, len(self.techs))
+        return pd.DataFrame(sums, index=self.index, columns=pd.Index(self.techs, name="tech"))
+
+    def zone_units(self, zone):
+        """
+        Return (columns, techs, units) of the resources in one zone,
+        in file order.
+        """
+        mask = self.resources.get_level_values("zone") == zone
+        return (
+            list(self.columns[mask]),
+            list(self.resources.get_level_values("tech")[mask]),
+            list(self.resources.get_level_values("unit")[mask]),
+        )
+
+
+class ResourceAggregates(_GroupedViews):
+    """
+    Per-unit, per-zone×tech, per-zone and per-tech sums of a GenX
+    per-resource time series (power.csv, charge.csv, ...).
+
+    Build it once per scenario and share it between plots and summaries:
+    every frame is computed on first use and then cached.
+    """
+
+    def __init__(self, data, header=None):
+        """
+        data: timestep rows of the result file (see result_store.load_genx_result).
+        header: its header rows; the "Zone" row is used for zone assignment.
+        """
+        resource_cols = [c for c in data.columns if c != "Total"]
+        zone_ids = None
+        if header is not None and "Zone" in header.index:
+            zone_ids = header.loc["Zone", resource_cols].to_numpy()
+
+        self.index = data.index
+        self.columns = pd.Index(resource_cols)
+        self.resources = build_resource_index(resource_cols, zone_ids)
+        self.values = data[resource_cols].to_numpy()
+
+    @cached_property
+    def by_unit(self):
+        """All resource columns with a (zone, tech, unit) column MultiIndex."""
+        return pd.DataFrame(self.values, index=self.index, columns=self.resources)
+
+    @cached_property
+    def by_zone_tech(self):
+        """Sum over units: one column per (zone, tech) pair that exists."""
+        pair_codes, pair_zone, _ = self._zone_tech_codes
+        sums = grouped_sum(self.values, pair_codes, len(pair_zone))
+        return pd.DataFrame(sums, index=self.index, columns=self._zone_tech_columns())
+
+    def unit_series(self, zone):
+        """Time series of every resource in one zone (columns as in the file)."""
+        cols, _, _ = self.zone_units(zone)
+        mask = self.resources.get_level_values("zone") == zone
+        return pd.DataFrame(self.values[:, mask], index=self.index, columns=cols)
+
+
+class StreamingAggregates(_GroupedViews):
+    """
+    The same sums as ResourceAggregates, computed in a single pass over a
+    result file read in chunks (see result_store.iter_genx_csv). Only the
+    zone×tech sums (timesteps × pairs) are kept, never the full timesteps × resources table, so very large
+    power.csv / charge.csv / flow.csv files fit in bounded memory -- unless
+    keep_units asks for the per-unit series too.
+    """
+
+    def __init__(self, csv_path, chunk_rows=DEFAULT_CHUNK_ROWS, float32=False, use_cache=True,
+                 keep_units=False):
+        """
+        csv_path: a GenX per-resource time-series CSV.
+        keep_units: also keep every zone's unit series from the same pass,
+        for per-unit plots (see unit_series).
+        """
+        self.csv_path = Path(csv_path)
+        self.chunk_rows = chunk_rows
+        self.float32 = float32
+        self.use_cache = use_cache
+        self.keep_units = keep_units
+
+        header = read_genx_header(self.csv_path)
+        if header is None:
+            raise ValueError(f"{self.csv_path} has no timestep rows.")
+        resource_cols = [c for c in header.columns if c != "Total"]
+        zone_ids = header.loc["Zone", resource_cols].to_numpy() if "Zone" in header.index else None
+
+        self.header = header
+        self.columns = pd.Index(resource_cols)
+        self.resources = build_resource_index(resource_cols, zone_ids)
+        self._consume()
+
+    def _chunks(self, columns):
+        return iter_genx_csv(self.csv_path, columns=columns, chunk_rows=self.chunk_rows,
+                             float32=self.float32, use_cache=self.use_cache)
+
+    def _consume(self):
+        pair_codes, pair_zone, _ = self._zone_tech_codes
+        dtype = np.float32 if self.float32 else np.float64
+
+        zone_codes = self.resources.codes[0]
+        zone_masks = [zone_codes == i for i in range(len(self.zones))] if self.keep_units else []
+        unit_chunks = [[] for _ in zone_masks]
+
+        labels, pair_sums = [], []
+        for chunk in self._chunks(list(self.columns)):
+            values = chunk.to_numpy()
+            labels.append(chunk.index.to_numpy())
+            pair_sums.append(grouped_sum(values, pair_codes, len(pair_zone)))
+            for mask, chunks in zip(zone_masks, unit_chunks):
+                chunks.append(values[:, mask])
+
+        self.index = pd.Index(np.concatenate(labels) if labels else [])
+        sums = np.concatenate(pair_sums) if pair_sums else np.zeros((0, len(pair_zone)), dtype=dtype)
+        self.by_zone_tech = pd.DataFrame(sums, index=self.index, columns=self._zone_tech_columns())
+        self._unit_values = {
+            zone: np.concatenate(chunks) if chunks else np.zeros((0, int(mask.sum())), dtype=dtype)
+            for zone, mask, chunks in zip(self.zones, zone_masks, unit_chunks)
+        } if self.keep_units else None
+
+    def unit_series(self, zone):
+        """
+        Time series of every resource in one zone: kept from the main pass
+        with keep_units, otherwise the file is streamed again, reading only
+        that zone's columns.
+        """
+        cols, _, _ = self.zone_units(zone)
+        if self._unit_values is not None:
+            return pd.DataFrame(self._unit_values[zone], index=self.index, columns=cols)
+        return pd.concat(list(self._chunks(cols)))
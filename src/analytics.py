@@ -0,0 +1,207 @@
+import numpy as np
+import pandas as pd
+
+from aggregation import build_resource_index
+
+
+# capacity.csv columns summed by zone x tech (RetroCap only in newer GenX)
+CAPACITY_COLUMNS = ["StartCap", "RetCap", "RetroCap", "NewCap", "EndCap"]
+
+# Share of a line's limit above which an hour counts as congested
+DEFAULT_CONGESTION_THRESHOLD = 0.99
+
+# Utilization histogram bins (share of the line limit)
+UTILIZATION_BINS = np.linspace(0.0, 1.0, 11)
+
+# Quantiles reported for line utilization and prices
+QUANTILES = [0.5, 0.9, 0.99]
+
+
+##########################################
+          # WEIGHTED STATISTICS #
+##########################################
+
+def _weights(weights, n_rows):
+    return np.ones(n_rows) if weights is None else np.asarray(weights, dtype=float)[:n_rows]
+
+
+def weighted_quantiles(values, weights, quantiles):
+    """
+    Weighted quantiles of every column of a 2-D array at once (NaNs
+    ignored): one argsort along time, then a cumulative-weight search
+    done for all columns together. Returns shape (len(quantiles), n_cols).
+    """
+    values = np.asarray(values, dtype=float)
+    w = np.where(np.isnan(values), 0.0, _weights(weights, len(values))[:, None])
+    order = np.argsort(values, axis=0)  # NaNs sort last, with weight 0
+    sorted_values = np.take_along_axis(values, order, axis=0)
+    cum = np.cumsum(np.take_along_axis(w, order, axis=0), axis=0)
+    total = cum[-1]
+    with np.errstate(invalid="ignore", divide="ignore"):
+        share = cum / total
+    out = np.full((len(quantiles), values.shape[1]), np.nan)
+    for i, q in enumerate(quantiles):
+        # First position whose cumulative share reaches q, per column
+        idx = np.minimum((share < q).sum(axis=0), len(values) - 1)
+        out[i] = np.where(total > 0, sorted_values[idx, np.arange(values.shape[1])], np.nan)
+    return out
+
+
+##########################################
+            # CAPACITY #
+##########################################
+
+def capacity_by_zone_tech(capacity):
+    """
+    Start/Ret/Retro/New/EndCap of capacity.csv summed by (zone, tech), zone
+    and tech parsed from the resource names as everywhere else (see
+    aggregation.build_resource_index).
+    """
+    table = capacity[capacity["Resource"] != "Total"]
+    columns = [c for c in CAPACITY_COLUMNS if c in table.columns]
+    index = build_resource_index(table["Resource"], table["Zone"].to_numpy())
+    values = table[columns].apply(pd.to_numeric, errors="coerce").fillna(0.0)
+    values.index = index
+    return values.groupby(level=["zone", "tech"], observed=True, sort=False).sum()
+
+
+##########################################
+            # NETWORK #
+##########################################
+
+def line_limits(network, expansion=None):
+    """
+    Flow limits per line (MW) from system/Network.csv, plus the new
+    transmission capacity GenX built (network_expansion.csv). Columns:
+    max_flow (positive direction), min_flow (magnitude of the negative
+    direction limit), new_capacity. Indexed by line number as text, like
+    the columns of flow.csv.
+    """
+    lines = network.dropna(subset=["Network_Lines"])
+    index = lines["Network_Lines"].astype(int).astype(str)
+    max_flow = pd.to_numeric(lines["Line_Max_Flow_MW"], errors="coerce").to_numpy()
+    if "Line_Min_Flow_MW" in lines.columns:
+        min_flow = np.abs(pd.to_numeric(lines["Line_Min_Flow_MW"], errors="coerce").to_numpy())
+    else:
+        min_flow = max_flow
+    limits = pd.DataFrame({"max_flow": max_flow, "min_flow": min_flow, "new_capacity": 0.0}, index=index)
+    limits.index.name = "Line"
+
+    if expansion is not None and "New_Trans_Capacity" in expansion.columns:
+        new = pd.to_numeric(expansion["New_Trans_Capacity"], errors="coerce").fillna(0.0)
+        new.index = expansion["Line"].astype(int).astype(str)
+        limits["new_capacity"] = new.reindex(limits.index).fillna(0.0).abs()
+    return limits
+
+
+def line_energy(flow, weights=None):
+    """
+    Annual energy moved over every line in each direction (MWh), weighted
+    with time_weights.csv. All that can be said about the lines when their
+    limits (system/Network.csv) are unknown.
+    """
+    values = flow.to_numpy(dtype=float)
+    w = _weights(weights, len(values))
+    return pd.DataFrame({
+        "Energy + (MWh)": np.nansum(np.clip(values, 0, None) * w[:, None], axis=0),
+        "Energy - (MWh)": np.nansum(np.clip(-values, 0, None) * w[:, None], axis=0),
+    }, index=pd.Index(flow.columns, name="Line"))
+
+
+def line_utilization(flow, limits, weights=None, threshold=DEFAULT_CONGESTION_THRESHOLD):
+    """
+    Utilization of every line in every hour: |flow| over the limit in the
+    flow's direction (existing limit + new capacity), computed for the whole
+    (hours x lines) array at once. Lines without a limit in a direction are
+    NaN there.
+
+    Returns (utilization DataFrame, summary DataFrame, histogram DataFrame):
+    - summary per line: limits, weighted mean and quantiles of utilization,
+      max, congested hours (utilization >= threshold) and annual energy
+      moved in each direction. Hours are weighted with time_weights.csv, so
+      they are annual hours even with time-domain reduction.
+    - histogram: annual hours per line in each utilization bin.
+    """
+    lines = [line for line in flow.columns if line in limits.index]
+    values = flow[lines].to_numpy(dtype=float)
+    w = _weights(weights, len(values))
+    limit = limits.loc[lines]
+    positive = (limit["max_flow"] + limit["new_capacity"]).to_numpy()
+    negative = (limit["min_flow"] + limit["new_capacity"]).to_numpy()
+
+    # Per-hour limit in the direction of the flow, then one division (an
+    # idle hour counts as 0% even on a line built for one direction only)
+    direction_limit = np.where(values > 0, positive[None, :],
+                               np.where(values < 0, negative[None, :], np.fmax(positive, negative)[None, :]))
+    with np.errstate(invalid="ignore", divide="ignore"):
+        utilization = np.where(direction_limit > 0, np.abs(values) / direction_limit, np.nan)
+
+    valid = ~np.isnan(utilization)
+    hours = (w[:, None] * valid).sum(axis=0)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        mean = np.nansum(utilization * w[:, None], axis=0) / hours
+    quantiles = weighted_quantiles(utilization, w, QUANTILES)
+    congested = ((utilization >= threshold) * w[:, None]).sum(axis=0)
+
+    summary = pd.DataFrame({
+        "Limit + (MW)": positive,
+        "Limit - (MW)": negative,
+        "New capacity (MW)": limit["new_capacity"].to_numpy(),
+        "Mean utilization": mean,
+        **{f"P{int(q * 100)} utilization": quantiles[i] for i, q in enumerate(QUANTILES)},
+        "Max utilization": np.nanmax(np.where(valid, utilization, -np.inf), axis=0),
+        "Congested hours": congested,
+    }, index=pd.Index(lines, name="Line")).join(line_energy(flow[lines], weights))
+    summary.loc[hours == 0, ["Max utilization"]] = np.nan
+
+    # Histogram: bin codes for the whole array, one weighted bincount
+    n_bins = len(UTILIZATION_BINS) - 1
+    bins = np.clip(np.digitize(np.nan_to_num(utilization, nan=-1.0), UTILIZATION_BINS[1:-1]), 0, n_bins - 1)
+    codes = (np.arange(len(lines))[None, :] * n_bins + bins)[valid]
+    counts = np.bincount(codes, weights=np.broadcast_to(w[:, None], utilization.shape)[valid],
+                         minlength=len(lines) * n_bins).reshape(len(lines), n_bins)
+    labels = [f"{lo:.0%}-{hi:.0%}" for lo, hi in zip(UTILIZATION_BINS[:-1], UTILIZATION_BINS[1:])]
+    histogram = pd.DataFrame(counts, index=summary.index, columns=labels)
+
+    return pd.DataFrame(utilization, index=flow.index, columns=lines), summary, histogram
+
+
+##########################################
+            # PRICES #
+##########################################
+
+def price_duration(prices, weights=None, points=101):
+    """
+    Price duration curves: for each zone, the price exceeded in a given
+    number of hours of the year, from most to fewest. Evaluated at `points`
+    evenly spaced shares of the (weighted) year for all zones at once.
+    Returns a DataFrame indexed by hours, one column per zone.
+    """
+    values = prices.to_numpy(dtype=float)
+    w = _weights(weights, len(values))
+    shares = np.linspace(0.0, 1.0, points)
+    # The price exceeded in a share s of hours is the (1 - s) quantile
+    curve = weighted_quantiles(values, w, 1.0 - shares)
+    table = pd.DataFrame(curve, index=pd.Index(np.round(shares * w.sum(), 1), name="Hours"),
+                         columns=prices.columns)
+    return table
+
+
+def price_summary(prices, weights=None):
+    """
+    Weighted mean, quantiles, min/max and hours at or below zero price per
+    zone.
+    """
+    values = prices.to_numpy(dtype=float)
+    w = _weights(weights, len(values))[:, None]
+    valid = ~np.isnan(values)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        mean = np.nansum(values * w, axis=0) / (w * valid).sum(axis=0)
+    quantiles = weighted_quantiles(values, w[:, 0], QUANTILES)
+    return pd.DataFrame({
+        "Mean price": mean,
+        **{f"P{int(q * 100)} price": quantiles[i] for i, q in enumerate(QUANTILES)},
+        "Min price": np.nanmin(values, axis=0),
+        "Max price": np.nanmax(values, axis=0),
+        "Hours at or below 0": ((values <= 0) * w).sum(axis=0),
+    }, index=pd.Index(prices.columns, name="Zone"))
@@ -0,0 +1,333 @@
+import argparse
+import datetime
+import json
+import multiprocessing
+import os
+import platform
+import shutil
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from aggregation import ResourceAggregates, StreamingAggregates
+from harvest import harvest_scenario
+from plot_functions import power_plot_jobs
+from profiling import peak_rss_mb
+from render import render_job
+from result_store import ingest_genx_csv, load_genx_result, parse_genx_csv
+from synthetic_results import SCALES, generate_scale
+
+# Benchmarks of the post-processing path on synthetic GenX results (no Julia):
+#
+#   python src/benchmark.py --scale small medium
+#   python src/benchmark.py --scale small --update-baseline
+#
+# Every benchmark runs in a fresh process, so its peak RSS is its own.
+# Results are compared with a baseline file and regressions are flagged
+# (exit code 1).
+
+
+DEFAULT_BASELINE = Path(__file__).resolve().parents[1] / "output" / "benchmarks" / "baseline.json"
+
+# A benchmark regresses when it is this much slower (or uses this much more
+# memory) than the baseline
+DEFAULT_TOLERANCE = 0.25
+
+# Figures rendered by the render benchmark (rendering all of them would
+# take minutes at the larger scales)
+RENDER_SAMPLE = 4
+
+BENCH_PLOT_SETTINGS = {
+    "fig_size": [10, 6],
+    "dpi": 100,
+    "zone_aggregation_method": 1,
+    "decimation": {"mode": "lttb", "points": 1500},
+}
+
+
+##########################################
+            # BENCHMARKS #
+##########################################
+
+# Each benchmark: setup(case_dir, work_dir) -> state (untimed), then
+# run(state) -> amount of work done (timed), with the unit of that amount.
+
+def _power_csv(case_dir):
+    return Path(case_dir) / "results" / "power.csv"
+
+
+def _size_mb(path):
+    return Path(path).stat().st_size / 1e6
+
+
+def _bench_parse_csv():
+    def setup(case_dir, work_dir):
+        return _power_csv(case_dir)
+
+    def run(csv_path):
+        parse_genx_csv(csv_path)
+        return _size_mb(csv_path)
+
+    return setup, run, "MB/s"
+
+
+def _bench_ingest():
+    def setup(case_dir, work_dir):
+        return _power_csv(case_dir)
+
+    def run(csv_path):
+        ingest_genx_csv(csv_path, force=True)
+        return _size_mb(csv_path)
+
+    return setup, run, "MB/s"
+
+
+def _bench_load_cached():
+    def setup(case_dir, work_dir):
+        ingest_genx_csv(_power_csv(case_dir))
+        return _power_csv(case_dir)
+
+    def run(csv_path):
+        data, _ = load_genx_result(csv_path)
+        return data.size / 1e6
+
+    return setup, run, "M values/s"
+
+
+def _bench_aggregate():
+    def setup(case_dir, work_dir):
+        return load_genx_result(_power_csv(case_dir))
+
+    def run(loaded):
+        data, header = loaded
+        aggregates = ResourceAggregates(data, header)
+        aggregates.by_zone_tech, aggregates.by_zone, aggregates.by_tech
+        return data.size / 1e6
+
+    return setup, run, "M values/s"
+
+
+def _bench_stream_aggregate():
+    def setup(case_dir, work_dir):
+        return _power_csv(case_dir)
+
+    def run(csv_path):
+        aggregates = StreamingAggregates(csv_path, use_cache=False)
+        aggregates.by_zone, aggregates.by_tech
+        return _size_mb(csv_path)
+
+    return setup, run, "MB/s"
+
+
+def _bench_plot_jobs():
+    def setup(case_dir, work_dir):
+        data, header = load_genx_result(_power_csv(case_dir))
+        return data, ResourceAggregates(data, header), work_dir
+
+    def run(state):
+        data, aggregates, work_dir = state
+        jobs = power_plot_jobs(data, {}, BENCH_PLOT_SETTINGS, work_dir, "bench", aggregates=aggregates)
+        return len(jobs)
+
+    return setup, run, "plots/s"
+
+
+def _bench_render():
+    def setup(case_dir, work_dir):
+        data, header = load_genx_result(_power_csv(case_dir))
+        aggregates = ResourceAggregates(data, header)
+        jobs = power_plot_jobs(data, {}, BENCH_PLOT_SETTINGS, work_dir, "bench", aggregates=aggregates)
+        return jobs[:RENDER_SAMPLE]
+
+    def run(jobs):
+        for job in jobs:
+            render_job(job)
+        return len(jobs)
+
+    return setup, run, "figures/s"
+
+
+def _bench_harvest(mode):
+    def setup(case_dir, work_dir):
+        # A fresh copy of the case for every repeat (harvesting consumes it)
+        return Path(case_dir), Path(work_dir)
+
+    def run(state):
+        case_dir, work_dir = state
+        source = work_dir / "harvest_case"
+        dest = work_dir / "harvest_out"
+        shutil.rmtree(source, ignore_errors=True)
+        shutil.rmtree(dest, ignore_errors=True)
+        shutil.copytree(case_dir / "results", source / "results")
+        os.makedirs(dest)
+        size_mb = sum(p.stat().st_size for p in (source / "results").glob("*.csv")) / 1e6
+
+        t0 = time.perf_counter()
+        harvest_scenario(source, dest, mode=mode)
+        return size_mb, time.perf_counter() - t0
+
+    return setup, run, "MB/s"
+
+
+BENCHMARKS = {
+    "parse_csv": _bench_parse_csv,
+    "ingest_columnar": _bench_ingest,
+    "load_cached": _bench_load_cached,
+    "aggregate": _bench_aggregate,
+    "stream_aggregate": _bench_stream_aggregate,
+    "plot_jobs": _bench_plot_jobs,
+    "render": _bench_render,
+    "harvest_move": lambda: _bench_harvest("move"),
+    "harvest_copy": lambda: _bench_harvest("copy"),
+}
+
+
+def run_benchmark(name, case_dir, work_dir, repeat):
+    """
+    Run one benchmark `repeat` times (in the calling process) and return
+    {"seconds" (best), "mean_seconds", "throughput", "unit", "peak_rss_mb"}.
+    """
+    setup, run, unit = BENCHMARKS[name]()
+    state = setup(case_dir, work_dir)
+
+    times, amount = [], 0
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        amount = run(state)
+        elapsed = time.perf_counter() - t0
+        if isinstance(amount, tuple):  # the benchmark timed itself (harvest: excludes the copy)
+            amount, elapsed = amount
+        times.append(elapsed)
+
+    best = min(times)
+    return {
+        "seconds": best,
+        "mean_seconds": float(np.mean(times)),
+        "throughput": amount / best if best > 0 else None,
+        "unit": unit,
+        "peak_rss_mb": peak_rss_mb(),
+    }
+
+
+##########################################
+          # BASELINE COMPARISON #
+##########################################
+
+def compare_to_baseline(results, baseline, tolerance=DEFAULT_TOLERANCE):
+    """
+    List of (scale, benchmark, metric, baseline value, new value) for every
+    benchmark that got slower or bigger than baseline * (1 + tolerance).
+    """
+    regressions = []
+    for scale, benches in results["scales"].items():
+        for name, new in benches.items():
+            if name == "spec":
+                continue
+            old = baseline.get("scales", {}).get(scale, {}).get(name)
+            if old is None:
+                continue
+            for metric in ("seconds", "peak_rss_mb"):
+                if old.get(metric) and new.get(metric) and new[metric] > old[metric] * (1 + tolerance):
+                    regressions.append((scale, name, metric, old[metric], new[metric]))
+    return regressions
+
+
+def system_info():
+    return {
+        "platform": platform.platform(),
+        "machine": platform.machine(),
+        "cpu_count": os.cpu_count(),
+        "python": sys.version.split()[0],
+        "numpy": np.__version__,
+        "pandas": pd.__version__,
+    }
+
+
+def run_suite(scales, benchmarks, repeat=3, work_root=None, seed=0):
+    """
+    Generate a synthetic case per scale and run every benchmark on it, each
+    in its own spawned process. Returns the results dict.
+    """
+    results = {
+        "created": datetime.datetime.now().isoformat(timespec="seconds"),
+        "system": system_info(),
+        "repeat": repeat,
+        "scales": {},
+    }
+    ctx = multiprocessing.get_context("spawn")
+
+    with tempfile.TemporaryDirectory(dir=work_root) as tmp:
+        for scale in scales:
+            case_dir = Path(tmp) / scale / "case"
+            spec = SCALES[scale]
+            print(f"\n[{scale}] Generating {spec['zones']} zones / {spec['resources']} resources / "
+                  f"{spec['hours']} hours...")
+            t0 = time.perf_counter()
+            generate_scale(case_dir, scale, seed=seed)
+            print(f"[{scale}] Generated in {time.perf_counter() - t0:.1f} s "
+                  f"(power.csv: {_size_mb(_power_csv(case_dir)):.1f} MB)")
+
+            results["scales"][scale] = {"spec": spec}
+            for name in benchmarks:
+                work_dir = Path(tmp) / scale / name
+                os.makedirs(work_dir, exist_ok=True)
+                with ProcessPoolExecutor(max_workers=1, mp_context=ctx) as pool:
+                    result = pool.submit(run_benchmark, name, case_dir, work_dir, repeat).result()
+                results["scales"][scale][name] = result
+                throughput = f"{result['throughput']:.1f} {result['unit']}" if result["throughput"] else "n/a"
+                print(f"[{scale}] {name:18s} {result['seconds']:8.3f} s  {throughput:>18s}  "
+                      f"peak {result['peak_rss_mb'] or 0:.0f} MB")
+
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark GenX post-processing on synthetic results.")
+    parser.add_argument("--scale", nargs="+", choices=list(SCALES), default=["small"])
+    parser.add_argument("--bench", nargs="+", choices=list(BENCHMARKS), default=list(BENCHMARKS))
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--baseline", type=Path, default=DEFAULT_BASELINE)
+    parser.add_argument("--tolerance", type=float, default=DEFAULT_TOLERANCE)
+    parser.add_argument("--update-baseline", action="store_true", help="Save these results as the new baseline.")
+    parser.add_argument("--work-dir", help="Where synthetic cases are generated (default: system temp).")
+    args = parser.parse_args()
+
+    results = run_suite(args.scale, args.bench, repeat=args.repeat, work_root=args.work_dir, seed=args.seed)
+
+    results_path = args.baseline.parent / f"{datetime.datetime.now().strftime('%Y%m%d%H%M%S')}.json"
+    os.makedirs(results_path.parent, exist_ok=True)
+    with results_path.open("w") as f:
+        json.dump(results, f, indent=2)
+    print(f"\nResults written to {results_path}")
+
+    regressions = []
+    if args.baseline.exists():
+        with args.baseline.open("r") as f:
+            regressions = compare_to_baseline(results, json.load(f), args.tolerance)
+        for scale, name, metric, old, new in regressions:
+            print(f"REGRESSION [{scale}] {name}: {metric} {old:.3f} -> {new:.3f} (+{(new / old - 1) * 100:.0f}%)")
+        if not regressions:
+            print(f"No regressions against {args.baseline} (tolerance {args.tolerance:.0%}).")
+    else:
+        print(f"No baseline at {args.baseline}; run with --update-baseline to create one.")
+
+    if args.update_baseline:
+        # Keep other scales' baselines when only some scales were run
+        baseline = {"scales": {}}
+        if args.baseline.exists():
+            with args.baseline.open("r") as f:
+                baseline = json.load(f)
+        baseline.update({k: v for k, v in results.items() if k != "scales"})
+        for scale, benches in results["scales"].items():
+            baseline.setdefault("scales", {}).setdefault(scale, {}).update(benches)
+        with args.baseline.open("w") as f:
+            json.dump(baseline, f, indent=2)
+        print(f"Baseline updated: {args.baseline}")
+
+    sys.exit(1 if regressions and not args.update_baseline else 0)
@@ -0,0 +1,148 @@
+import numpy as np
+
+
+# Timesteps per aggregation period (GenX time series are hourly)
+PERIOD_HOURS = {"daily": 24, "weekly": 168}
+
+DEFAULT_POINTS = 1500
+
+
+##########################################
+        # DECIMATION METHODS #
+##########################################
+
+def minmax_envelope(y, n_points):
+    """
+    Keep the minimum and maximum of each bucket (in time order), so peaks and
+    troughs survive. Returns (x, y) with at most ~n_points points.
+    """
+    y = np.asarray(y, dtype=float)
+    n = len(y)
+    n_buckets = max(1, n_points // 2)
+    if n <= 2 * n_buckets:
+        return np.arange(n), y
+
+    bucket_size = int(np.ceil(n / n_buckets))
+    n_buckets = int(np.ceil(n / bucket_size))
+    pad = n_buckets * bucket_size - n
+
+    # NaNs (and padding) never win a min/max
+    lo = np.concatenate([np.where(np.isnan(y), np.inf, y), np.full(pad, np.inf)])
+    hi = np.concatenate([np.where(np.isnan(y), -np.inf, y), np.full(pad, -np.inf)])
+    offsets = np.arange(n_buckets) * bucket_size
+    i_min = offsets + lo.reshape(n_buckets, bucket_size).argmin(axis=1)
+    i_max = offsets + hi.reshape(n_buckets, bucket_size).argmax(axis=1)
+
+    idx = np.sort(np.stack([i_min, i_max], axis=1), axis=1).ravel()
+    idx = idx[np.r_[True, idx[1:] != idx[:-1]]]  # flat buckets give the same index twice
+    return idx, y[idx]
+
+
+def lttb(y, n_points, x=None):
+    """
+    Largest-Triangle-Three-Buckets downsampling: keeps the first and last
+    point, plus the point of each bucket that forms the largest triangle with
+    the previous pick and the next bucket's average. Returns (x, y).
+    """
+    y = np.asarray(y, dtype=float)
+    n = len(y)
+    x = np.arange(n, dtype=float) if x is None else np.asarray(x, dtype=float)
+    if n_points >= n or n_points < 3:
+        return x, y
+
+    # n_points - 2 buckets over the inner points 1 .. n-2
+    edges = np.floor(np.linspace(1, n - 1, n_points - 1)).astype(int)
+    picked = np.empty(n_points, dtype=int)
+    picked[0] = 0
+    picked[-1] = n - 1
+
+    a = 0
+    for i in range(n_points - 2):
+        start, end = edges[i], edges[i + 1]
+        if i + 2 < len(edges):
+            next_start, next_end = edges[i + 1], edges[i + 2]
+        else:
+            next_start, next_end = n - 1, n
+        avg_x = x[next_start:next_end].mean()
+        avg_y = np.nanmean(y[next_start:next_end]) if np.any(~np.isnan(y[next_start:next_end])) else y[a]
+
+        xs = x[start:end]
+        ys = y[start:end]
+        area = np.abs((x[a] - avg_x) * (ys - y[a]) - (x[a] - xs) * (avg_y - y[a]))
+        a = start + int(np.nanargmax(area)) if np.any(~np.isnan(area)) else start
+        picked[i + 1] = a
+
+    return x[picked], y[picked]
+
+
+def aggregate_periods(y, period, how="mean", weights=None):
+    """
+    Aggregate an hourly series into consecutive periods of `period` steps.
+
+    how: "mean" (weighted mean), "sum" (weighted sum) or "max".
+    weights: per-timestep weights (results/time_weights.csv); with
+    time-domain reduction each modeled hour stands for several real hours,
+    so means and sums are weighted by them. Defaults to 1 for every step.
+
+    Returns (x, y) with x at the middle of each period.
+    """
+    y = np.asarray(y, dtype=float)
+    n = len(y)
+    w = np.ones(n) if weights is None else np.asarray(weights, dtype=float)[:n]
+
+    n_periods = int(np.ceil(n / period))
+    pad = n_periods * period - n
+    yp = np.concatenate([y, np.full(pad, np.nan)]).reshape(n_periods, period)
+    wp = np.concatenate([w, np.zeros(pad)]).reshape(n_periods, period)
+    wp = np.where(np.isnan(yp), 0.0, wp)
+
+    if how == "max":
+        out = np.nanmax(yp, axis=1)
+    elif how == "sum":
+        out = np.nansum(yp * wp, axis=1)
+    elif how == "mean":
+        out = np.nansum(yp * wp, axis=1) / np.where(wp.sum(axis=1) > 0, wp.sum(axis=1), np.nan)
+    else:
+        raise ValueError(f"Unknown aggregation '{how}' (expected 'mean', 'sum' or 'max').")
+
+    starts = np.arange(n_periods) * period
+    lengths = np.minimum(period, n - starts)
+    return starts + (lengths - 1) / 2, out
+
+
+##########################################
+        # PLOT-SERIES INTERFACE #
+##########################################
+
+def decimate_series(series, decimation=None, weights=None):
+    """
+    Apply a plot's "decimation" setting to a list of plot series
+    (dicts with "y" and optional "x", see render.line_job).
+
+    decimation (from plot_settings/*.json):
+      {"mode": "none" | "minmax" | "lttb" | "daily" | "weekly",
+       "points": 1500,      # target points per line for minmax / lttb
+       "how": "mean"}       # mean | sum | max for daily / weekly
+
+    x positions stay in original timestep units, so tick labels still line up.
+    """
+    if not decimation or decimation.get("mode", "none") == "none":
+        return series
+
+    mode = decimation["mode"]
+    n_points = int(decimation.get("points", DEFAULT_POINTS))
+    how = decimation.get("how", "mean")
+
+    out = []
+    for s in series:
+        y = np.asarray(s["y"], dtype=float)
+        if mode == "minmax":
+            x, y = minmax_envelope(y, n_points)
+        elif mode == "lttb":
+            x, y = lttb(y, n_points)
+        elif mode in PERIOD_HOURS:
+            x, y = aggregate_periods(y, PERIOD_HOURS[mode], how, weights)
+        else:
+            raise ValueError(f"Unknown decimation mode '{mode}'.")
+        out.append({**s, "x": x, "y": y})
+    return out
@@ -0,0 +1,450 @@
+import os
+import queue
+import shlex
+import shutil
+import subprocess
+import tarfile
+import tempfile
+import time
+import uuid
+from abc import ABC, abstractmethod
+from pathlib import Path
+
+from genx_runner import THREAD_ENV_VARS, build_genx_command
+from harvest import GENX_OUTPUT_DIRS, INPUT_DIRS
+from run_cache import hash_case_inputs
+
+
+# Case folders shipped to the machine that solves: the inputs, plus
+# TDR_results/ when the case already has one (GenX then skips clustering)
+SHIPPED_DIRS = sorted(INPUT_DIRS) + ["TDR_results"]
+
+# Backends for genx.executor.type. "local" is the default in-process
+# scheduler of genx_runner.run_scenarios (subprocess or persistent workers).
+EXECUTOR_TYPES = ["local", "localhost", "ssh", "batch"]
+
+DEFAULT_RETRIES = 1
+DEFAULT_REMOTE_WORKDIR = "genx_runs"
+DEFAULT_POLL_SECONDS = 30
+
+# Under the output root: one folder per batch job (case tarball, job script,
+# log, results tarball), so a restarted sweep can pick finished jobs up
+BATCH_DIR_NAME = ".batch_jobs"
+
+
+##########################################
+            # TARBALLS #
+##########################################
+
+def pack_case(case_dir, fileobj):
+    """
+    Write the inputs of a GenX case (SHIPPED_DIRS) to fileobj as a gzipped
+    tar stream. Symlinks are followed, so sweep cases that link to their
+    base case ship as regular files.
+    """
+    case_dir = Path(case_dir)
+    with tarfile.open(fileobj=fileobj, mode="w|gz", dereference=True) as tar:
+        for name in SHIPPED_DIRS:
+            if (case_dir / name).exists():
+                tar.add(case_dir / name, arcname=name,
+                        filter=lambda info: None if Path(info.name).name.startswith(".") else info)
+
+
+def unpack_results(fileobj, case_dir):
+    """
+    Extract a gzipped tar stream of GenX output folders into case_dir,
+    replacing earlier copies of the same folders. The stream is unpacked
+    next to them first, so a broken transfer leaves case_dir untouched.
+    Returns the names of the folders unpacked.
+    """
+    case_dir = Path(case_dir)
+    incoming = case_dir / f".incoming-{uuid.uuid4().hex[:8]}"
+    try:
+        with tarfile.open(fileobj=fileobj, mode="r|gz") as tar:
+            if hasattr(tarfile, "data_filter"):
+                tar.extractall(incoming, filter="data")
+            else:
+                tar.extractall(incoming)
+        names = sorted(item.name for item in incoming.iterdir()) if incoming.exists() else []
+        for name in names:
+            dest = case_dir / name
+            if dest.is_dir():
+                shutil.rmtree(dest)
+            os.rename(incoming / name, dest)
+        return names
+    finally:
+        shutil.rmtree(incoming, ignore_errors=True)
+
+
+def _fetch_outputs_script(work_dir):
+    """Shell snippet that writes the GenX output folders of work_dir as a tar.gz to stdout."""
+    return (
+        f"cd {shlex.quote(str(work_dir))} && set -- && "
+        f"for d in {' '.join(GENX_OUTPUT_DIRS)}; do if [ -d \"$d\" ]; then set -- \"$@\" \"$d\"; fi; done && "
+        f"tar czf - \"$@\""
+    )
+
+
+def _genx_shell_command(julia_exe, julia_project, case_dir, threads):
+    """The GenX command for a case as one shell line, with the thread caps of genx_runner.solver_thread_env."""
+    cmd = shlex.join(build_genx_command(julia_exe, julia_project, case_dir, threads))
+    if threads:
+        cmd = "env " + " ".join(f"{var}={int(threads)}" for var in THREAD_ENV_VARS) + " " + cmd
+    return cmd
+
+
+##########################################
+          # EXECUTOR BASE #
+##########################################
+
+class Executor(ABC):
+    """
+    Runs GenX cases somewhere other than this process's own subprocesses.
+    genx_runner.run_scenarios calls run_case from up to `slots` scheduler
+    threads at once; each call ships the case, solves it, brings its
+    output folders back into case_dir (where the harvest picks them up)
+    and retries failed attempts on the next free slot.
+    """
+
+    name = "executor"
+
+    def __init__(self, slots, retries=DEFAULT_RETRIES, threads_per_case=None):
+        self.free_slots = queue.Queue()
+        for slot in slots:
+            self.free_slots.put(slot)
+        self.slots = len(slots)
+        self.retries = max(0, int(retries))
+        self.threads_per_case = threads_per_case
+
+    def run_case(self, scen, case_dir, log_path, threads=None):
+        """
+        Solve one case, retrying up to self.retries times. Returns a result
+        dict like genx_runner's, plus "host" and "attempts".
+        """
+        case_dir = Path(case_dir)
+        started = time.time()
+        t0 = time.perf_counter()
+        with open(log_path, "w"):
+            pass
+
+        for attempt in range(1, self.retries + 2):
+            # A failed slot goes to the back of the queue, so a retry lands
+            # on another host whenever one is free
+            slot = self.free_slots.get()
+            try:
+                with open(log_path, "a") as log:
+                    log.write(f"=== {self.name}: attempt {attempt} on {slot['name']} ===\n")
+                try:
+                    returncode, error = self._run_attempt(slot, scen, case_dir, log_path, threads), None
+                except (OSError, subprocess.SubprocessError, tarfile.TarError, RuntimeError) as e:
+                    returncode, error = None, f"{type(e).__name__}: {e}"
+            finally:
+                self.free_slots.put(slot)
+
+            if returncode == 0:
+                break
+            reason = error or f"exit code {returncode}"
+            with open(log_path, "a") as log:
+                log.write(f"=== attempt {attempt} failed: {reason} ===\n")
+            if attempt <= self.retries:
+                print(f"[{scen}] Attempt {attempt} on {slot['name']} failed ({reason}); retrying")
+
+        result = {
+            "scenario": scen,
+            "status": "OK" if returncode == 0 else "FAILED",
+            "returncode": returncode,
+            "started": started,
+            "elapsed": time.perf_counter() - t0,
+            "log": log_path,
+            "host": slot["name"],
+            "attempts": attempt,
+        }
+        if error is not None:
+            result["error"] = error
+        return result
+
+    @abstractmethod
+    def _run_attempt(self, slot, scen, case_dir, log_path, threads):
+        """Solve case_dir once on slot; returns GenX's exit code."""
+
+    def close(self):
+        pass
+
+
+##########################################
+          # HOST POOL (SSH) #
+##########################################
+
+class HostPoolExecutor(Executor):
+    """
+    Runs cases on a pool of hosts over SSH, `slots` cases per host at once.
+    Each attempt streams the case inputs to <workdir>/<scenario>-<id> on
+    the host, runs GenX there (log streamed back as it runs), streams the
+    output folders back into the local case folder and removes the remote
+    copy.
+
+    hosts: list of {"host", "slots" (default 1), "workdir" (default
+    ~/genx_runs), "julia_executable", "project"}; the last two default to
+    the genx settings. A host of None runs commands locally through `sh`
+    instead of ssh (see LocalhostExecutor).
+    """
+
+    name = "ssh"
+
+    def __init__(self, hosts, julia_exe, julia_project, ssh_options=None, retries=DEFAULT_RETRIES,
+                 threads_per_case=None, keep_remote=False):
+        slots = []
+        for host in hosts:
+            if isinstance(host, str):
+                host = {"host": host}
+            for i in range(int(host.get("slots", 1))):
+                slots.append({
+                    "name": f"{host['host'] or 'localhost'}#{i + 1}",
+                    "host": host["host"],
+                    "workdir": host.get("workdir", DEFAULT_REMOTE_WORKDIR),
+                    "julia_executable": host.get("julia_executable", julia_exe),
+                    "project": host.get("project", julia_project),
+                })
+        if not slots:
+            raise ValueError("The executor needs at least one host with at least one slot.")
+        super().__init__(slots, retries, threads_per_case)
+        self.ssh_options = list(ssh_options) if ssh_options is not None else ["-o", "BatchMode=yes"]
+        self.keep_remote = keep_remote
+
+    def _argv(self, slot, command):
+        if slot["host"] is None:
+            return ["sh", "-c", command]
+        return ["ssh", *self.ssh_options, slot["host"], command]
+
+    def _run(self, slot, command, log):
+        completed = subprocess.run(self._argv(slot, command), stdout=log, stderr=log)
+        return completed.returncode
+
+    def _run_attempt(self, slot, scen, case_dir, log_path, threads):
+        work_dir = f"{slot['workdir'].rstrip('/')}/{scen}-{uuid.uuid4().hex[:8]}"
+        quoted = shlex.quote(work_dir)
+        with open(log_path, "a") as log:
+            try:
+                # 1) Stream the inputs over
+                upload = subprocess.Popen(
+                    self._argv(slot, f"mkdir -p {quoted} && tar xzf - -C {quoted}"),
+                    stdin=subprocess.PIPE, stdout=log, stderr=log,
+                )
+                try:
+                    pack_case(case_dir, upload.stdin)
+                finally:
+                    upload.stdin.close()
+                if upload.wait() != 0:
+                    raise RuntimeError(f"copying the case to {slot['name']} failed (exit code {upload.returncode})")
+
+                # 2) Solve
+                log.flush()
+                print(f"[{scen}] Running on {slot['name']} in {work_dir}")
+                # GenX runs inside work_dir, so the case is "." (work_dir may be relative)
+                command = _genx_shell_command(slot["julia_executable"], slot["project"], ".", threads)
+                returncode = self._run(slot, f"cd {quoted} && {command}", log)
+                if returncode != 0:
+                    return returncode
+
+                # 3) Stream the output folders back
+                fetch = subprocess.Popen(self._argv(slot, _fetch_outputs_script(work_dir)),
+                                         stdout=subprocess.PIPE, stderr=log)
+                try:
+                    fetched = unpack_results(fetch.stdout, case_dir)
+                finally:
+                    fetch.stdout.close()
+                if fetch.wait() != 0 or "results" not in fetched:
+                    raise RuntimeError(f"no results/ came back from {slot['name']}")
+                return 0
+            finally:
+                if not self.keep_remote:
+                    self._run(slot, f"rm -rf {quoted}", log)
+
+
+class LocalhostExecutor(HostPoolExecutor):
+    """
+    Stand-in for an SSH host pool: `workers` slots on this machine, each
+    case solved in its own scratch folder under workdir, with the same
+    tarball shipping, result streaming and retries as the SSH backend.
+    """
+
+    name = "localhost"
+
+    def __init__(self, workers, julia_exe, julia_project, workdir=None, retries=DEFAULT_RETRIES,
+                 threads_per_case=None, keep_remote=False):
+        if workdir is None:
+            workdir = Path(tempfile.gettempdir()) / "genx_executor"
+        host = {"host": None, "slots": workers, "workdir": str(workdir)}
+        super().__init__([host], julia_exe, julia_project, retries=retries, threads_per_case=threads_per_case,
+                         keep_remote=keep_remote)
+
+
+##########################################
+          # BATCH SUBMIT #
+##########################################
+
+BATCH_SCRIPT = """#!/bin/sh
+# GenX case {scenario}, written by executors.BatchExecutor
+JOB_DIR={job_dir}
+rm -rf "$JOB_DIR/case" && mkdir -p "$JOB_DIR/case" && tar xzf "$JOB_DIR/case.tar.gz" -C "$JOB_DIR/case"
+cd "$JOB_DIR/case" && {command} > "$JOB_DIR/genx.log" 2>&1
+code=$?
+if [ "$code" -eq 0 ]; then
+    ({fetch}) > "$JOB_DIR/results.tar.gz" || code=98
+fi
+rm -rf "$JOB_DIR/case"
+echo "$code" > "$JOB_DIR/exit_code.tmp" && mv "$JOB_DIR/exit_code.tmp" "$JOB_DIR/exit_code"
+"""
+
+
+class BatchExecutor(Executor):
+    """
+    Submits each case as a job to a batch scheduler (Slurm, PBS, LSF, ...)
+    through a configurable submit command. Jobs live in folders on a
+    filesystem the compute nodes share (staging_dir): the case tarball,
+    the job script, GenX's log and the results tarball.
+
+    submit_command is formatted with {script}, {job_name} and {job_dir},
+    run through the shell, and the last word it prints is taken as the job
+    id (e.g. "sbatch --parsable -J {job_name} {script}"). The job writes
+    an exit_code file when it ends; the optional status_command (formatted
+    with {job_id}, e.g. "squeue -h -j {job_id}") tells a job that is still
+    queued or running (exit 0, some output) from one that died without
+    writing it.
+
+    Job folders are named after the case's input hash: a sweep restarted
+    after an interruption unpacks jobs that finished meanwhile and waits
+    for ones still running instead of submitting them again.
+    """
+
+    name = "batch"
+
+    def __init__(self, submit_command, staging_dir, julia_exe, julia_project, max_jobs=1, status_command=None,
+                 poll_seconds=DEFAULT_POLL_SECONDS, retries=DEFAULT_RETRIES, threads_per_case=None,
+                 keep_jobs=False):
+        slots = [{"name": f"job slot {i + 1}"} for i in range(int(max_jobs))]
+        super().__init__(slots, retries, threads_per_case)
+        self.submit_command = submit_command
+        self.status_command = status_command
+        self.staging_dir = Path(staging_dir).resolve()
+        self.julia_exe = julia_exe
+        self.julia_project = julia_project
+        self.poll_seconds = poll_seconds
+        self.keep_jobs = keep_jobs
+
+    def _job_alive(self, job_id):
+        if not self.status_command or not job_id:
+            return True
+        completed = subprocess.run(self.status_command.format(job_id=job_id), shell=True,
+                                   capture_output=True, text=True)
+        return completed.returncode == 0 and completed.stdout.strip() != ""
+
+    def _submit(self, scen, case_dir, job_dir, threads):
+        if job_dir.exists():
+            shutil.rmtree(job_dir)
+        os.makedirs(job_dir)
+        with (job_dir / "case.tar.gz").open("wb") as f:
+            pack_case(case_dir, f)
+        script = job_dir / "job.sh"
+        script.write_text(BATCH_SCRIPT.format(
+            scenario=scen,
+            job_dir=shlex.quote(str(job_dir)),
+            command=_genx_shell_command(self.julia_exe, self.julia_project, ".", threads),
+            fetch=_fetch_outputs_script("."),
+        ))
+        os.chmod(script, 0o755)
+        completed = subprocess.run(
+            self.submit_command.format(script=shlex.quote(str(script)), job_name=f"genx_{scen}",
+                                       job_dir=shlex.quote(str(job_dir))),
+            shell=True, capture_output=True, text=True,
+        )
+        if completed.returncode != 0:
+            raise RuntimeError(f"submit command failed: {completed.stderr.strip() or completed.returncode}")
+        words = completed.stdout.split()
+        job_id = words[-1] if words else ""
+        (job_dir / "job_id").write_text(job_id)
+        print(f"[{scen}] Submitted batch job {job_id or '(no id)'} ({job_dir})")
+        return job_id
+
+    def _run_attempt(self, slot, scen, case_dir, log_path, threads):
+        job_dir = self.staging_dir / f"{scen}-{hash_case_inputs(case_dir)[:16]}"
+        exit_path = job_dir / "exit_code"
+        job_id_path = job_dir / "job_id"
+
+        # Resume: a job of an earlier, interrupted run with the same inputs
+        if exit_path.exists() and exit_path.read_text().strip() == "0":
+            print(f"[{scen}] Batch job already finished ({job_dir})")
+        elif not exit_path.exists() and job_id_path.exists() and self._job_alive(job_id_path.read_text().strip()):
+            print(f"[{scen}] Waiting for batch job {job_id_path.read_text().strip()} of an earlier run")
+        else:
+            self._submit(scen, case_dir, job_dir, threads)
+
+        job_id = job_id_path.read_text().strip()
+        while not exit_path.exists():
+            time.sleep(self.poll_seconds)
+            if not exit_path.exists() and not self._job_alive(job_id):
+                time.sleep(1)  # the job may have just written it
+                if not exit_path.exists():
+                    raise RuntimeError(f"batch job {job_id} ended without writing {exit_path.name}")
+
+        returncode = int(exit_path.read_text().strip() or 1)
+        genx_log = job_dir / "genx.log"
+        if genx_log.exists():
+            with open(log_path, "a") as log, genx_log.open("r", errors="replace") as src:
+                shutil.copyfileobj(src, log)
+        if returncode == 0:
+            with (job_dir / "results.tar.gz").open("rb") as f:
+                fetched = unpack_results(f, case_dir)
+            if "results" not in fetched:
+                raise RuntimeError(f"batch job {job_id} returned no results/")
+        if returncode == 0 and not self.keep_jobs:
+            shutil.rmtree(job_dir, ignore_errors=True)
+        elif returncode != 0:
+            # Not resumable: the next attempt submits a fresh job
+            exit_path.unlink()
+        return returncode
+
+
+##########################################
+            # FACTORY #
+##########################################
+
+def make_executor(genx_cfg, output_root):
+    """
+    Build the executor configured in genx_cfg["executor"], or None for the
+    default local scheduler.
+    """
+    cfg = genx_cfg.get("executor", {})
+    kind = cfg.get("type", "local")
+    if kind not in EXECUTOR_TYPES:
+        raise ValueError(f"Unknown executor type '{kind}' (expected one of {', '.join(EXECUTOR_TYPES)}).")
+    if kind == "local":
+        return None
+
+    julia_exe = cfg.get("julia_executable", genx_cfg["julia_executable"])
+    julia_project = cfg.get("project", genx_cfg["project"])
+    common = {
+        "retries": cfg.get("retries", DEFAULT_RETRIES),
+        "threads_per_case": cfg.get("threads_per_case"),
+    }
+    if kind == "localhost":
+        return LocalhostExecutor(cfg.get("workers", 2), julia_exe, julia_project, workdir=cfg.get("workdir"),
+                                 keep_remote=cfg.get("keep_remote", 0) == 1, **common)
+    if kind == "ssh":
+        if not cfg.get("hosts"):
+            raise KeyError("executor type 'ssh' needs a 'hosts' list in the genx.executor settings.")
+        return HostPoolExecutor(cfg["hosts"], julia_exe, julia_project, ssh_options=cfg.get("ssh_options"),
+                                keep_remote=cfg.get("keep_remote", 0) == 1, **common)
+    if "submit_command" not in cfg:
+        raise KeyError("executor type 'batch' needs a 'submit_command' in the genx.executor settings.")
+    return BatchExecutor(
+        cfg["submit_command"],
+        cfg.get("staging_dir", Path(output_root) / BATCH_DIR_NAME),
+        julia_exe,
+        julia_project,
+        max_jobs=cfg.get("max_jobs", 1),
+        status_command=cfg.get("status_command"),
+        poll_seconds=cfg.get("poll_seconds", DEFAULT_POLL_SECONDS),
+        keep_jobs=cfg.get("keep_jobs", 0) == 1,
+        **common,
+    )
@@ -0,0 +1,407 @@
+import json
+import os
+import queue
+import shutil
+import subprocess
+import time
+from contextlib import nullcontext
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from pathlib import Path
+
+from run_cache import hash_case_inputs
+
+
+##########################################
+          # JULIA COMMANDS #
+##########################################
+
+# Julia program for a single scenario: one process per case.
+SINGLE_CASE_SCRIPT = 'using GenX; run_genx_case!(abspath(ARGS[1]))'
+
+# Julia program for a persistent worker: `using GenX` is compiled once, then
+# the worker reads "<case_dir>\t<log_path>" lines from stdin and answers each
+# one with a "GENX_DONE\t<OK|FAILED>\t<seconds>" line on stdout.
+PERSISTENT_WORKER_SCRIPT = r"""
+using GenX
+println("GENX_READY"); flush(stdout)
+for line in eachline(stdin)
+    isempty(strip(line)) && continue
+    case_dir, log_path = String.(split(strip(line), '\t'))
+    t0 = time()
+    status = "OK"
+    try
+        redirect_stdio(stdout=log_path, stderr=log_path) do
+            run_genx_case!(abspath(case_dir))
+        end
+    catch e
+        status = "FAILED"
+        open(log_path, "a") do io
+            showerror(io, e, catch_backtrace())
+            println(io)
+        end
+    end
+    println("GENX_DONE\t", status, "\t", time() - t0); flush(stdout)
+end
+"""
+
+
+def build_genx_command(julia_exe, julia_project, case_dir, julia_threads=None):
+    """
+    Build the command line that runs GenX on a single case directory.
+    """
+    cmd = [julia_exe, f"--project={julia_project}"]
+    if julia_threads:
+        cmd.append(f"--threads={julia_threads}")
+    cmd += ["-e", SINGLE_CASE_SCRIPT, str(case_dir)]
+    return cmd
+
+
+# Environment variables that cap the threads of Julia and the BLAS/solver
+# libraries it loads
+THREAD_ENV_VARS = ["JULIA_NUM_THREADS", "OMP_NUM_THREADS", "OPENBLAS_NUM_THREADS", "MKL_NUM_THREADS"]
+
+
+def solver_thread_env(solver_threads):
+    """
+    Return a copy of os.environ that caps the threads a GenX/solver process uses.
+    solver_threads of None or 0 leaves the environment untouched.
+    """
+    env = os.environ.copy()
+    if solver_threads:
+        n = str(int(solver_threads))
+        for var in THREAD_ENV_VARS:
+            env[var] = n
+    return env
+
+
+##########################################
+          # PERSISTENT WORKER #
+##########################################
+
+class PersistentJuliaWorker:
+    """
+    A long-lived Julia process that has already loaded GenX.
+    Cases are sent one at a time over stdin; the worker is not thread-safe,
+    so each worker must only be used by one scheduler thread at a time.
+    """
+
+    def __init__(self, julia_exe, julia_project, solver_threads=None, startup_log=None):
+        self.julia_exe = julia_exe
+        self.julia_project = julia_project
+        self.solver_threads = solver_threads
+        self.startup_log = startup_log
+        self._start()
+
+    def _start(self):
+        cmd = [self.julia_exe, f"--project={self.julia_project}"]
+        if self.solver_threads:
+            cmd.append(f"--threads={self.solver_threads}")
+        cmd += ["-e", PERSISTENT_WORKER_SCRIPT]
+
+        self._stderr = open(self.startup_log, "a") if self.startup_log is not None else None
+        self.proc = subprocess.Popen(
+            cmd,
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+            stderr=self._stderr if self._stderr is not None else subprocess.DEVNULL,
+            text=True,
+            bufsize=1,
+            env=solver_thread_env(self.solver_threads),
+        )
+        self._read_until("GENX_READY")
+
+    def alive(self):
+        return self.proc.poll() is None
+
+    def restart(self):
+        """Start a new Julia process in place of one that has exited."""
+        self.close()
+        self._start()
+
+    def _read_until(self, prefix):
+        """
+        Read worker stdout until a line starting with prefix is found.
+        Anything else GenX prints outside of a case is ignored.
+        """
+        while True:
+            line = self.proc.stdout.readline()
+            if line == "":
+                raise RuntimeError(
+                    f"Persistent Julia worker exited (code {self.proc.wait()}) "
+                    f"while waiting for {prefix}. See {self.startup_log}."
+                )
+            if line.startswith(prefix):
+                return line.rstrip("\n")
+
+    def run_case(self, case_dir, log_path):
+        """
+        Run one case and return (status, elapsed_seconds) as reported by Julia.
+        """
+        self.proc.stdin.write(f"{case_dir}\t{log_path}\n")
+        self.proc.stdin.flush()
+        _, status, elapsed = self._read_until("GENX_DONE").split("\t")
+        return status, float(elapsed)
+
+    def close(self):
+        if self.proc.poll() is None:
+            self.proc.stdin.close()
+            self.proc.wait()
+        self.proc.stdout.close()
+        if self._stderr is not None:
+            self._stderr.close()
+
+
+##########################################
+        # COMPLETION MARKERS #
+##########################################
+
+# Written into a case's results/ folder when its solve succeeds. The
+# results stay in the case folder until they are harvested, so a sweep that
+# was interrupted in between finds them there and does not solve again.
+COMPLETE_MARKER = ".genx_complete.json"
+
+
+def mark_solve_complete(case_dir, result):
+    results_dir = Path(case_dir) / "results"
+    if not results_dir.is_dir():
+        return
+    with (results_dir / COMPLETE_MARKER).open("w") as f:
+        json.dump({
+            "inputs_hash": hash_case_inputs(case_dir),
+            "elapsed": result.get("elapsed"),
+            "host": result.get("host"),
+            "finished": time.time(),
+        }, f)
+
+
+def clear_stale_solve(case_dir):
+    """
+    Remove a marked results/ folder whose inputs have changed since (see
+    completed_solve), so the case can be solved again into results/.
+    Results without a marker are not ours to delete and are left alone.
+    """
+    results_dir = Path(case_dir) / "results"
+    if (results_dir / COMPLETE_MARKER).exists():
+        shutil.rmtree(results_dir)
+        return True
+    return False
+
+
+def completed_solve(scen, case_dir, log_path):
+    """
+    Result dict of a solve whose results are still in case_dir (marked by
+    an earlier run and made from the current inputs), or None.
+    """
+    marker_path = Path(case_dir) / "results" / COMPLETE_MARKER
+    if not marker_path.exists():
+        return None
+    try:
+        with marker_path.open("r") as f:
+            marker = json.load(f)
+    except (OSError, json.JSONDecodeError):
+        return None
+    if marker.get("inputs_hash") != hash_case_inputs(case_dir):
+        return None
+    return {
+        "scenario": scen,
+        "status": "OK",
+        "returncode": 0,
+        "started": None,
+        "elapsed": marker.get("elapsed"),
+        "log": log_path,
+        "resumed": True,
+    }
+
+
+##########################################
+          # SCHEDULER #
+##########################################
+
+def _run_subprocess_case(scen, case_dir, log_path, julia_exe, julia_project, solver_threads):
+    """
+    Run one scenario in its own Julia process, writing all output to log_path.
+    """
+    cmd = build_genx_command(julia_exe, julia_project, case_dir, solver_threads)
+    print(f"[{scen}] Running command:", " ".join(cmd))
+
+    started = time.time()
+    t0 = time.perf_counter()
+    with open(log_path, "w") as log:
+        completed = subprocess.run(
+            cmd,
+            stdout=log,
+            stderr=subprocess.STDOUT,
+            env=solver_thread_env(solver_threads),
+        )
+    elapsed = time.perf_counter() - t0
+
+    return {
+        "scenario": scen,
+        "status": "OK" if completed.returncode == 0 else "FAILED",
+        "returncode": completed.returncode,
+        "started": started,
+        "elapsed": elapsed,
+        "log": log_path,
+    }
+
+
+def _run_persistent_case(scen, case_dir, log_path, worker_pool):
+    """
+    Run one scenario on an idle persistent worker from worker_pool. A
+    worker whose Julia process has exited (e.g. a case crashed it) is
+    restarted first; if that fails too, the case runs in its own Julia
+    process instead.
+    """
+    worker = worker_pool.get()
+    try:
+        if not worker.alive():
+            print(f"[{scen}] Persistent Julia worker exited (code {worker.proc.poll()}); starting a new one")
+            try:
+                worker.restart()
+            except (OSError, RuntimeError) as e:
+                print(f"[{scen}] Could not restart the worker ({e}); running the case on its own")
+                return _run_subprocess_case(scen, case_dir, log_path, worker.julia_exe, worker.julia_project,
+                                            worker.solver_threads)
+        print(f"[{scen}] Sending case to persistent Julia worker")
+        started = time.time()
+        status, elapsed = worker.run_case(case_dir, log_path)
+    finally:
+        worker_pool.put(worker)
+
+    return {
+        "scenario": scen,
+        "status": status,
+        "returncode": 0 if status == "OK" else 1,
+        "started": started,
+        "elapsed": elapsed,
+        "log": log_path,
+    }
+
+
+def _run_prepared_case(prepare_case, scen, case_dir, run, *args):
+    """
+    Run one case inside prepare_case(scen, case_dir), if given (solver
+    threads, warm start; see planner.case_preparer).
+    """
+    with prepare_case(scen, case_dir) if prepare_case is not None else nullcontext():
+        return run(scen, case_dir, *args)
+
+
+def run_scenarios(
+    case_dirs,
+    julia_exe,
+    julia_project,
+    log_dir,
+    max_parallel=1,
+    solver_threads=None,
+    persistent=False,
+    on_complete=None,
+    case_threads=None,
+    prepare_case=None,
+    executor=None,
+):
+    """
+    Run GenX for every (scenario, case_dir) pair in case_dirs.
+
+    - At most max_parallel cases run at the same time.
+    - Cases start in the order of case_dirs.
+    - solver_threads caps the Julia/solver threads of each case;
+      case_threads ({scenario: threads}) overrides it per case.
+    - prepare_case(scenario, case_dir), if given, is a context manager
+      wrapped around each solve (see planner.case_preparer).
+    - Each scenario's stdout/stderr goes to <log_dir>/<scenario>.log.
+    - With persistent=True, cases are sent to long-lived Julia workers
+      (one per parallel slot) so `using GenX` is only compiled once per worker.
+    - With an executor (see executors.py), cases are solved through its
+      run_case instead, on other hosts or batch jobs; their results are
+      brought back into each case_dir.
+    - Each successful solve is marked complete (see completed_solve).
+
+    on_complete, if given, is called with each result dict as soon as that
+    scenario finishes (from the calling thread), so post-processing can start
+    while other scenarios are still solving.
+
+    A failing scenario does not stop the others. Returns a dict
+    scenario -> result dict with keys status, returncode, started (Unix
+    time), elapsed, log.
+    """
+    log_dir = Path(log_dir)
+    os.makedirs(log_dir, exist_ok=True)
+    max_parallel = max(1, min(int(max_parallel), len(case_dirs) or 1))
+
+    worker_pool = None
+    workers = []
+    if persistent:
+        print(f"Starting {max_parallel} persistent Julia worker(s)...")
+        worker_pool = queue.Queue()
+        for i in range(max_parallel):
+            worker = PersistentJuliaWorker(
+                julia_exe,
+                julia_project,
+                solver_threads,
+                startup_log=log_dir / f"julia_worker_{i}.log",
+            )
+            workers.append(worker)
+            worker_pool.put(worker)
+
+    results = {}
+
+    try:
+        with ThreadPoolExecutor(max_workers=max_parallel) as pool:
+            futures = {}
+            for scen, case_dir in case_dirs:
+                log_path = log_dir / f"{scen}.log"
+                if executor is not None:
+                    threads = (case_threads or {}).get(scen, solver_threads)
+                    fut = pool.submit(
+                        _run_prepared_case, prepare_case, scen, case_dir,
+                        executor.run_case, log_path, threads,
+                    )
+                elif persistent:
+                    fut = pool.submit(
+                        _run_prepared_case, prepare_case, scen, case_dir,
+                        _run_persistent_case, log_path, worker_pool,
+                    )
+                else:
+                    threads = (case_threads or {}).get(scen, solver_threads)
+                    fut = pool.submit(
+                        _run_prepared_case, prepare_case, scen, case_dir,
+                        _run_subprocess_case, log_path, julia_exe, julia_project, threads,
+                    )
+                futures[fut] = (scen, case_dir, log_path)
+
+            for fut in as_completed(futures):
+                scen, case_dir, log_path = futures[fut]
+                try:
+                    result = fut.result()
+                except Exception as e:
+                    result = {
+                        "scenario": scen,
+                        "status": "FAILED",
+                        "returncode": None,
+                        "started": None,
+                        "elapsed": None,
+                        "log": log_path,
+                        "error": str(e),
+                    }
+                results[scen] = result
+
+                if result["status"] == "OK":
+                    try:
+                        mark_solve_complete(case_dir, result)
+                    except OSError as e:
+                        print(f"[{scen}] Warning: could not mark the solve complete: {e}")
+                    host = f" on {result['host']}" if result.get("host") else ""
+                    print(f"[{scen}] GenX finished{host} in {result['elapsed']:.1f} s (log: {log_path})")
+                elif "error" in result:
+                    print(f"[{scen}] GenX FAILED: {result['error']} (log: {log_path})")
+                else:
+                    print(f"[{scen}] GenX FAILED (log: {log_path})")
+
+                if on_complete is not None:
+                    on_complete(result)
+    finally:
+        for worker in workers:
+            worker.close()
+
+    return results
@@ -0,0 +1,343 @@
+import errno
+import hashlib
+import os
+import shutil
+import sys
+from pathlib import Path
+
+from profiling import Profiler
+
+
+# GenX output folders that are deleted from the case directory once harvested
+GENX_OUTPUT_DIRS = [
+    "results",
+    "extra_outputs",
+    "TDR_results",
+    "capacity_expansion_results",
+    "operational_results",
+]
+
+# Case-directory items that are GenX inputs and are never harvested.
+# TDR_results/ is harvested with the results: its Period_map.csv is needed
+# to map time-domain-reduced results back to the year (see time_domain).
+INPUT_DIRS = {"system", "settings", "resources", "policies"}
+SKIP_FILES = {"powergenome_case_settings.yml"}
+
+# Folder under the output root that holds one copy of every deduplicated file
+STORE_DIR_NAME = ".store"
+
+# Folders whose files are rewritten in place and must never be hardlinked
+# into the store (see result_store.CACHE_DIR_NAME)
+NO_DEDUPE_DIRS = {".columnar"}
+
+COPY_CHUNK_SIZE = 1 << 20
+
+
+def new_harvest_stats():
+    return {"moved": 0, "linked": 0, "copied": 0, "bytes_copied": 0, "deduped": 0, "bytes_deduped": 0}
+
+
+##########################################
+          # LEGACY COPY #
+##########################################
+
+def copy_genx_results_to_output(case_dir: Path, scenario_save_dir: Path, stats=None):
+    """
+    Copy GenX result files from the scenario folder into the scenario_save_dir.
+    Returns a stats dict (copied, bytes_copied).
+
+    Strategy:
+    - Copy everything in case_dir EXCEPT known input subfolders:
+      'system', 'settings', 'resources', 'policies'.
+    - That way we grab outputs like:
+      - emissions.csv
+      - power.csv
+      - results/
+      - extra_outputs/
+      - any other output CSVs GenX writes.
+    """
+    if stats is None:
+        stats = new_harvest_stats()
+
+    def counted_copy(src, dest, copy=shutil.copy2):
+        copy(src, dest)
+        stats["copied"] += 1
+        stats["bytes_copied"] += os.path.getsize(dest)
+
+    for item in case_dir.iterdir():
+        # Skip known input-like directories
+        if item.is_dir() and item.name in INPUT_DIRS:
+            continue
+
+        # Optionally skip specific files you don't want to copy
+        if item.is_file() and item.name in SKIP_FILES:
+            continue
+
+        dest = scenario_save_dir / item.name
+
+        if item.is_dir():
+            shutil.copytree(item, dest, dirs_exist_ok=True, copy_function=counted_copy)
+        elif item.is_file():
+            counted_copy(item, dest, shutil.copy)
+        else:
+            # symlinks or weird stuff – skip
+            print(f"Skipping non-regular item: {item}")
+    return stats
+
+
+def delete_genx_outputs(case_dir: Path):
+    """
+    Delete the original GenX output folders in the case directory.
+    """
+    for folder in GENX_OUTPUT_DIRS:
+        folder_path = case_dir / folder
+        if folder_path.exists() and folder_path.is_dir():
+            print(f"Deleting GenX output folder: {folder_path}")
+            shutil.rmtree(folder_path)
+
+
+##########################################
+          # MOVE / LINK HARVEST #
+##########################################
+
+def _streamed_copy(src, dest, stats):
+    """
+    Copy one file in fixed-size chunks (used only across filesystems).
+    """
+    with open(src, "rb") as fin, open(dest, "wb") as fout:
+        shutil.copyfileobj(fin, fout, COPY_CHUNK_SIZE)
+    shutil.copystat(src, dest)
+    stats["copied"] += 1
+    stats["bytes_copied"] += os.path.getsize(dest)
+
+
+def _move_file(src, dest, stats):
+    """
+    Rename src to dest; fall back to a streamed copy + delete across devices.
+    """
+    try:
+        os.replace(src, dest)
+        stats["moved"] += 1
+    except OSError as e:
+        if e.errno != errno.EXDEV:
+            raise
+        _streamed_copy(src, dest, stats)
+        os.remove(src)
+
+
+def _link_file(src, dest, stats):
+    """
+    Hardlink src to dest (the source stays in place); fall back to a
+    streamed copy when hardlinks are not possible (other device, FAT, ...).
+    """
+    if dest.exists():
+        dest.unlink()
+    try:
+        os.link(src, dest)
+        stats["linked"] += 1
+    except OSError:
+        _streamed_copy(src, dest, stats)
+
+
+def _move_tree(src, dest, stats):
+    """
+    Move a whole directory. A single atomic rename when dest does not exist
+    and both sides are on the same filesystem; otherwise file by file.
+    """
+    if not dest.exists():
+        try:
+            os.rename(src, dest)
+            stats["moved"] += 1
+            return
+        except OSError as e:
+            if e.errno not in (errno.EXDEV, errno.ENOTEMPTY, errno.EEXIST):
+                raise
+
+    for root, _, files in os.walk(src):
+        rel = Path(root).relative_to(src)
+        os.makedirs(dest / rel, exist_ok=True)
+        for name in files:
+            _move_file(Path(root) / name, dest / rel / name, stats)
+    shutil.rmtree(src)
+
+
+def _link_tree(src, dest, stats):
+    for root, _, files in os.walk(src):
+        rel = Path(root).relative_to(src)
+        os.makedirs(dest / rel, exist_ok=True)
+        for name in files:
+            _link_file(Path(root) / name, dest / rel / name, stats)
+
+
+def harvest_genx_results(case_dir: Path, scenario_save_dir: Path, stats=None):
+    """
+    Move GenX results out of case_dir into scenario_save_dir.
+
+    - GenX output folders (results/, extra_outputs/, ...) are renamed into
+      place, which is instant on the same filesystem. Across filesystems
+      they are streamed over and then removed from case_dir.
+    - Any other non-input item is left in case_dir and hardlinked into
+      scenario_save_dir (streamed copy if hardlinks are not possible).
+
+    The end state matches copy_genx_results_to_output + delete_genx_outputs.
+    Returns a stats dict (moved, linked, copied, bytes_copied, ...).
+    """
+    if stats is None:
+        stats = new_harvest_stats()
+
+    for item in case_dir.iterdir():
+        if item.is_dir() and item.name in INPUT_DIRS:
+            continue
+        if item.is_file() and item.name in SKIP_FILES:
+            continue
+
+        dest = scenario_save_dir / item.name
+
+        if item.is_symlink() or not (item.is_dir() or item.is_file()):
+            print(f"Skipping non-regular item: {item}")
+        elif item.is_dir() and item.name in GENX_OUTPUT_DIRS:
+            _move_tree(item, dest, stats)
+        elif item.is_dir():
+            _link_tree(item, dest, stats)
+        else:
+            _link_file(item, dest, stats)
+
+    delete_genx_outputs(case_dir)
+    return stats
+
+
+def link_cached_results(cached_dir: Path, scenario_save_dir: Path, stats=None):
+    """
+    Reuse the results of an earlier run (see run_cache.RunCache): hardlink
+    every file from cached_dir into scenario_save_dir except old plots.
+    Nothing is removed from cached_dir. Returns a stats dict.
+    """
+    if stats is None:
+        stats = new_harvest_stats()
+
+    for item in Path(cached_dir).iterdir():
+        if item.name == "plots" or item.is_symlink():
+            continue
+        dest = scenario_save_dir / item.name
+        if item.is_dir():
+            _link_tree(item, dest, stats)
+        elif item.is_file():
+            _link_file(item, dest, stats)
+
+    return stats
+
+
+##########################################
+      # CONTENT-ADDRESSED STORE #
+##########################################
+
+def _sha256(path):
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(COPY_CHUNK_SIZE), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def dedupe_tree(root: Path, store_root: Path, stats=None):
+    """
+    Replace every regular file under root with a hardlink to a single copy
+    in the content-addressed store (<store_root>/<hash[:2]>/<hash>), so
+    byte-identical files across runs are stored once.
+
+    Store objects are shared between runs: harvested files should be
+    treated as read-only (write a new file instead of editing one in place).
+    A file that is still linked elsewhere (e.g. a non-output file hardlinked
+    from the GenX case folder, where it may be rewritten) is copied into the
+    store, never linked, so later edits there cannot reach the store.
+    """
+    if stats is None:
+        stats = new_harvest_stats()
+    root = Path(root)
+    store_root = Path(store_root)
+
+    for dirpath, dirnames, files in os.walk(root):
+        dirnames[:] = [d for d in dirnames if d not in NO_DEDUPE_DIRS and d != STORE_DIR_NAME]
+        for name in files:
+            path = Path(dirpath) / name
+            if path.is_symlink() or not path.is_file():
+                continue
+
+            digest = _sha256(path)
+            obj = store_root / digest[:2] / digest
+            os.makedirs(obj.parent, exist_ok=True)
+
+            saves_copy = obj.exists()
+            if not saves_copy:
+                try:
+                    if path.stat().st_nlink > 1:
+                        tmp = obj.with_name(f".{digest}.{os.getpid()}.tmp")
+                        shutil.copy2(path, tmp)
+                        os.replace(tmp, obj)
+                    else:
+                        os.link(path, obj)
+                except OSError:
+                    # No hardlinks here (e.g. store on another device): leave the file alone
+                    continue
+            if not os.path.samefile(path, obj):
+                # Swap in a link to the stored copy (link to a temp name, then rename over)
+                tmp = path.with_name(f".{name}.dedupe")
+                try:
+                    os.link(obj, tmp)
+                except OSError:
+                    continue
+                os.replace(tmp, path)
+                if saves_copy:
+                    stats["deduped"] += 1
+                    stats["bytes_deduped"] += obj.stat().st_size
+
+    return stats
+
+
+def harvest_scenario(case_dir: Path, scenario_save_dir: Path, mode="move", store_root=None, profiler=None):
+    """
+    Harvest one scenario's GenX outputs into scenario_save_dir.
+
+    mode:
+      "copy": legacy full copy, then delete the originals.
+      "move": rename/hardlink (see harvest_genx_results).
+      "reuse": case_dir is an earlier run's output folder whose results are
+               linked in, not moved (see link_cached_results).
+    If store_root is given, harvested files are deduplicated against the
+    content-addressed store afterwards. Each step is timed if a
+    profiling.Profiler is given. Returns a stats dict.
+    """
+    if profiler is None:
+        profiler = Profiler(enabled=False)
+
+    stats = new_harvest_stats()
+    if mode == "copy":
+        with profiler.span("copy"):
+            copy_genx_results_to_output(case_dir, scenario_save_dir, stats)
+        with profiler.span("delete"):
+            delete_genx_outputs(case_dir)
+    elif mode == "move":
+        with profiler.span("move"):
+            harvest_genx_results(case_dir, scenario_save_dir, stats)
+    elif mode == "reuse":
+        with profiler.span("link"):
+            link_cached_results(case_dir, scenario_save_dir, stats)
+    else:
+        raise ValueError(f"Unknown harvest_mode '{mode}' (expected 'copy', 'move' or 'reuse').")
+
+    if store_root is not None:
+        with profiler.span("dedupe"):
+            dedupe_tree(scenario_save_dir, store_root, stats)
+
+    return stats
+
+
+if __name__ == "__main__":
+    # Deduplicate an existing output tree in place:
+    #   python src/harvest.py output
+    output_root = Path(sys.argv[1] if len(sys.argv) > 1 else "output").resolve()
+    result = dedupe_tree(output_root, output_root / STORE_DIR_NAME)
+    print(
+        f"Deduplicated {result['deduped']} file(s), "
+        f"{result['bytes_deduped'] / 1e6:.1f} MB now shared via {output_root / STORE_DIR_NAME}"
+    )
@@ -1,12 +1,20 @@
+import argparse
 import json
 import os
-import subprocess
-import shutil
 from pathlib import Path
 import datetime
-import numpy as np
-import pandas as pd
-from plot_functions import emissions_plot, power_plot 
+import threading
+import time
+from executors import make_executor
+from genx_runner import clear_stale_solve, completed_solve, run_scenarios
+from pipeline import PostProcessingPipeline
+from planner import SolveHistory, TDRStore, case_preparer, plan_cases, print_plan
+from preflight import count_issues, preflight_cases
+from profiling import Profiler, read_solver_status, read_system_summary, write_chrome_trace, write_profile
+from run_cache import RunCache, hash_case_inputs, run_cache_key
+from run_catalog import RunCatalog
+from scenario_cube import write_scenario_comparison
+from sweep import generate_sweep
 
 
 def load_settings():
@@ -23,8 +31,9 @@ def load_settings():
 
 def load_plot_settings(project_root):
     """
-    Load plot settings (emissions.json and power.json).
-    Returns a dict with keys "emissions" and "power".
+    Load plot settings (emissions.json, power.json and the optional
+    capacity.json, analytics.json and comparison.json). Returns a dict with
+    keys "emissions", "power", "capacity", "analytics" and "comparison".
     """
     plot_settings_path = project_root / "input" / "plot_settings"
 
@@ -43,15 +52,53 @@ def load_plot_settings(project_root):
         print(f"Warning: {power_json_path} not found. Power plots may fail.")
         power_settings = {}
 
+    # Capacity, network/price analytics and scenario comparison plot
+    # settings (optional)
+    optional_settings = {}
+    for name in ("capacity", "analytics", "comparison"):
+        json_path = plot_settings_path / f"{name}.json"
+        optional_settings[name] = {}
+        if json_path.exists():
+            with json_path.open("r") as f:
+                optional_settings[name] = json.load(f)
+
     return {
         "emissions": emissions_settings,
         "power": power_settings,
+        **optional_settings,
     }
 
 
-def run_genx_cases(settings, project_root):
+def run_genx_cases(settings, project_root, log_dir=None, on_complete=None, scenarios=None,
+                   genx_inputs_dir=None):
     """
-    Run GenX for all scenarios specified in settings["genx"]["scenarios"].
+    Run GenX for all scenarios specified in settings["genx"]["scenarios"]
+    (or only the given scenarios, e.g. the ones the run cache missed).
+    Case folders are looked up in genx_inputs_dir (default: the
+    genx_inputs_dir setting; a sweep passes its own folder).
+
+    Optional keys in settings["genx"]:
+    - max_parallel_scenarios: how many GenX cases may solve at once (default 1).
+    - solver_threads: thread cap for each case's Julia/solver process, or
+      "auto" to split the CPU cores between the cases solving at once
+      (default: no cap). Set in each case's solver settings file for the solve.
+    - warm_start: 1 to let a case reuse the time-domain reduction of an
+      earlier case with the same time series and resources (default 1).
+    - persistent_julia: 1 to send all cases to long-lived Julia workers so
+      `using GenX` is only compiled once per worker (default 0).
+    - executor: where cases are solved: this machine (default), a pool of
+      SSH hosts or batch jobs (see executors.make_executor).
+
+    Cases whose results from an interrupted earlier run are still in their
+    folder (see genx_runner.completed_solve) are handed on without solving.
+
+    Cases are started longest first, using the solve times recorded in
+    output/.solve_history.json by earlier runs.
+
+    Each scenario's log is written to <log_dir>/<scenario>.log. on_complete is
+    called with each scenario's result as soon as it finishes. A failing
+    scenario does not abort the batch; returns a dict scenario -> result
+    (see genx_runner.run_scenarios).
     """
     if "genx" not in settings:
         raise KeyError(
@@ -62,68 +109,94 @@ def run_genx_cases(settings, project_root):
 
     julia_exe = genx_cfg["julia_executable"]
     julia_project = genx_cfg["project"]
-    genx_inputs_dir = project_root / genx_cfg["genx_inputs_dir"]
-    scenarios = genx_cfg["scenarios"]
-
+    if genx_inputs_dir is None:
+        genx_inputs_dir = project_root / genx_cfg["genx_inputs_dir"]
+    if scenarios is None:
+        scenarios = genx_cfg["scenarios"]
+
+    max_parallel = genx_cfg.get("max_parallel_scenarios", 1)
+    solver_threads = genx_cfg.get("solver_threads")
+    persistent = genx_cfg.get("persistent_julia", 0) == 1
+
+    if log_dir is None:
+        log_dir = genx_inputs_dir / "logs"
+
+    # Remote executors: their slots set the parallelism, and "auto" threads
+    # (this machine's cores) do not apply to other hosts
+    output_root = project_root / settings["save_path"]
+    executor = make_executor(genx_cfg, output_root)
+    if executor is not None:
+        max_parallel = executor.slots
+        persistent = False
+        if solver_threads == "auto":
+            solver_threads = executor.threads_per_case
+
+    results = {}
+    case_dirs = []
     for scen in scenarios:
         case_dir = (genx_inputs_dir / scen).resolve()
-        print("\n==============================")
-        print(f"Running GenX scenario: {scen}")
-        print(f"Case directory: {case_dir}")
-        print("==============================\n")
-
-        cmd = [
-            julia_exe,
-            f"--project={julia_project}",
-            "-e",
-            'using GenX; run_genx_case!(abspath(ARGS[1]))',
-            str(case_dir),
-        ]
-
-        print("Running command:", " ".join(cmd))
-        subprocess.run(cmd, check=True)
-
-
-def copy_genx_results_to_output(case_dir: Path, scenario_save_dir: Path):
-    """
-    Copy GenX result files from the scenario folder into the scenario_save_dir.
-
-    Strategy:
-    - Copy everything in case_dir EXCEPT known input subfolders:
-      'system', 'settings', 'resources', 'policies', 'TDR_results'.
-    - That way we grab outputs like:
-      - emissions.csv
-      - power.csv
-      - results/
-      - extra_outputs/
-      - any other output CSVs GenX writes.
-    """
-    ignore_dirs = {"system", "settings", "resources", "policies", "TDR_results"}
-
-    for item in case_dir.iterdir():
-        # Skip known input-like directories
-        if item.is_dir() and item.name in ignore_dirs:
-            continue
-
-        # Optionally skip specific files you don't want to copy
-        if item.is_file() and item.name == "powergenome_case_settings.yml":
+        resumed = completed_solve(scen, case_dir, Path(log_dir) / f"{scen}.log")
+        if resumed is not None:
+            print(f"[{scen}] Results of an interrupted earlier run are complete → not solving again")
+            results[scen] = resumed
+            if on_complete is not None:
+                on_complete(resumed)
             continue
-
-        dest = scenario_save_dir / item.name
-
-        if item.is_dir():
-            shutil.copytree(item, dest, dirs_exist_ok=True)
-        elif item.is_file():
-            shutil.copy(item, dest)
-        else:
-            # symlinks or weird stuff – skip
-            print(f"Skipping non-regular item: {item}")
-
-
-def write_metadata(simulation_settings, timestamp_root: Path, scenario_run_settings: dict):
+        if clear_stale_solve(case_dir):
+            print(f"[{scen}] Removed results of an earlier run made from other inputs")
+        print(f"Queueing GenX scenario: {scen} ({case_dir})")
+        case_dirs.append((scen, case_dir))
+    if not case_dirs:
+        return results
+
+    # Plan: longest cases first, solver threads per case, optional warm start
+    history = SolveHistory(output_root)
+    plans = plan_cases(case_dirs, max_parallel, history, solver_threads=solver_threads)
+    tdr_store = TDRStore(output_root) if genx_cfg.get("warm_start", 1) == 1 else None
+    case_threads = {plan["scenario"]: plan["threads"] for plan in plans}
+
+    where = f" via the {executor.name} executor" if executor is not None else ""
+    print("\n==============================")
+    print(f"Running {len(case_dirs)} GenX scenario(s){where}, up to {max_parallel} at a time")
+    print(f"Logs: {log_dir}")
+    print_plan(plans, max_parallel)
+    print("==============================\n")
+
+    results.update(run_scenarios(
+        [(plan["scenario"], plan["case_dir"]) for plan in plans],
+        julia_exe,
+        julia_project,
+        log_dir,
+        max_parallel=max_parallel,
+        solver_threads=max((t for t in case_threads.values() if t), default=None),
+        persistent=persistent,
+        on_complete=on_complete,
+        case_threads=case_threads,
+        prepare_case=case_preparer(plans, tdr_store),
+        executor=executor,
+    ))
+    if executor is not None:
+        executor.close()
+
+    for plan in plans:
+        result = results.get(plan["scenario"], {})
+        if result.get("status") == "OK" and result.get("elapsed") is not None:
+            history.record(plan["scenario"], result["elapsed"], plan["threads"], plan["solver"])
+    history.save()
+
+    failed = [scen for scen, r in results.items() if r["status"] != "OK"]
+    if failed:
+        print(f"Warning: GenX failed for scenario(s): {', '.join(failed)}")
+
+    return results
+
+
+def write_metadata(simulation_settings, timestamp_root: Path, scenario_run_settings: dict,
+                   genx_results: dict = None):
     """
     Write a human-readable metadata.txt file containing:
     - simulation settings pretty-printed
+    - GenX status, solve time and log file for each scenario (if GenX was run)
     - run_settings.yml contents for each scenario rendered as readable blocks
     """
     metadata_path = timestamp_root / "metadata.txt"
@@ -134,6 +207,19 @@ def write_metadata(simulation_settings, timestamp_root: Path, scenario_run_setti
         f.write(json.dumps(simulation_settings, indent=2))
         f.write("\n\n")
 
+        # GenX run status per scenario
+        if genx_results:
+            f.write("=== GenX Runs ===\n\n")
+            for scen, result in genx_results.items():
+                elapsed = result.get("elapsed")
+                elapsed_str = f"{elapsed:.1f} s" if elapsed is not None else "n/a"
+                if result.get("resumed"):
+                    elapsed_str += ", resumed"
+                if result.get("host"):
+                    elapsed_str += f" on {result['host']}, {result['attempts']} attempt(s)"
+                f.write(f"{scen}: {result['status']} ({elapsed_str}), log: {result['log']}\n")
+            f.write("\n")
+
         # Scenario run_settings.yml contents
         f.write("=== Scenario Run Settings ===\n\n")
         for scen, yaml_text in scenario_run_settings.items():
@@ -145,38 +231,99 @@ def write_metadata(simulation_settings, timestamp_root: Path, scenario_run_setti
     print(f"Metadata written to {metadata_path}")
 
 
+def write_run_profile(profiler, timestamp_root: Path, scenarios, genx_results, chrome_trace=False):
+    """
+    Write profile.json next to metadata.txt (and profile.trace.json in
+    Chrome trace format if chrome_trace), including each scenario's GenX
+    wall time, solver status/time (results/status.csv) and the hardware
+    info GenX records in results/system_summary.yml.
+    """
+    scenario_info = {}
+    for scen in scenarios:
+        results_dir = timestamp_root / scen / "results"
+        genx = genx_results.get(scen, {})
+        scenario_info[scen] = {
+            "genx_status": genx.get("status"),
+            "genx_seconds": genx.get("elapsed"),
+            "solver": read_solver_status(results_dir),
+            "system": read_system_summary(results_dir),
+        }
+
+    write_profile(timestamp_root / "profile.json", profiler, scenario_info)
+    if chrome_trace:
+        write_chrome_trace(timestamp_root / "profile.trace.json", profiler)
+
+
+def record_run_catalog(simulation_settings, output_root: Path, run_id, base_case_dir: Path,
+                       results, genx_results, input_hashes):
+    """
+    Add this run to the run catalog (see run_catalog.py), with the KPIs
+    post-processing computed from the results it had loaded. Input hashes
+    not already computed for the run cache are computed from the case
+    folders that still hold their GenX inputs.
+    """
+    scenario_info = {}
+    for scen in results:
+        inputs_hash = input_hashes.get(scen)
+        case_dir = base_case_dir / scen
+        if inputs_hash is None and any((case_dir / tree).is_dir() for tree in ("system", "resources")):
+            inputs_hash = hash_case_inputs(case_dir)
+        genx = genx_results.get(scen, {})
+        scenario_info[scen] = {
+            "input_hash": inputs_hash,
+            "genx_status": genx.get("status"),
+            "genx_seconds": genx.get("elapsed"),
+            "kpis": results[scen].get("kpis"),
+        }
+
+    with RunCatalog(output_root) as catalog:
+        catalog.record_run(run_id, simulation_settings, scenario_info)
+        print(f"Run {run_id} added to the run catalog ({catalog.path})")
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Run GenX scenarios and post-process their results.")
+    parser.add_argument(
+        "--force",
+        action="store_true",
+        help="Re-solve every scenario even if the run cache has results for identical inputs.",
+    )
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
 
-def main():
     # 1) Load settings + project root
     simulation_settings, project_root = load_settings()
     run_genx_flag = simulation_settings.get("run_genx", 1)
 
-    # 2) Optionally run GenX for all scenarios
-    if run_genx_flag == 1:
-        print("run_genx = 1 → Running GenX cases before plotting.")
-        run_genx_cases(simulation_settings, project_root)
-    else:
-        print("run_genx = 0 → Skipping GenX runs and using existing outputs.")
-
-    # 3) Load plot settings
-    plot_settings = load_plot_settings(project_root)
-    emissions_settings = plot_settings["emissions"]
-    power_settings = plot_settings["power"]
+    # Timing spans of every stage, written to profile.json at the end
+    profiler = Profiler(enabled=simulation_settings.get("profile", 1) == 1)
+    run_started = time.time()
+    run_t0 = time.perf_counter()
 
-    # 4) Make a timestamped parent directory in output/
+    # 2) Make a timestamped parent directory in output/
     sim_timestamp = datetime.datetime.now().strftime("%Y%m%d%H%M")
     base_output_root = project_root / simulation_settings["save_path"]
     timestamp_root = base_output_root / sim_timestamp
     os.makedirs(timestamp_root, exist_ok=True)
 
-    # 5) Determine where to read scenario outputs from
+    # 3) Load plot settings
+    plot_settings = load_plot_settings(project_root)
+
+    # 4) Determine where to read scenario outputs from
     genx_cfg = simulation_settings["genx"]
     scenarios = genx_cfg["scenarios"]
-    emissions_rel_path = Path(genx_cfg.get("emissions_file", "results/emissions.csv"))
-    power_rel_path = Path(genx_cfg.get("power_file", "results/power.csv"))
 
     if run_genx_flag == 1:
         base_case_dir = project_root / genx_cfg["genx_inputs_dir"]
+
+        # A sweep replaces the scenario list with cases generated from a base case
+        sweep_cfg = simulation_settings.get("sweep", {})
+        if sweep_cfg.get("enabled", 0) == 1:
+            with profiler.span("sweep"):
+                base_case_dir, scenarios = generate_sweep(sweep_cfg, base_case_dir)
     else:
         genx_outputs_dir_rel = simulation_settings.get("genx_outputs_dir")
         if genx_outputs_dir_rel is None:
@@ -185,99 +332,160 @@ def main():
             )
         base_case_dir = project_root / genx_outputs_dir_rel
 
-    # We'll collect run_settings.yml contents here, keyed by scenario
-    scenario_run_settings = {}
-
-    # 6) Loop over scenarios: copy results, delete original outputs, create plots
-    for scen in scenarios:
-        print(f"\n=== Processing scenario {scen} ===")
-
-        # The directory that contains the outputs for this scenario
-        case_dir = (base_case_dir / scen).resolve()
-        if not case_dir.exists():
-            raise FileNotFoundError(
-                f"Expected case directory for scenario '{scen}' not found at:\n"
-                f"  {case_dir}\n"
-                f"Check 'genx_inputs_dir' / 'genx_outputs_dir' and scenario names."
-            )
-
-        # Where we want to store this run's organized outputs:
-        # output/<timestamp>/s1, s2, s3, ...
-        scenario_save_dir = timestamp_root / scen
-        os.makedirs(scenario_save_dir, exist_ok=True)
-
-        # --- NEW: create plot subdirectories ---
-        plots_root = scenario_save_dir / "plots"
-        emissions_plot_dir = plots_root / "emissions"
-        power_plot_dir = plots_root / "power"
-        os.makedirs(emissions_plot_dir, exist_ok=True)
-        os.makedirs(power_plot_dir, exist_ok=True)
-        # --------------------------------------
-
-        # Copy all outputs for this scenario into the output structure
-        print(f"Copying results from {case_dir} -> {scenario_save_dir}")
-        copy_genx_results_to_output(case_dir, scenario_save_dir)
-
-        # Delete original GenX output folders in the case directory
-        genx_output_dirs = [
-            "results",
-            "extra_outputs",
-            "TDR_results",
-            "capacity_expansion_results",
-            "operational_results",
-        ]
-        for folder in genx_output_dirs:
-            folder_path = case_dir / folder
-            if folder_path.exists() and folder_path.is_dir():
-                print(f"Deleting GenX output folder: {folder_path}")
-                shutil.rmtree(folder_path)
-
-        # Load emissions and power from the COPIED location
-        emissions_csv_path = scenario_save_dir / emissions_rel_path
-        print(f"Loading emissions from {emissions_csv_path}")
-        emissions_csv = pd.read_csv(emissions_csv_path)
-
-        power_csv_path = scenario_save_dir / power_rel_path
-        print(f"Loading power from {power_csv_path}")
-        power_csv = pd.read_csv(power_csv_path)
-
-        # Read run_settings.yml from the OUTPUT folder for this scenario
-        run_settings_path = scenario_save_dir / "results" / "run_settings.yml"
-        if run_settings_path.exists():
-            print(f"Reading run_settings.yml for scenario '{scen}' from {run_settings_path}")
-            with run_settings_path.open("r") as f:
-                scenario_run_settings[scen] = f.read()
+    # 5) Start the post-processing pool: copy results, delete original outputs,
+    #    load and plot each scenario as soon as it is ready
+    pipeline = PostProcessingPipeline(
+        simulation_settings.get("postprocess_workers", 1),
+        simulation_settings,
+        plot_settings,
+        sim_timestamp,
+        timestamp_root,
+        profiler=profiler,
+    )
+
+    # Solved scenarios go into the run cache as soon as they are harvested,
+    # so a sweep interrupted later on does not solve them again
+    run_cache_lock = threading.Lock()
+
+    def record_solved(scen):
+        if run_cache is None:
+            return
+        with run_cache_lock:
+            run_cache.record(cache_keys[scen], scen, timestamp_root / scen)
+            run_cache.save()
+
+    def on_genx_complete(result):
+        scen = result["scenario"]
+        if result["status"] != "OK":
+            print(f"[{scen}] Skipping post-processing: GenX failed (see {result['log']})")
+            return
+        pipeline.submit(scen, (base_case_dir / scen).resolve(), on_done=record_solved)
+
+    # 6) Optionally run GenX for all scenarios (logs go to output/<timestamp>/logs).
+    #    Scenarios whose inputs + Julia environment match an earlier run reuse
+    #    that run's results instead of solving again (unless --force).
+    #    Each finished solve is handed straight to the post-processing pool.
+    genx_results = {}
+    cache_keys = {}
+    input_hashes = {}
+    run_cache = None
+    if run_genx_flag == 1:
+        to_solve = list(scenarios)
+
+        if simulation_settings.get("use_run_cache", 1) == 1:
+            run_cache = RunCache(base_output_root)
+            to_solve = []
+            for scen in scenarios:
+                case_dir = (base_case_dir / scen).resolve()
+                with profiler.span("hash inputs", scenario=scen):
+                    input_hashes[scen] = hash_case_inputs(case_dir)
+                    cache_keys[scen] = run_cache_key(case_dir, genx_cfg["julia_executable"], genx_cfg["project"],
+                                                     inputs_hash=input_hashes[scen])
+                cached_dir = run_cache.lookup(cache_keys[scen])
+                if cached_dir is None or args.force:
+                    to_solve.append(scen)
+                else:
+                    print(f"[{scen}] Inputs unchanged → reusing results from {cached_dir}")
+                    genx_results[scen] = {
+                        "scenario": scen,
+                        "status": "CACHED",
+                        "returncode": None,
+                        "elapsed": None,
+                        "log": cached_dir,
+                    }
+                    pipeline.submit(scen, cached_dir, reuse=True, inputs_dir=case_dir)
+
+        # Check the inputs of every case about to be solved before any Julia
+        # process starts (summaries in output/<timestamp>/preflight)
+        preflight_mode = simulation_settings.get("preflight", "warn")
+        if to_solve and preflight_mode != "off":
+            with profiler.span("preflight"):
+                reports = preflight_cases(
+                    [(scen, (base_case_dir / scen).resolve()) for scen in to_solve],
+                    base_output_root,
+                    input_hashes=input_hashes,
+                    out_dir=timestamp_root / "preflight",
+                )
+            n_errors = count_issues(reports, "error")
+            if n_errors and preflight_mode == "error":
+                pipeline.collect()
+                raise SystemExit(
+                    f"Preflight found {n_errors} error(s) in the GenX inputs (see {timestamp_root / 'preflight'}); "
+                    "no GenX case was started. Set \"preflight\": \"warn\" to run anyway."
+                )
+
+        if to_solve:
+            print("run_genx = 1 → Running GenX cases before plotting.")
+            with profiler.span("genx"):
+                genx_results.update(run_genx_cases(
+                    simulation_settings,
+                    project_root,
+                    log_dir=timestamp_root / "logs",
+                    on_complete=on_genx_complete,
+                    scenarios=to_solve,
+                    genx_inputs_dir=base_case_dir,
+                ))
+            for lane, (scen, result) in enumerate(genx_results.items()):
+                if result.get("started") is not None and result["elapsed"] is not None:
+                    profiler.add_span("genx solve", result["started"], result["elapsed"], tid=lane,
+                                      scenario=scen, status=result["status"])
+                    profiler.count("genx_seconds", result["elapsed"])
         else:
-            print(
-                f"Warning: run_settings.yml not found for scenario '{scen}' at {run_settings_path}"
-            )
-
-        # 7) Create plots (saved in the *subfolders* now)
-        sim_id = f"{sim_timestamp}_{scen}"
-
-        if simulation_settings.get("generate_emissions_plot", 0) == 1:
-            print(f"Creating emissions plot for {scen}...")
-            emissions_plot(
-                emissions_csv,
-                simulation_settings,
-                emissions_settings,
-                emissions_plot_dir,  # <-- save here
-                sim_id,
-            )
-
-        if simulation_settings.get("generate_power_plot", 0) == 1:
-            print(f"Creating power plot for {scen}...")
-            power_plot(
-                power_csv,
-                simulation_settings,
-                power_settings,
-                power_plot_dir,      # <-- save here
-                sim_id,
-            )
-
-    # 8) Write metadata for this run
-    write_metadata(simulation_settings, timestamp_root, scenario_run_settings)
+            print("run_genx = 1, but every scenario was found in the run cache.")
+    else:
+        print("run_genx = 0 → Skipping GenX runs and using existing outputs.")
+        for scen in scenarios:
+            pipeline.submit(scen, (base_case_dir / scen).resolve())
+
+    # 7) Wait for post-processing and collect run_settings.yml contents by scenario
+    with profiler.span("wait for postprocessing"):
+        results, errors = pipeline.collect()
+    scenario_run_settings = {
+        scen: results[scen]["run_settings"]
+        for scen in scenarios
+        if scen in results and results[scen]["run_settings"] is not None
+    }
 
+    # 8) Compare scenarios side by side (delta tables + plots in output/<timestamp>/comparison)
+    compared = [scen for scen in scenarios if scen in results]
+    if simulation_settings.get("compare_scenarios", 0) == 1 and len(compared) >= 2:
+        baseline = simulation_settings.get("comparison_baseline")
+        if baseline not in compared:
+            baseline = compared[0]
+        print(f"\nComparing scenarios {', '.join(compared)} against baseline {baseline}")
+        try:
+            with profiler.span("comparison", scenarios=compared):
+                write_scenario_comparison(
+                    {scen: timestamp_root / scen / "results" for scen in compared},
+                    timestamp_root / "comparison",
+                    baseline,
+                    plot_settings["comparison"],
+                    sim_timestamp,
+                    float32=simulation_settings.get("result_cache_float32", 0) == 1,
+                    use_cache=simulation_settings.get("use_result_cache", 1) == 1,
+                )
+        except Exception as e:
+            print(f"Warning: scenario comparison failed: {e}")
+
+    # 9) Index the run (settings, input hashes, KPIs) in output/.run_catalog.sqlite
+    if simulation_settings.get("use_run_catalog", 1) == 1:
+        try:
+            with profiler.span("catalog"):
+                record_run_catalog(simulation_settings, base_output_root, sim_timestamp, base_case_dir,
+                                   results, genx_results, input_hashes)
+        except Exception as e:
+            print(f"Warning: could not update the run catalog: {e}")
+
+    # 10) Write metadata (and the profile) for this run
+    write_metadata(simulation_settings, timestamp_root, scenario_run_settings, genx_results)
+
+    if profiler.enabled:
+        profiler.add_span("run", run_started, time.perf_counter() - run_t0)
+        write_run_profile(profiler, timestamp_root, scenarios, genx_results,
+                          chrome_trace=simulation_settings.get("profile_chrome_trace", 0) == 1)
+
+    if errors:
+        print(f"\nPost-processing failed for scenario(s): {', '.join(errors)}")
     print(f"\nAll scenarios complete. Results in: {timestamp_root}")
 
 
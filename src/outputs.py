@@ -0,0 +1,544 @@
+import os
+from functools import cached_property
+from pathlib import Path
+
+import pandas as pd
+
+from aggregation import ResourceAggregates, StreamingAggregates
+from analytics import (DEFAULT_CONGESTION_THRESHOLD, capacity_by_zone_tech, line_energy, line_limits,
+                       line_utilization, price_duration, price_summary)
+from plot_functions import (capacity_change_plot_jobs, capacity_plot_jobs, emissions_plot_jobs, network_plot_jobs,
+                            power_plot_jobs, price_duration_plot_jobs)
+from profiling import Profiler
+from result_store import DEFAULT_CHUNK_ROWS, load_genx_result, read_genx_header
+from run_catalog import capacity_rows, cost_kpis, emissions_kpis
+from tiles import DEFAULT_TILE_POINTS, VIEWER_NAME, export_tiles
+from time_domain import PeriodMap, find_period_map, weighted_totals
+
+
+##########################################
+        # SCENARIO RESULT HANDLES #
+##########################################
+
+class ScenarioResults:
+    """
+    One scenario's harvested GenX results, each loaded at most once and only
+    when an output asks for it. Every output of the scenario shares these
+    handles, so two plots of power.csv read it once.
+
+    columns: {table: [columns]} for the plain tables (capacity, costs): the
+    union of what the enabled outputs declared (None = every column).
+
+    inputs_dir: the scenario's GenX case folder, for inputs the results
+    do not carry (system/Network.csv).
+
+    keep_units: a streamed power.csv also keeps every zone's unit series
+    (for per-unit power plots) instead of reading the file again per zone.
+    """
+
+    def __init__(self, scen, scenario_save_dir, simulation_settings, columns=None, profiler=None,
+                 inputs_dir=None, keep_units=False):
+        self.scen = scen
+        self.keep_units = keep_units
+        self.scenario_save_dir = Path(scenario_save_dir)
+        self.inputs_dir = Path(inputs_dir) if inputs_dir is not None else None
+        self.settings = simulation_settings
+        self.columns = columns or {}
+        self.profiler = profiler if profiler is not None else Profiler(enabled=False)
+        self.use_cache = simulation_settings.get("use_result_cache", 1) == 1
+        self.float32 = simulation_settings.get("result_cache_float32", 0) == 1
+
+        genx_cfg = simulation_settings["genx"]
+        self.emissions_path = self.scenario_save_dir / genx_cfg.get("emissions_file", "results/emissions.csv")
+        self.power_path = self.scenario_save_dir / genx_cfg.get("power_file", "results/power.csv")
+        self.results_dir = self.scenario_save_dir / "results"
+
+    @property
+    def loaded(self):
+        """Names of the results loaded so far."""
+        return [name for name in RESULTS if name in self.__dict__]
+
+    # ----- time series -----
+
+    @cached_property
+    def emissions(self):
+        """(emissions.csv time series, its header rows)."""
+        print(f"[{self.scen}] Loading emissions from {self.emissions_path}")
+        with self.profiler.span("load emissions", scenario=self.scen):
+            return load_genx_result(self.emissions_path, float32=self.float32, use_cache=self.use_cache)
+
+    @cached_property
+    def emissions_header(self):
+        """Header rows of emissions.csv (AnnualSum) without loading the time series."""
+        if "emissions" in self.__dict__:
+            return self.emissions[1]
+        if not self.emissions_path.exists():
+            return None
+        return read_genx_header(self.emissions_path)
+
+    @cached_property
+    def time_weights(self):
+        """Per-timestep weights from time_weights.csv (None without the file)."""
+        path = self.results_dir / "time_weights.csv"
+        if not path.exists():
+            return None
+        weights_df, _ = load_genx_result(path, use_cache=self.use_cache)
+        return weights_df["Weight"].to_numpy()
+
+    @cached_property
+    def power(self):
+        """
+        (power DataFrame or None, aggregates): zone/tech/unit sums computed
+        once and shared by every output. Files above stream_threshold_mb are
+        never loaded whole: they are read in chunks and only the sums kept.
+        """
+        stream_threshold_mb = self.settings.get("stream_threshold_mb", 200)
+        if self.power_path.stat().st_size > stream_threshold_mb * 1e6:
+            print(f"[{self.scen}] Streaming power from {self.power_path}")
+            with self.profiler.span("stream power", scenario=self.scen):
+                aggregates = StreamingAggregates(
+                    self.power_path,
+                    chunk_rows=self.settings.get("stream_chunk_rows", DEFAULT_CHUNK_ROWS),
+                    float32=self.float32,
+                    use_cache=self.use_cache,
+                    keep_units=self.keep_units,
+                )
+            return None, aggregates
+
+        print(f"[{self.scen}] Loading power from {self.power_path}")
+        with self.profiler.span("load power", scenario=self.scen):
+            power_df, power_header = load_genx_result(self.power_path, float32=self.float32,
+                                                      use_cache=self.use_cache)
+        return power_df, ResourceAggregates(power_df, power_header)
+
+    @cached_property
+    def n_timesteps(self):
+        """Modeled timesteps, from whichever result is cheapest to ask."""
+        if "power" in self.__dict__:
+            return len(self.power[1].index)
+        if self.time_weights is not None:
+            return len(self.time_weights)
+        return len(self.emissions[0].index)
+
+    @cached_property
+    def period_map(self):
+        """
+        PeriodMap of a time-domain-reduced run (None without TDR, or with
+        expand_tdr = 0).
+        """
+        period_map_path = find_period_map(self.scenario_save_dir)
+        if period_map_path is None or self.settings.get("expand_tdr", 1) != 1:
+            return None
+        period_map = PeriodMap.from_csv(period_map_path, self.n_timesteps)
+        print(
+            f"[{self.scen}] Expanding {period_map.n_rep} representative periods to "
+            f"{period_map.n_hours} chronological hours ({period_map_path})"
+        )
+        return period_map
+
+    def _series(self, name):
+        path = self.results_dir / f"{name}.csv"
+        if not path.exists():
+            return None
+        print(f"[{self.scen}] Loading {name} from {path}")
+        with self.profiler.span(f"load {name}", scenario=self.scen):
+            df, _ = load_genx_result(path, float32=self.float32, use_cache=self.use_cache)
+        return df
+
+    @cached_property
+    def flow(self):
+        """flow.csv time series: one column per transmission line (None if missing)."""
+        return self._series("flow")
+
+    @cached_property
+    def prices(self):
+        """prices.csv time series: one column per zone (None if missing)."""
+        return self._series("prices")
+
+    @cached_property
+    def tlosses_header(self):
+        """AnnualSum row of tlosses.csv (losses per line), without the time series."""
+        path = self.results_dir / "tlosses.csv"
+        if not path.exists():
+            return None
+        return read_genx_header(path)
+
+    # ----- tables -----
+
+    def _table(self, name):
+        path = self.results_dir / f"{name}.csv"
+        if not path.exists():
+            return None
+        wanted = self.columns.get(name)
+        with self.profiler.span(f"load {name}", scenario=self.scen):
+            # Declared columns an older GenX does not write are skipped
+            return pd.read_csv(path, usecols=None if wanted is None else lambda c: c in wanted)
+
+    @cached_property
+    def capacity(self):
+        """capacity.csv (only the declared columns)."""
+        return self._table("capacity")
+
+    @cached_property
+    def costs(self):
+        """costs.csv (only the declared columns)."""
+        return self._table("costs")
+
+    @cached_property
+    def network_expansion(self):
+        """network_expansion.csv: new transmission capacity per line."""
+        return self._table("network_expansion")
+
+    @cached_property
+    def network(self):
+        """
+        system/Network.csv, the line limits. An input, not a result: taken
+        from the harvested folder if present, else from the GenX case folder.
+        """
+        for root in (self.scenario_save_dir, self.inputs_dir):
+            if root is not None and (root / "system" / "Network.csv").exists():
+                return pd.read_csv(root / "system" / "Network.csv")
+        print(f"Warning: system/Network.csv not found for scenario '{self.scen}'; "
+              f"only line flows are summarized, not utilization or congestion")
+        return None
+
+    @cached_property
+    def run_settings(self):
+        """Text of results/run_settings.yml (None if missing)."""
+        path = self.results_dir / "run_settings.yml"
+        if not path.exists():
+            print(f"Warning: run_settings.yml not found for scenario '{self.scen}' at {path}")
+            return None
+        return path.read_text()
+
+
+# Every result a ScenarioResults can provide
+RESULTS = [
+    "emissions", "emissions_header", "time_weights", "power", "n_timesteps", "period_map",
+    "flow", "prices", "tlosses_header", "capacity", "costs", "network_expansion", "network", "run_settings",
+]
+
+
+class DeclaredResults:
+    """
+    The part of a ScenarioResults one output may use: the results it
+    declares in OUTPUTS["requires"]. Asking for any other result raises
+    instead of quietly loading it, so the declarations stay complete.
+    Everything that is not a result (scen, scenario_save_dir, ...) is
+    passed through.
+    """
+
+    def __init__(self, results, output_name):
+        self._results = results
+        self._output_name = output_name
+        self._allowed = set(OUTPUTS[output_name]["requires"])
+
+    def __getattr__(self, name):
+        if name in RESULTS and name not in self._allowed:
+            raise AttributeError(f"Output '{self._output_name}' uses the result '{name}' without declaring it "
+                                 f"in OUTPUTS['{self._output_name}']['requires'].")
+        return getattr(self._results, name)
+
+
+##########################################
+            # OUTPUTS #
+##########################################
+
+# Each output builds plot jobs or files from ScenarioResults and returns a
+# dict merged into the scenario's result ("plot_jobs" lists are joined).
+
+def _emissions_plot(results, ctx):
+    print(f"[{results.scen}] Creating emissions plot...")
+    emissions_df, _ = results.emissions
+    return {"plot_jobs": emissions_plot_jobs(
+        emissions_df,
+        ctx["simulation_settings"],
+        ctx["plot_settings"]["emissions"],
+        ctx["plot_dir"]("emissions"),
+        ctx["sim_id"],
+        time_weights=results.time_weights,
+        period_map=results.period_map,
+    )}
+
+
+def _power_plot(results, ctx):
+    print(f"[{results.scen}] Creating power plot...")
+    power_df, aggregates = results.power
+    return {"plot_jobs": power_plot_jobs(
+        power_df,
+        ctx["simulation_settings"],
+        ctx["plot_settings"]["power"],
+        ctx["plot_dir"]("power"),
+        ctx["sim_id"],
+        aggregates=aggregates,
+        time_weights=results.time_weights,
+        period_map=results.period_map,
+    )}
+
+
+def _emissions_summary(results, ctx):
+    emissions_df, _ = results.emissions
+    weighted_totals(emissions_df, results.time_weights).rename("Emissions").to_csv(
+        ctx["summary_dir"]() / "annual_emissions_by_zone.csv", index_label="Zone"
+    )
+    return {}
+
+
+def _generation_summary(results, ctx):
+    _, aggregates = results.power
+    annual_by_zone_tech = weighted_totals(aggregates.by_zone_tech, results.time_weights)
+    annual_by_zone_tech.rename("Generation (MWh)").to_csv(
+        ctx["summary_dir"]() / "annual_generation_by_zone_tech.csv"
+    )
+    return {}
+
+
+def _capacity_plot(results, ctx):
+    if results.capacity is None:
+        print(f"[{results.scen}] No capacity.csv; skipping capacity plot")
+        return {}
+    print(f"[{results.scen}] Creating capacity plot...")
+    capacity_settings = ctx["plot_settings"]["capacity"]
+    save_path = ctx["plot_dir"]("capacity")
+    jobs = capacity_plot_jobs(results.capacity, ctx["simulation_settings"], capacity_settings, save_path,
+                              ctx["sim_id"])
+    jobs += capacity_change_plot_jobs(capacity_by_zone_tech(results.capacity), capacity_settings, save_path,
+                                      ctx["sim_id"])
+    return {"plot_jobs": jobs}
+
+
+def _capacity_summary(results, ctx):
+    if results.capacity is not None:
+        capacity_by_zone_tech(results.capacity).to_csv(ctx["summary_dir"]() / "capacity_by_zone_tech.csv")
+    return {}
+
+
+def _network_analytics(results, ctx):
+    flow = results.flow
+    if flow is None:
+        print(f"[{results.scen}] No flow.csv (single-zone run?); skipping network analytics")
+        return {}
+    network = results.network
+    summary_dir = ctx["summary_dir"]()
+    losses = results.tlosses_header
+
+    def add_losses(summary):
+        if losses is not None and "AnnualSum" in losses.index:
+            summary["Losses (MWh)"] = pd.to_numeric(losses.loc["AnnualSum"], errors="coerce").reindex(summary.index)
+        return summary
+
+    if network is None:
+        # Without the line limits only the flows themselves are summarized
+        print(f"[{results.scen}] Summarizing line flows (no line limits)...")
+        add_losses(line_energy(flow, results.time_weights)).to_csv(summary_dir / "line_flows.csv")
+        return {}
+
+    print(f"[{results.scen}] Computing line utilization...")
+    limits = line_limits(network, results.network_expansion)
+    threshold = ctx["simulation_settings"].get("congestion_threshold", DEFAULT_CONGESTION_THRESHOLD)
+    _, summary, histogram = line_utilization(flow, limits, results.time_weights, threshold)
+    add_losses(summary).to_csv(summary_dir / "line_utilization.csv")
+    histogram.to_csv(summary_dir / "line_utilization_hours.csv")
+    return {"plot_jobs": network_plot_jobs(
+        summary, ctx["plot_settings"].get("analytics", {}), ctx["plot_dir"]("network"), ctx["sim_id"],
+    )}
+
+
+def _price_analytics(results, ctx):
+    prices = results.prices
+    if prices is None:
+        print(f"[{results.scen}] No prices.csv; skipping price analytics")
+        return {}
+    print(f"[{results.scen}] Computing price duration curves...")
+    duration = price_duration(prices, results.time_weights)
+    summary_dir = ctx["summary_dir"]()
+    duration.to_csv(summary_dir / "price_duration.csv")
+    price_summary(prices, results.time_weights).to_csv(summary_dir / "price_summary.csv")
+    return {"plot_jobs": price_duration_plot_jobs(
+        duration, ctx["plot_settings"].get("analytics", {}), ctx["plot_dir"]("prices"), ctx["sim_id"],
+    )}
+
+
+def _timeseries_tiles(results, ctx):
+    power_df, aggregates = results.power
+    period_map = results.period_map
+    groups = {}
+
+    by_zone_tech = aggregates.by_zone_tech
+    groups["Power by zone and technology"] = (
+        [f"{zone} / {tech}" for zone, tech in by_zone_tech.columns], by_zone_tech.to_numpy(),
+    )
+    if ctx["simulation_settings"].get("tiles_by_unit", 0) == 1 and power_df is not None:
+        by_unit = aggregates.by_unit
+        groups["Power by unit"] = (
+            [f"{zone} / {tech} / {unit}" for zone, tech, unit in by_unit.columns], by_unit.to_numpy(),
+        )
+    emissions_df, _ = results.emissions
+    groups["Emissions by zone"] = (
+        [col if col == "Total" else f"Zone {col}" for col in emissions_df.columns], emissions_df.to_numpy(),
+    )
+    if results.prices is not None:
+        groups["Prices by zone"] = ([f"Zone {col}" for col in results.prices.columns], results.prices.to_numpy())
+
+    # Tiles follow the chronological year, like the plots: with a period map
+    # they are built from the representative periods, never a full-year copy
+    n_hours = results.n_timesteps if period_map is None else period_map.n_hours
+    chronological = period_map is not None or find_period_map(results.scenario_save_dir) is None
+
+    out_dir = ctx["plot_dir"]("tiles")
+    print(f"[{results.scen}] Exporting time series tiles...")
+    stats = export_tiles(out_dir, groups, n_hours, title=f"{ctx['sim_id']} time series", chronological=chronological,
+                         tile_points=ctx["simulation_settings"].get("tile_points", DEFAULT_TILE_POINTS),
+                         period_map=period_map)
+    print(f"[{results.scen}] Wrote {stats['series']} series in {stats['files']} files "
+          f"({stats['bytes'] / 1e6:.1f} MB); open {out_dir / VIEWER_NAME}")
+    return {}
+
+
+def _catalog_kpis(results, ctx):
+    return {"kpis": {
+        "emissions": emissions_kpis(results.emissions_header),
+        "costs": cost_kpis(results.costs),
+        "capacity": capacity_rows(results.capacity),
+    }}
+
+
+# Every output post-processing can produce: the simulation setting that
+# enables it (and its default), the results it needs ({result: columns},
+# None = all columns), the function that builds it and, for plots, the
+# plot_settings file it is drawn with. Each output only sees the results it
+# declares (see DeclaredResults), so only the results of enabled outputs --
+# and what those are derived from, e.g. n_timesteps -- are ever loaded.
+OUTPUTS = {
+    "emissions plot": {
+        "setting": ("generate_emissions_plot", 0),
+        "requires": {"emissions": None, "time_weights": None, "period_map": None},
+        "build": _emissions_plot,
+        "plot_settings": "emissions",
+    },
+    "power plot": {
+        "setting": ("generate_power_plot", 0),
+        "requires": {"power": None, "time_weights": None, "period_map": None},
+        "build": _power_plot,
+        "plot_settings": "power",
+    },
+    "emissions summary": {
+        "setting": ("write_summaries", 1),
+        "requires": {"emissions": None, "time_weights": None},
+        "build": _emissions_summary,
+    },
+    "generation summary": {
+        "setting": ("write_summaries", 1),
+        "requires": {"power": None, "time_weights": None},
+        "build": _generation_summary,
+    },
+    "capacity plot": {
+        "setting": ("generate_capacity_plot", 0),
+        "requires": {"capacity": None},
+        "build": _capacity_plot,
+        "plot_settings": "capacity",
+    },
+    "capacity summary": {
+        "setting": ("write_summaries", 1),
+        "requires": {"capacity": None},
+        "build": _capacity_summary,
+    },
+    "network analytics": {
+        "setting": ("network_analytics", 1),
+        "requires": {
+            "flow": None,
+            "time_weights": None,
+            "network": None,
+            "network_expansion": ["Line", "New_Trans_Capacity"],
+            "tlosses_header": None,
+        },
+        "build": _network_analytics,
+        "plot_settings": "analytics",
+    },
+    "price analytics": {
+        "setting": ("price_analytics", 1),
+        "requires": {"prices": None, "time_weights": None},
+        "build": _price_analytics,
+        "plot_settings": "analytics",
+    },
+    "timeseries tiles": {
+        "setting": ("export_tiles", 0),
+        "requires": {"power": None, "emissions": None, "prices": None, "n_timesteps": None, "period_map": None},
+        "build": _timeseries_tiles,
+    },
+    "catalog": {
+        "setting": ("use_run_catalog", 1),
+        "requires": {
+            "emissions_header": None,
+            "costs": None,
+            "capacity": ["Resource", "Zone", "EndCap"],
+        },
+        "build": _catalog_kpis,
+    },
+}
+
+
+def enabled_outputs(simulation_settings):
+    """Names of the outputs switched on in simulation_settings."""
+    return [
+        name for name, output in OUTPUTS.items()
+        if simulation_settings.get(output["setting"][0], output["setting"][1]) == 1
+    ]
+
+
+def required_columns(output_names):
+    """
+    {result: columns} needed by the given outputs: the union of their
+    declared columns, None where any of them needs every column.
+    """
+    needs = {}
+    for name in output_names:
+        for result, columns in OUTPUTS[name]["requires"].items():
+            if result in needs and needs[result] is None:
+                continue
+            if columns is None:
+                needs[result] = None
+            else:
+                needs[result] = sorted(set(needs.get(result) or []) | set(columns))
+    return needs
+
+
+def build_outputs(scen, scenario_save_dir, simulation_settings, plot_settings, sim_id, profiler=None,
+                  inputs_dir=None):
+    """
+    Build every enabled output of one scenario from shared, lazily loaded
+    results. Returns (merged output dict, ScenarioResults).
+    """
+    names = enabled_outputs(simulation_settings)
+    keep_units = "power plot" in names and plot_settings.get("power", {}).get("zone_aggregation_method", 2) in (0, 2)
+    results = ScenarioResults(scen, scenario_save_dir, simulation_settings,
+                              columns=required_columns(names), profiler=profiler, inputs_dir=inputs_dir,
+                              keep_units=keep_units)
+    profiler = results.profiler
+
+    def plot_dir(kind):
+        path = Path(scenario_save_dir) / "plots" / kind
+        os.makedirs(path, exist_ok=True)
+        return path
+
+    def summary_dir():
+        path = Path(scenario_save_dir) / "summary"
+        os.makedirs(path, exist_ok=True)
+        return path
+
+    ctx = {
+        "simulation_settings": simulation_settings,
+        "plot_settings": plot_settings,
+        "sim_id": sim_id,
+        "plot_dir": plot_dir,
+        "summary_dir": summary_dir,
+    }
+
+    merged = {"plot_jobs": []}
+    for name in names:
+        with profiler.span(name, scenario=scen):
+            built = OUTPUTS[name]["build"](DeclaredResults(results, name), ctx)
+        merged["plot_jobs"] += built.pop("plot_jobs", [])
+        merged.update(built)
+
+    return merged, results
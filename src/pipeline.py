@@ -0,0 +1,239 @@
+import multiprocessing
+import os
+import threading
+import traceback
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+from harvest import STORE_DIR_NAME, harvest_scenario
+from outputs import build_outputs
+from profiling import Profiler
+from render import RenderQueue, render_jobs
+
+
+##########################################
+     # PER-SCENARIO POST-PROCESSING #
+##########################################
+
+def process_scenario(scen, case_dir, scenario_save_dir, simulation_settings, plot_settings, sim_timestamp,
+                     reuse=False, inputs_dir=None):
+    """
+    Harvest, load and plot one scenario. Runs inside a post-processing worker
+    process, so every argument must be picklable.
+
+    With reuse=True, case_dir is the output folder of an earlier run with the
+    same inputs (see run_cache); its results are linked in, not moved.
+    inputs_dir is the scenario's GenX case folder, for inputs the outputs
+    read (defaults to case_dir).
+
+    Returns a dict with keys:
+    - scenario: the scenario name
+    - run_settings: contents of results/run_settings.yml (or None)
+    - plot_jobs: plot jobs still to be rendered (empty if rendered here)
+    - render_times: {"filename", "seconds", ...} for each figure rendered here
+    - kpis: run catalog KPIs (emissions, costs, capacity), if the catalog is on
+    - profile: {"spans", "counters"} timing spans of every stage (see profiling.Profiler)
+    """
+    profiler = Profiler(enabled=simulation_settings.get("profile", 1) == 1)
+    with profiler.span("postprocess", scenario=scen):
+        result = _process_scenario(
+            scen, case_dir, scenario_save_dir, simulation_settings, plot_settings, sim_timestamp, reuse, profiler,
+            inputs_dir,
+        )
+    result["profile"] = {"spans": profiler.spans, "counters": profiler.counters}
+    return result
+
+
+def _process_scenario(scen, case_dir, scenario_save_dir, simulation_settings, plot_settings, sim_timestamp,
+                      reuse, profiler, inputs_dir=None):
+    case_dir = Path(case_dir)
+    scenario_save_dir = Path(scenario_save_dir)
+
+    if not case_dir.exists():
+        raise FileNotFoundError(
+            f"Expected case directory for scenario '{scen}' not found at:\n"
+            f"  {case_dir}\n"
+            f"Check 'genx_inputs_dir' / 'genx_outputs_dir' and scenario names."
+        )
+
+    # Where we want to store this run's organized outputs:
+    # output/<timestamp>/s1, s2, s3, ...
+    os.makedirs(scenario_save_dir, exist_ok=True)
+
+    # --- 1. Harvest: move outputs into place, then delete the originals ---
+    harvest_mode = "reuse" if reuse else simulation_settings.get("harvest_mode", "move")
+    store_root = None
+    if simulation_settings.get("dedupe_outputs", 0) == 1:
+        # output/.store, shared by every timestamped run
+        store_root = scenario_save_dir.parents[1] / STORE_DIR_NAME
+
+    print(f"[{scen}] Harvesting results ({harvest_mode}) from {case_dir} -> {scenario_save_dir}")
+    with profiler.span("harvest", scenario=scen, mode=harvest_mode) as attrs:
+        harvest_stats = harvest_scenario(case_dir, scenario_save_dir, harvest_mode, store_root, profiler)
+        attrs.update(harvest_stats)
+    profiler.count("bytes_copied", harvest_stats["bytes_copied"])
+    profiler.count("bytes_deduped", harvest_stats["bytes_deduped"])
+    print(
+        f"[{scen}] Harvested: {harvest_stats['moved']} moved, {harvest_stats['linked']} linked, "
+        f"{harvest_stats['copied']} copied ({harvest_stats['bytes_copied'] / 1e6:.1f} MB), "
+        f"{harvest_stats['deduped']} deduplicated ({harvest_stats['bytes_deduped'] / 1e6:.1f} MB)"
+    )
+
+    # --- 2. Build the enabled outputs (plots, summaries, catalog KPIs) ---
+    # Each output declares the results it needs and only sees those (see
+    # outputs.OUTPUTS and DeclaredResults); only they are loaded, each once,
+    # from the harvested copy, and shared by every output. Plots are built
+    # as plain-data jobs. With render_workers = 0 they are rendered here;
+    # otherwise they are returned and rendered by the pipeline's shared
+    # render pool.
+    sim_id = f"{sim_timestamp}_{scen}"
+    outputs, results = build_outputs(scen, scenario_save_dir, simulation_settings, plot_settings, sim_id, profiler,
+                                     inputs_dir=inputs_dir if inputs_dir is not None else case_dir)
+    plot_jobs = outputs.pop("plot_jobs")
+    print(f"[{scen}] Loaded: {', '.join(results.loaded) or 'nothing'}")
+
+    # run_settings.yml from the OUTPUT folder for this scenario (for metadata.txt)
+    run_settings = results.run_settings
+
+    render_times = []
+    if simulation_settings.get("render_workers", default_render_workers()) == 0:
+        render_times = render_jobs(plot_jobs)
+        plot_jobs = []
+        add_render_spans(profiler, render_times, scen)
+
+    return {
+        "scenario": scen,
+        "run_settings": run_settings,
+        "plot_jobs": plot_jobs,
+        "render_times": render_times,
+        "kpis": outputs.get("kpis"),
+    }
+
+
+def add_render_spans(profiler, render_times, scen):
+    """
+    Record one "render" span per figure from render.render_job timings.
+    """
+    for timing in render_times:
+        if timing.get("seconds") is None:
+            continue
+        profiler.add_span(
+            "render",
+            timing["start"],
+            timing["seconds"],
+            pid=timing["pid"],
+            tid=0,
+            scenario=scen,
+            filename=timing["filename"],
+        )
+        profiler.count("figures_rendered")
+
+
+def default_render_workers():
+    return os.cpu_count() or 1
+
+
+##########################################
+          # STAGED PIPELINE #
+##########################################
+
+class PostProcessingPipeline:
+    """
+    Process pool that post-processes scenarios as soon as they are handed in.
+
+    submit() is called from the GenX scheduler whenever a solve finishes, so
+    scenario s1 is harvested and plotted while s2 is still solving. Workers
+    are started with the "spawn" method so they never inherit the scheduler's
+    threads or Julia pipes.
+
+    The plot jobs each scenario produces go to one shared RenderQueue
+    (render_workers processes) as soon as that scenario is loaded.
+    """
+
+    def __init__(self, max_workers, simulation_settings, plot_settings, sim_timestamp, timestamp_root,
+                 profiler=None):
+        self.simulation_settings = simulation_settings
+        self.profiler = profiler if profiler is not None else Profiler(enabled=False)
+        self.plot_settings = plot_settings
+        self.sim_timestamp = sim_timestamp
+        self.timestamp_root = Path(timestamp_root)
+        self.pool = ProcessPoolExecutor(
+            max_workers=max(1, int(max_workers)),
+            mp_context=multiprocessing.get_context("spawn"),
+        )
+        self.futures = {}
+
+        render_workers = simulation_settings.get("render_workers", default_render_workers())
+        self.render_queue = RenderQueue(render_workers) if render_workers > 0 else None
+        self._rendered = set()
+        self._render_lock = threading.Lock()
+
+    def _queue_render(self, fut):
+        """
+        Hand a finished scenario's plot jobs to the render queue (once).
+        Called from the future's done-callback and again from collect().
+        """
+        if self.render_queue is None or fut.cancelled() or fut.exception() is not None:
+            return
+        result = fut.result()
+        with self._render_lock:
+            if result["scenario"] in self._rendered:
+                return
+            self._rendered.add(result["scenario"])
+            self.render_queue.submit(result.pop("plot_jobs"), tag=result["scenario"])
+
+    def submit(self, scen, case_dir, reuse=False, inputs_dir=None, on_done=None):
+        """
+        Queue one scenario. on_done(scen), if given, is called as soon as
+        its post-processing has succeeded (from a pool thread).
+        """
+        print(f"[{scen}] Queued for post-processing")
+        self.futures[scen] = self.pool.submit(
+            process_scenario,
+            scen,
+            case_dir,
+            self.timestamp_root / scen,
+            self.simulation_settings,
+            self.plot_settings,
+            self.sim_timestamp,
+            reuse,
+            inputs_dir,
+        )
+        self.futures[scen].add_done_callback(self._queue_render)
+        if on_done is not None:
+            self.futures[scen].add_done_callback(
+                lambda fut: on_done(scen) if not fut.cancelled() and fut.exception() is None else None
+            )
+
+    def collect(self):
+        """
+        Wait for every submitted scenario and shut the pool down.
+
+        Returns (results, errors): scenario -> result dict for the scenarios
+        that finished, and scenario -> error text for the ones that raised.
+        """
+        results = {}
+        errors = {}
+        try:
+            for scen, fut in self.futures.items():
+                try:
+                    results[scen] = fut.result()
+                    self._queue_render(fut)
+                except Exception:
+                    errors[scen] = traceback.format_exc()
+                    print(f"[{scen}] Post-processing FAILED:\n{errors[scen]}")
+        finally:
+            self.pool.shutdown()
+
+        if self.render_queue is not None:
+            for timing in self.render_queue.collect():
+                results[timing["tag"]]["render_times"].append(timing)
+                add_render_spans(self.profiler, [timing], timing["tag"])
+
+        for scen, result in results.items():
+            result.pop("plot_jobs", None)
+            profile = result.pop("profile", None) or {}
+            self.profiler.merge(profile.get("spans"), profile.get("counters"))
+            seconds = sum(t["seconds"] or 0 for t in result["render_times"])
+            print(f"[{scen}] Rendered {len(result['render_times'])} figure(s) in {seconds:.1f} s of render time")
+        return results, errors
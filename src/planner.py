@@ -0,0 +1,326 @@
+import datetime
+import hashlib
+import json
+import os
+import shutil
+import threading
+from contextlib import contextmanager
+from pathlib import Path
+
+from run_cache import hash_file_into
+from sweep import edit_settings_yml, read_settings_yml
+
+
+# Solver settings file GenX reads for each solver (settings/<name>), and the
+# option in it that sets the solver's thread count. Clp is single-threaded.
+SOLVER_THREAD_KEYS = {
+    "highs": "threads",
+    "gurobi": "Threads",
+    "cplex": "CPX_PARAM_THREADS",
+    "cbc": "threads",
+    "clp": None,
+}
+DEFAULT_SOLVER = "HiGHS"
+
+# Solve-time history under the output root: scenario -> recent solves
+HISTORY_NAME = ".solve_history.json"
+HISTORY_LENGTH = 10
+
+# Time-domain reduction results kept for reuse, under the output root
+TDR_STORE_NAME = ".tdr_store"
+TDR_DIR_NAME = "TDR_results"
+
+# Inputs GenX's time-domain reduction reads: the time series and resources,
+# and its settings. Policies are not among them, so cases that differ only
+# in policy parameters cluster identically.
+TDR_INPUTS = ["system", "resources", "settings/time_domain_reduction_settings.yml"]
+
+
+##########################################
+          # SOLVER SETTINGS #
+##########################################
+
+def read_case_solver(case_dir):
+    """
+    The solver a GenX case uses ("Solver" in genx_settings.yml, HiGHS by
+    default), its settings file and the thread count already set in it
+    (None if unset). Returns a dict: solver, settings_path, thread_key,
+    threads, tdr (1 if the case uses time-domain reduction).
+    """
+    settings_dir = Path(case_dir) / "settings"
+    genx_settings = read_settings_yml(settings_dir / "genx_settings.yml")
+    solver = genx_settings.get("Solver", DEFAULT_SOLVER)
+    thread_key = SOLVER_THREAD_KEYS.get(solver.lower())
+    settings_path = settings_dir / f"{solver.lower()}_settings.yml"
+
+    threads = None
+    if thread_key is not None:
+        try:
+            threads = int(float(read_settings_yml(settings_path)[thread_key]))
+        except (KeyError, ValueError):
+            threads = None
+
+    return {
+        "solver": solver,
+        "settings_path": settings_path,
+        "thread_key": thread_key,
+        "threads": threads,
+        "tdr": genx_settings.get("TimeDomainReduction", "0") == "1",
+    }
+
+
+@contextmanager
+def solver_threads_applied(settings_path, thread_key, threads):
+    """
+    Set the solver's thread option in its settings file for the duration of
+    one solve, then restore the file exactly, so the case's input hash is
+    unchanged. The edit goes into a new file: the original is moved aside
+    and back (a symlink gets its link back), so a file shared with the base
+    case and the other cases of a sweep (symlink or hardlink) is never
+    written to.
+    """
+    settings_path = Path(settings_path)
+    backup = settings_path.with_name(f".{settings_path.name}.orig")
+    if backup.exists() or backup.is_symlink():
+        os.replace(backup, settings_path)  # left behind by an interrupted solve
+    if thread_key is None or not threads or not settings_path.exists():
+        yield
+        return
+
+    original = settings_path.read_text()
+    os.rename(settings_path, backup)
+    settings_path.write_text(edit_settings_yml(original, thread_key, int(threads)))
+    try:
+        yield
+    finally:
+        os.replace(backup, settings_path)
+
+
+##########################################
+          # SOLVE-TIME HISTORY #
+##########################################
+
+class SolveHistory:
+    """
+    Wall time of recent GenX solves per scenario, kept across runs in
+    output/.solve_history.json so the planner can start the longest cases
+    first.
+    """
+
+    def __init__(self, output_root: Path):
+        self.path = Path(output_root) / HISTORY_NAME
+        self.entries = {}
+        if self.path.exists():
+            try:
+                with self.path.open("r") as f:
+                    self.entries = json.load(f)
+            except (OSError, json.JSONDecodeError):
+                print(f"Warning: ignoring unreadable solve history {self.path}")
+
+    def record(self, scenario, seconds, threads=None, solver=None):
+        runs = self.entries.setdefault(scenario, [])
+        runs.append({
+            "seconds": seconds,
+            "threads": threads,
+            "solver": solver,
+            "date": datetime.datetime.now().isoformat(timespec="seconds"),
+        })
+        del runs[:-HISTORY_LENGTH]
+
+    def estimate(self, scenario):
+        """Expected solve time (s): the scenario's most recent solve, or None."""
+        runs = self.entries.get(scenario)
+        return runs[-1]["seconds"] if runs else None
+
+    def save(self):
+        os.makedirs(self.path.parent, exist_ok=True)
+        tmp_path = self.path.with_suffix(".json.tmp")
+        with tmp_path.open("w") as f:
+            json.dump(self.entries, f, indent=2)
+        os.replace(tmp_path, self.path)
+
+
+def _input_size(case_dir):
+    """Bytes of a case's input files: the fallback size estimate."""
+    total = 0
+    for tree in ("system", "resources", "policies"):
+        for root, _, files in os.walk(Path(case_dir) / tree):
+            total += sum(os.path.getsize(Path(root) / name) for name in files)
+    return total
+
+
+##########################################
+          # EXECUTION PLAN #
+##########################################
+
+def plan_cases(case_dirs, max_parallel=1, history=None, solver_threads=None, cpu_count=None):
+    """
+    Order the cases and give each a solver thread count.
+
+    - Order: longest expected solve first (from the solve history; cases
+      without history go first, largest inputs first, since they may be the
+      longest). Finishing the long cases early shortens the batch. Among
+      cases with the same time-domain reduction inputs, only the first
+      goes ahead of the rest, so the others can reuse its clustering
+      (case_preparer holds them until it is done).
+    - Threads: solver_threads "auto" splits the machine's cores between the
+      cases that run at once; a number caps every case at that many; None/0
+      leaves the solver settings alone. A thread count already set in a
+      case's solver settings file always wins, and single-threaded solvers
+      (Clp) get 1.
+
+    Returns a list of plan dicts (scenario, case_dir, solver, threads,
+    settings_path, thread_key, estimate, tdr) in run order.
+    """
+    cpu_count = cpu_count or os.cpu_count() or 1
+    slots = max(1, min(int(max_parallel), len(case_dirs) or 1))
+    if solver_threads == "auto":
+        default_threads = max(1, cpu_count // slots)
+    else:
+        default_threads = int(solver_threads) if solver_threads else None
+
+    plans = []
+    for scen, case_dir in case_dirs:
+        solver = read_case_solver(case_dir)
+        threads = solver["threads"] or default_threads
+        if solver["thread_key"] is None and threads:
+            threads = 1
+        plans.append({
+            "scenario": scen,
+            "case_dir": case_dir,
+            "solver": solver["solver"],
+            "settings_path": solver["settings_path"],
+            "thread_key": solver["thread_key"] if solver["threads"] is None else None,
+            "threads": threads,
+            "estimate": history.estimate(scen) if history is not None else None,
+            "tdr": solver["tdr"],
+            "tdr_key": tdr_inputs_hash(case_dir) if solver["tdr"] else None,
+            "size": _input_size(case_dir),
+        })
+
+    plans.sort(key=lambda p: (p["estimate"] is not None, -(p["estimate"] or 0), -p["size"]))
+
+    # Cases sharing time-domain reduction inputs: the first of each group
+    # starts before the others, so they can start from its clustering
+    leaders = set()
+    for plan in plans:
+        if plan["tdr_key"] is not None and plan["tdr_key"] not in leaders:
+            leaders.add(plan["tdr_key"])
+            plan["leader"] = True
+    plans.sort(key=lambda p: p["tdr_key"] is not None and not p.get("leader", False))
+    return plans
+
+
+def print_plan(plans, slots):
+    print(f"Execution plan ({slots} case(s) at a time, longest first):")
+    for plan in plans:
+        estimate = f"~{plan['estimate']:.0f} s" if plan["estimate"] is not None else "no history"
+        threads = plan["threads"] or "solver default"
+        print(f"  {plan['scenario']}: {plan['solver']}, {threads} thread(s), {estimate}")
+
+
+##########################################
+        # TIME-DOMAIN WARM START #
+##########################################
+
+def tdr_inputs_hash(case_dir):
+    """
+    Hash of everything GenX's time-domain reduction reads (see TDR_INPUTS).
+    """
+    case_dir = Path(case_dir)
+    h = hashlib.sha256()
+    for rel in TDR_INPUTS:
+        path = case_dir / rel
+        files = [path] if path.is_file() else sorted(
+            p for p in path.rglob("*") if p.is_file() and not p.name.startswith(".")
+        ) if path.is_dir() else []
+        for file in files:
+            h.update(file.relative_to(case_dir).as_posix().encode())
+            h.update(b"\0")
+            hash_file_into(h, file)
+            h.update(b"\0")
+    return h.hexdigest()
+
+
+class TDRStore:
+    """
+    Keeps the TDR_results/ folder of solved cases under the output root,
+    keyed by the hash of their time-domain reduction inputs. GenX skips
+    clustering when a case already has TDR_results/, so a case that only
+    differs from an earlier one in policies starts from its clustered time
+    series instead of clustering again.
+    """
+
+    def __init__(self, output_root: Path):
+        self.root = Path(output_root) / TDR_STORE_NAME
+
+    def restore(self, case_dir):
+        """
+        Copy stored TDR results into case_dir. Returns True if the case now
+        starts from them.
+        """
+        dest = Path(case_dir) / TDR_DIR_NAME
+        if dest.exists():
+            return False
+        stored = self.root / tdr_inputs_hash(case_dir)
+        if not stored.is_dir():
+            return False
+        shutil.copytree(stored, dest)
+        return True
+
+    def save(self, case_dir):
+        source = Path(case_dir) / TDR_DIR_NAME
+        if not (source / "Period_map.csv").exists():
+            return
+        stored = self.root / tdr_inputs_hash(case_dir)
+        if stored.exists():
+            return
+        # Cases solving in parallel may store the same results at once:
+        # each copies to its own folder and the first rename wins
+        tmp = stored.with_name(f"{stored.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+        shutil.copytree(source, tmp)
+        try:
+            os.rename(tmp, stored)
+        except OSError:
+            shutil.rmtree(tmp, ignore_errors=True)
+
+
+def case_preparer(plans, tdr_store=None):
+    """
+    A prepare_case(scenario, case_dir) context manager for
+    genx_runner.run_scenarios: applies the planned solver threads and, with
+    a tdr_store, restores stored TDR results before the solve and stores new
+    ones after it.
+
+    Cases sharing time-domain reduction inputs wait until the first of
+    their group (its "leader", see plan_cases) has finished, so they start
+    from its clustering even when they run in parallel. The leaders are
+    queued first, so a waiting case never holds back its own leader.
+    """
+    by_scenario = {plan["scenario"]: plan for plan in plans}
+    leaders = {plan["tdr_key"]: plan["scenario"] for plan in plans if plan.get("leader")}
+    leader_done = {key: threading.Event() for key in leaders} if tdr_store is not None else {}
+
+    @contextmanager
+    def prepare_case(scen, case_dir):
+        plan = by_scenario[scen]
+        done = leader_done.get(plan["tdr_key"])
+        is_leader = plan.get("leader", False)
+        if done is not None and not is_leader and not done.is_set():
+            print(f"[{scen}] Waiting for {leaders[plan['tdr_key']]} to cluster the same time series")
+            done.wait()
+        try:
+            if tdr_store is not None and plan["tdr"] and tdr_store.restore(case_dir):
+                print(f"[{scen}] Warm start: reusing time-domain reduction of an earlier identical case")
+            with solver_threads_applied(plan["settings_path"], plan["thread_key"], plan["threads"]):
+                yield
+            if tdr_store is not None and plan["tdr"]:
+                try:
+                    tdr_store.save(case_dir)
+                except OSError as e:
+                    print(f"[{scen}] Warning: could not store time-domain reduction results: {e}")
+        finally:
+            if is_leader and done is not None:
+                done.set()  # also when the leader failed: the others then cluster themselves
+
+    return prepare_case
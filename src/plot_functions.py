@@ -1,281 +1,433 @@
-import matplotlib.pyplot as plt
 import os
+import numpy as np
 import pandas as pd
+from aggregation import ResourceAggregates
+from decimation import decimate_series
+from render import barh_job, grouped_barh_job, line_job, render_jobs
+from time_domain import chronological_axis
+
+# Every plot is built as a list of plot jobs (plain data: series, labels,
+# style) by a *_jobs function. The jobs are rendered either in a render
+# process pool (see render.RenderQueue) or right away by the matching
+# *_plot wrapper.
+#
+# Long time series are thinned per plot according to the "decimation" entry
+# of the plot's settings file (see decimation.decimate_series). Results of
+# time-domain-reduced runs can be drawn over the chronological year by
+# passing a time_domain.PeriodMap.
+
+
+def time_axis(index, step=24):
+    """
+    Tick positions and labels every `step` timesteps
+    (or a reasonable fallback for short series).
+    """
+    n = len(index)
+    tick_step = step if n >= step else max(1, n // 10 or 1)
+    x_ticks = list(range(n))[::tick_step]
+    x_labels = list(index[::tick_step])
+    return x_ticks, x_labels
+
+
+def plot_axis(index, period_map=None):
+    """
+    Tick positions/labels for the modeled timesteps, or month ticks over
+    the chronological year when the series are expanded with period_map.
+    """
+    if period_map is not None:
+        return chronological_axis(period_map.n_hours)
+    return time_axis(index)
+
+
+def plot_series(series, decimation=None, time_weights=None, period_map=None):
+    """
+    Prepare plot series: with a period_map, expand each line from the
+    representative periods to the chronological year (one index lookup per
+    line, no year-long copy of the whole table), then decimate. Expanded
+    hours each count once, so time weights no longer apply.
+    """
+    if period_map is not None:
+        series = [{**s, "y": period_map.expand(np.asarray(s["y"]))} for s in series]
+        time_weights = None
+    return decimate_series(series, decimation, time_weights)
+
 
 ##########################################
           # EMISSIONS PLOT #
 ##########################################
 
-def emissions_plot(df, sim_settings, plot_settings, save_path, sim_id):
-    # Remove the 'AnnualSum' row 
-    df = df[df['Zone'] != 'AnnualSum']
+def emissions_plot_jobs(df, sim_settings, plot_settings, save_path, sim_id, time_weights=None, period_map=None):
+    """
+    Build the emissions plot jobs according to emissions.json settings.
 
-    # Set the time index
-    df = df.set_index('Zone')
+    df holds the timestep rows of emissions.csv (index t1, t2, ...) with
+    numeric columns; the 'AnnualSum' row is split off when the file is loaded
+    (see result_store.load_genx_result).
 
-    # Convert all other columns to numeric
-    df = df.apply(pd.to_numeric)
+    zone_aggregation_method:
+      0: one plot with one line per zone.
+      1: one plot of the system total.
+      2: both.
+
+    time_weights: per-timestep weights (results/time_weights.csv) used by
+    daily/weekly decimation.
 
+    period_map: a time_domain.PeriodMap to draw time-domain-reduced results
+    over the chronological year instead of the representative periods.
+    """
     fig_size = plot_settings["fig_size"]
     dpi = plot_settings["dpi"]
     zone_aggregation_method = plot_settings["zone_aggregation_method"]
-
-    if zone_aggregation_method == 0: 
-         plt.figure(figsize=fig_size)
-         plt.xlabel("Time")
-         plt.ylabel("Emissions (MW)")
-         x_labels = df.index[::24]  # your tick labels (strings)
-         x_positions = range(len(df.index))[::24]  # numeric positions for ticks
-         plt.xticks(x_positions, x_labels, rotation=45)      # set labels as strings
-         plt.title("Emission by Zone Over Time")
-         plt.grid(False)
-         for col in df.columns[:-1]:  # skip 'Total' 
-            plt.plot(range(len(df.index)), df[col], label=f'Zone {col}')
-         plt.legend()
-         
-         filename= os.path.join(save_path, f'{sim_id}_Emissions_by_Zone')
-         plt.savefig(filename, dpi = dpi)
-         plt.close()
-         print(f"Saved: {filename}")
-
-    if zone_aggregation_method == 1: 
-         plt.figure(figsize=fig_size)
-         plt.xlabel("Time")
-         plt.ylabel("Emissions (MW)")
-         x_labels = df.index[::24]  # your tick labels (strings)
-         x_positions = range(len(df.index))[::24]  # numeric positions for ticks
-         plt.xticks(x_positions, x_labels, rotation=45)   
-         plt.title("Total Emissions Over Time")
-         plt.grid(False)
-         plt.plot(range(len(df.index)), df['Total'], color= 'black')
-         
-         filename= os.path.join(save_path, f'{sim_id}_Emissions_Total')
-         plt.savefig(filename, dpi = dpi)
-         plt.close()
-         print(f"Saved: {filename}")
-
-    if zone_aggregation_method == 2: 
-         plt.figure(figsize=fig_size)
-         plt.xlabel("Time")
-         plt.ylabel("Emissions (MW)")
-         x_labels = df.index[::24]  # your tick labels (strings)
-         x_positions = range(len(df.index))[::24]  # numeric positions for ticks
-         plt.xticks(x_positions, x_labels, rotation=45)   
-         plt.title("Emission by Zone Over Time")
-         plt.grid(False)
-         for col in df.columns[:-1]:  # skip 'Total' 
-            plt.plot(range(len(df.index)), df[col], label=f'Zone {col}')
-         plt.legend()
-         
-         filename1= os.path.join(save_path, f'{sim_id}_Emissions_by_Zone')
-         plt.savefig(filename1, dpi = dpi)
-         plt.close()
-  
-
-         plt.figure(figsize=fig_size)
-         plt.xlabel("Time")
-         plt.ylabel("Emissions (MW)")
-         x_labels = df.index[::24]  # your tick labels (strings)
-         x_positions = range(len(df.index))[::24]  # numeric positions for ticks
-         plt.xticks(x_positions, x_labels, rotation=45)   
-         plt.title("Total Emissions Over Time")
-         plt.grid(False)
-         plt.plot(range(len(df.index)), df['Total'], color= 'black')
-         
-         filename2= os.path.join(save_path, f'{sim_id}_Emissions_Total')
-         plt.savefig(filename2, dpi = dpi)
-         plt.close()
-         print(f"Saved: {filename1} and {filename2}")
-
+    decimation = plot_settings.get("decimation")
+    x_ticks, x_labels = plot_axis(df.index, period_map)
+
+    jobs = []
+
+    if zone_aggregation_method in (0, 2):
+        jobs.append(line_job(
+            os.path.join(save_path, f'{sim_id}_Emissions_by_Zone'),
+            plot_series(
+                [{"y": df[col], "label": f'Zone {col}'} for col in df.columns[:-1]],  # skip 'Total'
+                decimation,
+                time_weights,
+                period_map,
+            ),
+            fig_size,
+            dpi,
+            title=plot_settings.get("title_by_zone", "Emission by Zone Over Time"),
+            xlabel=plot_settings.get("x_label_by_zone", "Time"),
+            ylabel=plot_settings.get("y_label_by_zone", "Emissions (MW)"),
+            x_ticks=x_ticks,
+            x_labels=x_labels,
+            legend={},
+        ))
+
+    if zone_aggregation_method in (1, 2):
+        jobs.append(line_job(
+            os.path.join(save_path, f'{sim_id}_Emissions_Total'),
+            plot_series([{"y": df['Total'], "color": 'black'}], decimation, time_weights, period_map),
+            fig_size,
+            dpi,
+            title=plot_settings.get("title_all_zones", "Total Emissions Over Time"),
+            xlabel=plot_settings.get("x_label_all_zones", "Time"),
+            ylabel=plot_settings.get("y_label_all_zones", "Emissions (MW)"),
+            x_ticks=x_ticks,
+            x_labels=x_labels,
+        ))
+
+    return jobs
+
+
+def emissions_plot(df, sim_settings, plot_settings, save_path, sim_id, time_weights=None, period_map=None):
+    return render_jobs(emissions_plot_jobs(df, sim_settings, plot_settings, save_path, sim_id, time_weights, period_map))
 
 
 ##########################################
           # POWER PLOT #
 ##########################################
 
-def power_plot(df, sim_settings, plot_settings, save_path, sim_id):
+def power_plot_jobs(df, sim_settings, plot_settings, save_path, sim_id, aggregates=None, time_weights=None,
+                    period_map=None):
     """
-    Create power plots from power.csv according to power.json settings.
+    Build the power plot jobs according to power.json settings.
 
     zone_aggregation_method:
       0: For each zone, one plot with one line per *unit* (zone-tech-unit).
       1: For each zone, one plot with one line per *technology* (units summed).
       2: For each zone, do both (so 2 plots per zone).
 
-    """
-
-    # --- 1. Clean and set time index ---
+    df holds the timestep rows of power.csv (index t1, t2, ...) with numeric
+    columns; the 'Zone' and 'AnnualSum' header rows are split off when the
+    file is loaded (see result_store.load_genx_result).
 
-    # Drop the rows that are not time steps
-    if "Resource" in df.columns:
-        df = df[~df["Resource"].isin(["Zone", "AnnualSum"])]
-        df = df.set_index("Resource")
-    else:
-        df = df.copy()
+    aggregates: a ResourceAggregates built from the same power.csv (shared
+    with other plots/summaries), or an aggregation.StreamingAggregates for
+    files too large to load (df is then None). Built from df if not given.
 
-    # Convert remaining columns to numeric
-    df = df.apply(pd.to_numeric, errors="coerce")
+    time_weights: per-timestep weights (results/time_weights.csv) used by
+    daily/weekly decimation.
 
+    period_map: a time_domain.PeriodMap to draw time-domain-reduced results
+    over the chronological year instead of the representative periods.
+    """
     fig_size = plot_settings["fig_size"]
     dpi = plot_settings["dpi"]
     zone_aggregation_method = plot_settings["zone_aggregation_method"]
+    decimation = plot_settings.get("decimation")
 
-    # Basic x-axis: integer positions, labels every 24 steps (or reasonable fallback)
-    x_positions = range(len(df.index))
-    tick_step = 24 if len(df.index) >= 24 else max(1, len(df.index) // 10 or 1)
-    x_labels = df.index[::tick_step]
-    x_ticks = list(range(len(df.index)))[::tick_step]
-
-    # --- 2. Helper: parse column names into (zone, tech, unit) ---
-
-    def parse_zone_tech(colname):
-        """
-        Parse column names of the form:
-          NY_Z_A_conventional_hydroelectric_1
-          NENG_Rest_utilitypv_class1_2
-        into (zone, tech, unit).
+    # Resource names are parsed once into (zone, tech, unit) and all sums are
+    # computed in one grouped reduction (see aggregation.ResourceAggregates).
+    if aggregates is None:
+        aggregates = ResourceAggregates(df)
+    by_zone_tech = aggregates.by_zone_tech
+    x_ticks, x_labels = plot_axis(aggregates.index, period_map)
 
-        Heuristic tailored to the sample file:
-          - If name starts with 'NY_Z_', zone = first 3 tokens, else first 2.
-          - Last token after '_' is assumed to be the unit index.
-        """
-        if colname in ("Resource", "Total"):
-            return None, None, None
+    jobs = []
 
-        base, unit = colname.rsplit("_", 1)  # split off unit index
-        parts = base.split("_")
+    for zone in aggregates.zones:
+        zone_cols, zone_techs, zone_units = aggregates.zone_units(zone)
 
-        if parts[0] == "NY" and len(parts) >= 3:
-            zone_parts = parts[:3]      # e.g. NY_Z_A, NY_Z_G-I, NY_Z_C&E
-            tech_parts = parts[3:]
-        else:
-            zone_parts = parts[:2]      # e.g. NENG_Rest, PJM_EMAC, PJM_Rest
-            tech_parts = parts[2:]
+        # 0) One plot per zone, one line per unit (no aggregation)
+        if zone_aggregation_method in (0, 2):
+            unit_df = aggregates.unit_series(zone)
+            jobs.append(line_job(
+                os.path.join(save_path, f"{sim_id}_Power_Zone-{zone}_ByUnit"),
+                plot_series(
+                    [
+                        {"y": unit_df[col], "label": f"{tech} (unit {unit})"}
+                        for col, tech, unit in zip(zone_cols, zone_techs, zone_units)
+                    ],
+                    decimation,
+                    time_weights,
+                    period_map,
+                ),
+                fig_size,
+                dpi,
+                title=f"Power by Unit – Zone {zone}",
+                xlabel="Time",
+                ylabel="Power (MW)",
+                x_ticks=x_ticks,
+                x_labels=x_labels,
+                legend={"fontsize": "small", "ncol": 2},
+                bbox_inches="tight",
+            ))
 
-        zone = "_".join(zone_parts)
-        tech = "_".join(tech_parts) if tech_parts else "Unknown"
+        # 1) One plot per zone, one line per technology (aggregated over units)
+        if zone_aggregation_method in (1, 2):
+            df_zone_by_tech = by_zone_tech[zone]
+            jobs.append(line_job(
+                os.path.join(save_path, f"{sim_id}_Power_Zone-{zone}_ByTech"),
+                plot_series(
+                    [{"y": df_zone_by_tech[tech], "label": tech} for tech in df_zone_by_tech.columns],
+                    decimation,
+                    time_weights,
+                    period_map,
+                ),
+                fig_size,
+                dpi,
+                title=f"Power by Technology – Zone {zone}",
+                xlabel="Time",
+                ylabel="Power (MW)",
+                x_ticks=x_ticks,
+                x_labels=x_labels,
+                legend={"fontsize": "small", "ncol": 2},
+                bbox_inches="tight",
+            ))
+
+    return jobs
+
+
+def power_plot(df, sim_settings, plot_settings, save_path, sim_id, aggregates=None, time_weights=None,
+               period_map=None):
+    return render_jobs(
+        power_plot_jobs(df, sim_settings, plot_settings, save_path, sim_id, aggregates, time_weights, period_map)
+    )
 
-        return zone, tech, unit
 
-    # --- 3. Build mapping: zone -> list of (colname, tech, unit) ---
+##########################################
+# CAPACITY PLOT FUNCTIONS
+##########################################
 
-    zone_to_cols = {}
 
-    for col in df.columns:
-        if col == "Total":
-            continue  # we don't treat Total as a zone/tech/unit column here
-        zone, tech, unit = parse_zone_tech(col)
-        if zone is None:
-            continue
-        zone_to_cols.setdefault(zone, []).append((col, tech, unit))
+def capacity_plot_jobs(capacity_csv, sim_settings, plot_settings, save_path, sim_id):
+    """
+    Build one horizontal bar chart of EndCap by resource per zone.
 
-    # --- 4. For each zone, build dataframes for:
-    #       - by_unit: original columns for that zone
-    #       - by_tech: sum across units for each technology
-    # -------------------------------------------------------
+    capacity.json:
+      "all zones": 1 to plot every zone, otherwise only the zones listed
+      in "zones_specific".
+    """
+    df = capacity_csv[['Resource', 'Zone', 'EndCap']].copy()
+    df = df[df['Resource'] != 'Total']
+    df['EndCap'] = pd.to_numeric(df['EndCap'], errors='coerce').fillna(0.0)
+    df['Zone'] = pd.to_numeric(df['Zone'], errors='coerce').astype('Int64')  # 1.0 -> 1 (the Total row is blank)
+    df = df.sort_values('EndCap', ascending=True)
 
-    for zone, cols_info in zone_to_cols.items():
-        # All column names for this zone
-        zone_cols = [c for (c, t, u) in cols_info]
+    dpi = plot_settings.get("dpi", 150)
 
-        # Dataframe with only that zone's columns (by unit)
-        df_zone_by_unit = df[zone_cols].copy()
+    if plot_settings.get("all zones", 1) == 1:
+        zones = list(df['Zone'].unique())
+    else:
+        zones = plot_settings.get("zones_specific", [])
+
+    jobs = []
+    for zone in zones:
+        zone_df = df[df['Zone'].astype(str) == str(zone)]
+        jobs.append(barh_job(
+            os.path.join(save_path, f'{sim_id}_Capacity_by_Resource_Zone_{zone}.png'),
+            zone_df['Resource'],
+            zone_df['EndCap'],
+            (10, max(4, len(zone_df) * 0.15)),
+            dpi,
+            title=f'Capacity by Resource in Zone {zone}',
+            xlabel='EndCap',
+        ))
+    return jobs
 
-        # Dataframe aggregated by technology (sum across units)
-        tech_to_cols = {}
-        for (col, tech, unit) in cols_info:
-            tech_to_cols.setdefault(tech, []).append(col)
 
-        df_zone_by_tech = pd.DataFrame(index=df.index)
-        for tech, tech_cols in tech_to_cols.items():
-            df_zone_by_tech[tech] = df[tech_cols].sum(axis=1)
+def capacity_plot(capacity_csv, sim_settings, plot_settings, save_path, sim_id):
+    return render_jobs(capacity_plot_jobs(capacity_csv, sim_settings, plot_settings, save_path, sim_id))
 
-        # --- 5. Plot according to zone_aggregation_method ---
 
-        # 0) One plot per zone, one line per unit (no aggregation)
-        if zone_aggregation_method in (0, 2):
-            plt.figure(figsize=fig_size)
-            plt.xlabel("Time")
-            plt.ylabel("Power (MW)")
-            plt.xticks(x_ticks, x_labels, rotation=45)
-            plt.title(f"Power by Unit – Zone {zone}")
-            plt.grid(False)
-
-            for (col, tech, unit) in cols_info:
-                label = f"{tech} (unit {unit})"
-                plt.plot(x_positions, df[col], label=label)
-
-            plt.legend(fontsize="small", ncol=2)
-            filename = os.path.join(save_path, f"{sim_id}_Power_Zone-{zone}_ByUnit")
-            plt.savefig(filename, dpi=dpi, bbox_inches="tight")
-            plt.close()
-            print(f"Saved: {filename}")
+def capacity_change_plot_jobs(by_zone_tech, plot_settings, save_path, sim_id):
+    """
+    Build one grouped bar chart of start, retired, new and end capacity by
+    technology (all zones), from analytics.capacity_by_zone_tech.
+    """
+    dpi = plot_settings.get("dpi", 150)
+    fig_size = plot_settings.get("fig_size", [12, 6])
+    by_tech = by_zone_tech.groupby(level="tech", observed=True).sum().sort_values("EndCap")
+    columns = [c for c in ("StartCap", "RetCap", "NewCap", "EndCap") if c in by_tech.columns]
+    return [grouped_barh_job(
+        os.path.join(save_path, f'{sim_id}_Capacity_Change_by_Tech'),
+        by_tech.index,
+        {col: by_tech[col].to_numpy() for col in columns},
+        (fig_size[0], max(4, len(by_tech) * 0.6)),
+        dpi,
+        title=plot_settings.get("title_change", "Capacity Change by Technology"),
+        xlabel=plot_settings.get("x_label_change", "Capacity (MW)"),
+    )]
 
-        # 1) One plot per zone, one line per technology (aggregated over units)
-        if zone_aggregation_method in (1, 2):
-            plt.figure(figsize=fig_size)
-            plt.xlabel("Time")
-            plt.ylabel("Power (MW)")
-            plt.xticks(x_ticks, x_labels, rotation=45)
-            plt.title(f"Power by Technology – Zone {zone}")
-            plt.grid(False)
 
-            for tech in df_zone_by_tech.columns:
-                plt.plot(x_positions, df_zone_by_tech[tech], label=tech)
+##########################################
+      # NETWORK AND PRICE PLOTS #
+##########################################
 
-            plt.legend(fontsize="small", ncol=2)
-            filename = os.path.join(save_path, f"{sim_id}_Power_Zone-{zone}_ByTech")
-            plt.savefig(filename, dpi=dpi, bbox_inches="tight")
-            plt.close()
-            print(f"Saved: {filename}")
+def network_plot_jobs(summary, plot_settings, save_path, sim_id):
+    """
+    Build the transmission plots from analytics.line_utilization's summary:
+    congested hours per line, and mean / P90 / max utilization per line.
 
+    plot_settings: analytics.json (fig_size, dpi); optional. Lines without
+    a known limit have no utilization and are left out.
+    """
+    dpi = plot_settings.get("dpi", 150)
+    fig_size = plot_settings.get("fig_size", [12, 6])
+    summary = summary.dropna(subset=["Mean utilization"])
+    if summary.empty:
+        return []
+    labels = [f'Line {line}' for line in summary.index]
+    height = max(4, len(summary) * 0.3)
+
+    jobs = [barh_job(
+        os.path.join(save_path, f'{sim_id}_Congested_Hours_by_Line'),
+        labels,
+        summary["Congested hours"].to_numpy(),
+        (fig_size[0], height),
+        dpi,
+        title=plot_settings.get("title_congestion", "Congested Hours by Line"),
+        xlabel="Hours per year",
+        color="tab:red",
+    )]
+
+    columns = [c for c in ("Mean utilization", "P90 utilization", "Max utilization") if c in summary.columns]
+    if "Mean utilization" in summary.columns:
+        jobs.append(grouped_barh_job(
+            os.path.join(save_path, f'{sim_id}_Line_Utilization'),
+            labels,
+            {col: summary[col].fillna(0.0).to_numpy() for col in columns},
+            (fig_size[0], height * 1.5),
+            dpi,
+            title=plot_settings.get("title_utilization", "Line Utilization"),
+            xlabel="Share of line limit",
+        ))
+    return jobs
+
+
+def price_duration_plot_jobs(duration, plot_settings, save_path, sim_id):
+    """
+    Build one plot of the price duration curve of every zone, from
+    analytics.price_duration (index: hours, one column per zone).
+    """
+    dpi = plot_settings.get("dpi", 150)
+    fig_size = plot_settings.get("fig_size", [12, 6])
+    hours = duration.index.to_numpy()
+    return [line_job(
+        os.path.join(save_path, f'{sim_id}_Price_Duration'),
+        [{"x": hours, "y": duration[zone].to_numpy(), "label": f'Zone {zone}'} for zone in duration.columns],
+        fig_size,
+        dpi,
+        title=plot_settings.get("title_price_duration", "Price Duration Curve by Zone"),
+        xlabel="Hours per year at or above price",
+        ylabel=plot_settings.get("y_label_price", "Price ($/MWh)"),
+        legend={},
+    )]
 
-        
 
 ##########################################
-# CAPACITY PLOT FUNCTIONS
+        # SCENARIO COMPARISON PLOTS #
 ##########################################
 
+def comparison_plot_jobs(cube, plot_settings, save_path, sim_id, baseline):
+    """
+    Build side-by-side plots of all scenarios from a scenario_cube.ScenarioCube:
+    - total emissions over time, one line per scenario
+    - annual emissions by zone, capacity by technology, system cost
+      components and average price by zone, one bar per scenario
+    - capacity change by technology relative to the baseline scenario
 
-def capacity_plot(capacity_csv, sim_settings, plot_settings, save_path, sim_id):
-
-    df = capacity_csv[['Resource', 'Zone', 'EndCap']].copy()
-    df['EndCap'] = pd.to_numeric(df['EndCap'], errors='coerce').fillna(0.0)
-    df = df.sort_values('EndCap', ascending=True)
-
-    one_zone = plot_settings["all zones"]
-    multiple_zones = plot_settings["zones_specific"]
-
-    if one_zone == 1:
-        for zone in df['Zone'].unique():
-            zone_df = df[df['Zone'] == zone]
-            plt.figure(figsize=(10, max(4, len(zone_df) * 0.15)))
-            plt.barh(zone_df['Resource'], zone_df['EndCap'], color='tab:blue')
-            plt.xlabel('EndCap')
-            plt.title(f'Capacity by Resource in Zone {zone}')
-            plt.tight_layout()
-            filename = os.path.join(save_path, f'{sim_id}_Capacity_by_Resource_Zone_{zone}.png')
-            plt.savefig(filename, dpi=150)
-            plt.close()
-            print(f"Saved: {filename}")
-
-            filename= os.path.join(save_path, f'{sim_id}_Capacity_by_Zone')
-            plt.savefig(filename, dpi = dpi)
-            plt.close()
-            print(f"Saved: {filename}")
-
-    else:
-        for zone in len(multiple_zones):
-            which_zone = multiple_zones[zone]
-            zone_df = df[df['Zone'] == which_zone]
-            plt.figure(figsize=(10, max(4, len(zone_df) * 0.15)))
-            plt.barh(zone_df['Resource'], zone_df['EndCap'], color='tab:blue')
-            plt.xlabel('EndCap')
-            plt.title(f'Capacity by Resource in Zone {zone}')
-            plt.tight_layout()
-            filename = os.path.join(save_path, f'{sim_id}_Capacity_by_Resource_Zone_{zone}.png')
-            plt.savefig(filename, dpi=150)
-            plt.close()
-            print(f"Saved: {filename}")
-
-            
\ No newline at end of file
+    plot_settings: comparison.json (fig_size, dpi, decimation).
+    """
+    fig_size = plot_settings.get("fig_size", [12, 6])
+    dpi = plot_settings.get("dpi", 150)
+    decimation = plot_settings.get("decimation")
+    scenarios = cube.scenarios
+    others = [scen for scen in scenarios if scen != baseline]
+
+    jobs = []
+
+    # Emissions over time: each scenario is decimated with its own time weights
+    emissions = cube.emissions
+    total = emissions.sum("zone").values
+    weights = cube.time_weights(emissions.coords["time"])
+    x_ticks, x_labels = time_axis(pd.Index(emissions.coords["time"]))
+    series = []
+    for i, scen in enumerate(scenarios):
+        series += decimate_series([{"y": total[i], "label": scen}], decimation, weights[i])
+    jobs.append(line_job(
+        os.path.join(save_path, f"{sim_id}_Compare_Emissions_Total"),
+        series,
+        fig_size,
+        dpi,
+        title=plot_settings.get("title_emissions", "Total Emissions by Scenario"),
+        xlabel="Time",
+        ylabel=plot_settings.get("y_label_emissions", "Emissions"),
+        x_ticks=x_ticks,
+        x_labels=x_labels,
+        legend={},
+    ))
+
+    def grouped(name, table, title, xlabel, columns):
+        table = table.sort_values(columns[0]) if len(table) else table
+        jobs.append(grouped_barh_job(
+            os.path.join(save_path, f"{sim_id}_{name}"),
+            table.index,
+            {col: table[col].to_numpy() for col in columns},
+            (fig_size[0], max(4, len(table) * 0.3 * max(1, len(columns) / 2))),
+            dpi,
+            title=title,
+            xlabel=xlabel,
+        ))
+
+    emissions_table = cube.emissions_delta(baseline).drop(index="Total")
+    grouped("Compare_Emissions_by_Zone", emissions_table, "Annual Emissions by Zone", "Emissions", scenarios)
+
+    capacity_table = cube.capacity_delta(baseline)
+    grouped("Compare_Capacity_by_Tech", capacity_table, "Capacity by Technology", "EndCap (MW)", scenarios)
+    if others:
+        delta_cols = [f"{scen} - {baseline}" for scen in others]
+        changed = capacity_table[(capacity_table[delta_cols] != 0).any(axis=1)]
+        grouped("Compare_Capacity_Change_by_Tech", changed,
+                f"Capacity Change vs. {baseline} by Technology", "EndCap change (MW)", delta_cols)
+
+    grouped("Compare_Costs", cube.cost_delta(baseline), "System Cost Components", "Cost ($)", scenarios)
+
+    # Time-weighted average price per zone
+    prices = cube.prices
+    price_weights = cube.time_weights(prices.coords["time"])[:, None, :]
+    valid = ~np.isnan(np.asarray(prices.values))
+    avg_price = prices.sum("time", weights=price_weights).values / np.sum(price_weights * valid, axis=2)
+    price_table = pd.DataFrame(avg_price.T, index=prices.coords["zone"], columns=scenarios)
+    grouped("Compare_Prices_by_Zone", price_table, "Average Price by Zone", "Price ($/MWh)", scenarios)
+
+    return jobs
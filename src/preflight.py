@@ -0,0 +1,553 @@
+import argparse
+import hashlib
+import json
+import os
+import re
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from aggregation import build_resource_index
+from run_cache import hash_case_inputs, hash_file_into
+from sweep import read_settings_yml
+
+
+# Checked case reports under the output root, keyed by input hash
+PREFLIGHT_DIR_NAME = ".preflight"
+
+# Bumped whenever the checks change, so older cached reports are redone
+PREFLIGHT_VERSION = 1
+
+# Time series GenX reads (from TDR_results/ instead of system/ when
+# time-domain reduction is on and the case already has them)
+DEMAND_FILE = "Demand_data.csv"
+FUELS_FILE = "Fuels_data.csv"
+VARIABILITY_FILE = "Generators_variability.csv"
+NETWORK_FILE = "Network.csv"
+
+DEMAND_COLUMN_RE = re.compile(r"^(?:Demand|Load)_MW_z(\d+)$")
+ZONE_LABEL_RE = re.compile(r"^z(\d+)$")
+
+# Resource columns that must be numbers in every row
+RESOURCE_NUMERIC_COLUMNS = ["Zone", "Existing_Cap_MW", "New_Build", "Can_Retire"]
+
+# Fuel names meaning "no fuel"
+NO_FUEL = {"", "none", "None", "nan"}
+
+# Issues listed per check before "... and N more"
+MAX_LISTED = 5
+
+
+##########################################
+          # FILE FACTS #
+##########################################
+
+# Each input file is reduced to a small JSON-able dict of facts in one
+# vectorized pass; the cross-file checks only look at those. Facts are
+# memoized per file (by real path, size and mtime), so inputs shared by
+# many cases of a sweep (symlinked to the base case) are read once.
+
+def _nan_columns(df, columns):
+    """{column: NaN count} for the columns that have any."""
+    counts = df[columns].isna().sum()
+    return {str(col): int(n) for col, n in counts[counts > 0].items()}
+
+
+def _numeric(df, columns):
+    return df[columns].apply(pd.to_numeric, errors="coerce")
+
+
+def demand_facts(path):
+    df = pd.read_csv(path)
+    zone_columns = [c for c in df.columns if DEMAND_COLUMN_RE.match(c)]
+    zones = [int(DEMAND_COLUMN_RE.match(c).group(1)) for c in zone_columns]
+    n_rows = int(df["Time_Index"].notna().sum()) if "Time_Index" in df.columns else len(df)
+    values = _numeric(df.iloc[:n_rows], zone_columns)
+
+    def first(column, default):
+        if column not in df.columns or df[column].isna().all():
+            return default
+        return int(df[column].dropna().iloc[0])
+
+    rep_periods = first("Rep_Periods", 1)
+    timesteps_per_period = first("Timesteps_per_Rep_Period", n_rows)
+    # Hours each timestep stands for: Sub_Weights per representative period
+    weights = np.ones(n_rows)
+    if rep_periods > 1 and "Sub_Weights" in df.columns:
+        sub_weights = pd.to_numeric(df["Sub_Weights"], errors="coerce").dropna().to_numpy()[:rep_periods]
+        if len(sub_weights) == rep_periods:
+            weights = np.repeat(sub_weights / timesteps_per_period, timesteps_per_period)[:n_rows]
+
+    array = values.to_numpy(dtype=float)
+    return {
+        "zones": zones,
+        "timesteps": n_rows,
+        "expected_timesteps": rep_periods * timesteps_per_period,
+        "rep_periods": rep_periods,
+        "nan": _nan_columns(values, zone_columns),
+        "negative": int((array < 0).sum()),
+        "peak_mw": np.nanmax(array, axis=0).tolist() if n_rows else [],
+        "annual_mwh": np.nansum(array * weights[:len(array), None], axis=0).tolist(),
+    }
+
+
+def fuels_facts(path):
+    df = pd.read_csv(path)
+    fuels = [c for c in df.columns if c != "Time_Index"]
+    # First row: CO2 content per MMBtu; then one price row per timestep
+    prices = _numeric(df.iloc[1:], fuels)
+    return {
+        "fuels": fuels,
+        "timesteps": len(prices),
+        "nan": _nan_columns(prices, fuels),
+        "mean_price": {fuel: (None if np.isnan(v) else float(v)) for fuel, v in prices.mean().items()},
+    }
+
+
+def variability_facts(path):
+    df = pd.read_csv(path)
+    resources = [c for c in df.columns if c != "Time_Index"]
+    values = _numeric(df, resources)
+    array = values.to_numpy(dtype=float)
+    with np.errstate(invalid="ignore"):
+        outside = ((array < 0) | (array > 1.0001)).sum(axis=0)
+    return {
+        "resources": resources,
+        "timesteps": len(df),
+        "nan": _nan_columns(values, resources),
+        "out_of_range": {r: int(n) for r, n in zip(resources, outside) if n},
+    }
+
+
+def network_facts(path):
+    df = pd.read_csv(path)
+    zone_labels = df["Network_zones"].dropna().astype(str).tolist() if "Network_zones" in df.columns else []
+    zone_columns = [c for c in df.columns if ZONE_LABEL_RE.match(c)]
+    lines = df.dropna(subset=["Network_Lines"]) if "Network_Lines" in df.columns else df.iloc[0:0]
+    limit_columns = [c for c in ("Line_Max_Flow_MW", "Line_Min_Flow_MW") if c in df.columns]
+    return {
+        "zones": [int(ZONE_LABEL_RE.match(z).group(1)) for z in zone_labels if ZONE_LABEL_RE.match(z)],
+        "zone_columns": [int(ZONE_LABEL_RE.match(c).group(1)) for c in zone_columns],
+        "lines": len(lines),
+        "nan": _nan_columns(lines, limit_columns),
+        # Each line's row of the incidence matrix must have one +1 and one -1
+        "bad_lines": [
+            int(line) for line, row in zip(lines["Network_Lines"], _numeric(lines, zone_columns).to_numpy())
+            if not ((row == 1).sum() == 1 and (row == -1).sum() == 1)
+        ] if zone_columns and len(lines) else [],
+    }
+
+
+def resource_facts(path):
+    """Facts of one resources/*.csv table (None for files that are not one)."""
+    df = pd.read_csv(path)
+    if "Resource" not in df.columns or "Zone" not in df.columns:
+        return None
+    numeric_columns = [c for c in RESOURCE_NUMERIC_COLUMNS if c in df.columns]
+    numeric = _numeric(df, numeric_columns)
+    return {
+        "resources": df["Resource"].astype(str).tolist(),
+        "zones": [None if np.isnan(z) else int(z) for z in numeric["Zone"]],
+        "existing_mw": numeric["Existing_Cap_MW"].fillna(0.0).tolist() if "Existing_Cap_MW" in numeric else None,
+        "fuels": df["Fuel"].astype(str).tolist() if "Fuel" in df.columns else None,
+        "nan": _nan_columns(numeric, numeric_columns),
+    }
+
+
+def policy_facts(path):
+    """
+    Targets of one policies/*.csv: zone-indexed files give {column: {zone:
+    value}} for every non-zero numeric column; other tables their rows.
+    """
+    df = pd.read_csv(path)
+    if "Network_zones" in df.columns:
+        zone_labels = df["Network_zones"].astype(str)
+        zones = [int(ZONE_LABEL_RE.match(z).group(1)) if ZONE_LABEL_RE.match(z) else None for z in zone_labels]
+        numeric = df.drop(columns=["Network_zones", "Region_description"], errors="ignore")
+        numeric = numeric.apply(pd.to_numeric, errors="coerce")
+        targets = {
+            str(col): {
+                str(z): float(v)
+                for z, v in zip(zones, numeric[col])
+                if z is not None and v != 0 and not np.isnan(v)
+            }
+            for col in numeric.columns
+        }
+        return {
+            "zones": [z for z in zones if z is not None],
+            "bad_zones": zone_labels[[z is None for z in zones]].tolist(),
+            "targets": {col: t for col, t in targets.items() if t},
+            "nan": _nan_columns(numeric, list(numeric.columns)),
+        }
+    return {"zones": [], "bad_zones": [], "rows": json.loads(df.to_json(orient="records")), "nan": {}}
+
+
+FACT_READERS = {
+    "demand": demand_facts,
+    "fuels": fuels_facts,
+    "variability": variability_facts,
+    "network": network_facts,
+    "resource": resource_facts,
+    "policy": policy_facts,
+}
+
+
+##########################################
+            # CASE CHECKS #
+##########################################
+
+def _listed(items):
+    items = list(items)
+    text = ", ".join(str(i) for i in items[:MAX_LISTED])
+    return text + (f" and {len(items) - MAX_LISTED} more" if len(items) > MAX_LISTED else "")
+
+
+class Preflight:
+    """
+    Validates and summarizes GenX cases before any Julia process starts.
+    Reports are cached under output/.preflight by input hash; within one
+    Preflight, each distinct input file is parsed once.
+    """
+
+    def __init__(self, output_root=None):
+        self.cache_dir = Path(output_root) / PREFLIGHT_DIR_NAME if output_root is not None else None
+        self._facts = {}
+        self.files_read = 0
+
+    def facts(self, kind, path):
+        path = Path(path)
+        stat = path.stat()
+        key = (kind, os.path.realpath(path), stat.st_size, stat.st_mtime_ns)
+        if key not in self._facts:
+            self._facts[key] = FACT_READERS[kind](path)
+            self.files_read += 1
+        return self._facts[key]
+
+    def _time_series_path(self, case_dir, name, tdr):
+        tdr_path = case_dir / "TDR_results" / name
+        if tdr and tdr_path.exists():
+            return tdr_path
+        return case_dir / "system" / name
+
+    def check_case(self, case_dir):
+        """
+        Summary and issues of one case: {"summary": {...}, "issues":
+        [{"level": "error" | "warning", "message": ...}]}.
+        """
+        case_dir = Path(case_dir)
+        issues = []
+
+        def issue(level, message):
+            issues.append({"level": level, "message": message})
+
+        genx_settings = read_settings_yml(case_dir / "settings" / "genx_settings.yml")
+        tdr = genx_settings.get("TimeDomainReduction", "0") == "1"
+
+        paths = {
+            "demand": self._time_series_path(case_dir, DEMAND_FILE, tdr),
+            "fuels": self._time_series_path(case_dir, FUELS_FILE, tdr),
+            "variability": self._time_series_path(case_dir, VARIABILITY_FILE, tdr),
+            "network": case_dir / "system" / NETWORK_FILE,
+        }
+
+        def read(kind, path):
+            try:
+                return self.facts(kind, path)
+            except (ValueError, KeyError, pd.errors.ParserError) as e:
+                issue("error", f"{path.relative_to(case_dir)} could not be read: {e}")
+                return None
+
+        facts = {}
+        for kind, path in paths.items():
+            if path.exists():
+                table = read(kind, path)
+                if table is not None:
+                    facts[kind] = table
+
+        resources = {}
+        for path in sorted((case_dir / "resources").glob("*.csv")):
+            table = read("resource", path)
+            if table is not None:
+                resources[path.name] = table
+        policies = {}
+        for path in sorted((case_dir / "policies").glob("*.csv")):
+            table = read("policy", path)
+            if table is not None:
+                policies[path.name] = table
+
+        # --- required files ---
+        for kind in ("demand", "fuels"):
+            if kind not in facts and not any(i["message"].startswith(str(paths[kind].relative_to(case_dir)))
+                                             for i in issues):
+                issue("error", f"Missing {paths[kind].relative_to(case_dir)}")
+        if not resources:
+            issue("error", "No resource tables in resources/")
+        if resources and "variability" not in facts:
+            issue("error", f"Missing {paths['variability'].relative_to(case_dir)}")
+
+        demand = facts.get("demand")
+        zones = demand["zones"] if demand else []
+        zone_set = set(zones)
+        if demand is not None and zones != list(range(1, len(zones) + 1)):
+            issue("error", f"{DEMAND_FILE}: demand zones are not numbered 1..{len(zones)} (found {_listed(zones)})")
+
+        # --- network ---
+        network = facts.get("network")
+        if network is None and len(zones) > 1:
+            issue("error", f"Missing system/{NETWORK_FILE} for a case with {len(zones)} zones")
+        if network is not None:
+            if set(network["zones"]) != zone_set:
+                issue("error", f"{NETWORK_FILE}: Network_zones {_listed(network['zones'])} do not match the "
+                               f"{len(zones)} demand zones")
+            if network["zone_columns"] and set(network["zone_columns"]) != zone_set:
+                issue("error", f"{NETWORK_FILE}: zone columns z{min(network['zone_columns'])}.."
+                               f"z{max(network['zone_columns'])} do not match the {len(zones)} demand zones")
+            if network["bad_lines"]:
+                issue("error", f"{NETWORK_FILE}: lines {_listed(network['bad_lines'])} do not connect exactly "
+                               f"two zones (+1 / -1)")
+            for column, n in network["nan"].items():
+                issue("error", f"{NETWORK_FILE}: {n} empty {column} value(s)")
+
+        # --- time series ---
+        if demand is not None:
+            if demand["timesteps"] != demand["expected_timesteps"]:
+                issue("error", f"{DEMAND_FILE}: {demand['timesteps']} timesteps, but Rep_Periods x "
+                               f"Timesteps_per_Rep_Period = {demand['expected_timesteps']}")
+            for column, n in demand["nan"].items():
+                issue("error", f"{DEMAND_FILE}: {n} empty value(s) in {column}")
+            if demand["negative"]:
+                issue("warning", f"{DEMAND_FILE}: {demand['negative']} negative demand value(s)")
+            if tdr and demand["rep_periods"] > 1 and paths["demand"].parent.name == "system":
+                issue("warning", "TimeDomainReduction = 1, but system/Demand_data.csv is already reduced "
+                                 f"({demand['rep_periods']} representative periods)")
+            n_timesteps = demand["timesteps"]
+            for kind, name in (("fuels", FUELS_FILE), ("variability", VARIABILITY_FILE)):
+                if kind in facts and facts[kind]["timesteps"] != n_timesteps:
+                    issue("error", f"{name}: {facts[kind]['timesteps']} timesteps, but {DEMAND_FILE} has "
+                                   f"{n_timesteps}")
+        for kind, name in (("fuels", FUELS_FILE), ("variability", VARIABILITY_FILE)):
+            if kind in facts:
+                nan = facts[kind]["nan"]
+                if nan:
+                    issue("error", f"{name}: empty values in {len(nan)} column(s): {_listed(nan)}")
+        if "variability" in facts and facts["variability"]["out_of_range"]:
+            bad = facts["variability"]["out_of_range"]
+            issue("warning", f"{VARIABILITY_FILE}: capacity factors outside 0..1 for {_listed(bad)}")
+
+        # --- resources ---
+        all_resources = [r for table in resources.values() for r in table["resources"]]
+        names = pd.Series(all_resources)
+        duplicates = names[names.duplicated()].unique().tolist()
+        if duplicates:
+            issue("error", f"Duplicate resource names: {_listed(duplicates)}")
+        fuels = set(facts["fuels"]["fuels"]) if "fuels" in facts else None
+        for file_name, table in resources.items():
+            bad_zones = sorted({r for r, z in zip(table["resources"], table["zones"]) if z not in zone_set})
+            if zones and bad_zones:
+                issue("error", f"resources/{file_name}: zone not among the demand zones for {_listed(bad_zones)}")
+            for column, n in table["nan"].items():
+                issue("error", f"resources/{file_name}: {n} empty {column} value(s)")
+            if table["fuels"] is not None and fuels is not None:
+                unknown = sorted({f for f in table["fuels"] if f not in NO_FUEL and f not in fuels})
+                if unknown:
+                    issue("error", f"resources/{file_name}: fuels missing from {FUELS_FILE}: {_listed(unknown)}")
+        if "variability" in facts and all_resources:
+            missing = sorted(set(all_resources) - set(facts["variability"]["resources"]))
+            if missing:
+                issue("error", f"{VARIABILITY_FILE}: no column for {len(missing)} resource(s): {_listed(missing)}")
+
+        # --- policies ---
+        for file_name, policy in policies.items():
+            if policy["bad_zones"]:
+                issue("error", f"policies/{file_name}: unknown zone label(s) {_listed(policy['bad_zones'])}")
+            outside = sorted(set(policy["zones"]) - zone_set)
+            if zones and outside:
+                issue("error", f"policies/{file_name}: zones {_listed(outside)} are not among the demand zones")
+            for column, n in policy["nan"].items():
+                issue("warning", f"policies/{file_name}: {n} empty {column} value(s)")
+
+        summary = self._summary(demand, resources, policies, facts, tdr)
+        return {"summary": summary, "issues": issues}
+
+    @staticmethod
+    def _summary(demand, resources, policies, facts, tdr):
+        summary = {
+            "zones": len(demand["zones"]) if demand else 0,
+            "timesteps": demand["timesteps"] if demand else 0,
+            "time_domain_reduction": tdr,
+            "demand": [
+                {"zone": z, "peak_mw": p, "annual_mwh": a}
+                for z, p, a in zip(demand["zones"], demand["peak_mw"], demand["annual_mwh"])
+            ] if demand else [],
+            "lines": facts["network"]["lines"] if "network" in facts else 0,
+            "fuel_prices": facts["fuels"]["mean_price"] if "fuels" in facts else {},
+            "policies": {name: policy.get("targets", policy.get("rows")) for name, policy in policies.items()},
+        }
+
+        # Resources by zone and technology, names parsed as everywhere else
+        rows = []
+        for table in resources.values():
+            existing = table["existing_mw"] or [0.0] * len(table["resources"])
+            rows += zip(table["resources"], table["zones"], existing)
+        if rows:
+            frame = pd.DataFrame(rows, columns=["resource", "zone_id", "existing_mw"]).dropna(subset=["zone_id"])
+            index = build_resource_index(frame["resource"], frame["zone_id"].to_numpy())
+            frame["zone"] = index.get_level_values("zone").astype(str)
+            frame["tech"] = index.get_level_values("tech").astype(str)
+            grouped = frame.groupby(["zone", "tech"], sort=True).agg(
+                resources=("resource", "size"), existing_mw=("existing_mw", "sum"),
+            ).reset_index()
+            summary["resources"] = grouped.to_dict(orient="records")
+        else:
+            summary["resources"] = []
+        summary["n_resources"] = sum(r["resources"] for r in summary["resources"])
+        return summary
+
+    # ----- cached runs over many cases -----
+
+    def run(self, cases, input_hashes=None):
+        """
+        Check every (scenario, case_dir); reports of inputs checked before
+        (same input hash) come from the cache. Returns {scenario: report},
+        each with "input_hash" and "cached".
+        """
+        input_hashes = input_hashes or {}
+        reports = {}
+        for scen, case_dir in cases:
+            input_hash = self.report_key(case_dir, input_hashes.get(scen))
+            report = self._load(input_hash)
+            cached = report is not None
+            if report is None:
+                report = self.check_case(case_dir)
+                self._store(input_hash, report)
+            reports[scen] = {**report, "input_hash": input_hash, "cached": cached}
+        return reports
+
+    @staticmethod
+    def report_key(case_dir, input_hash=None):
+        """
+        Key of a case's cached report: its input hash (pass it if already
+        computed), plus the TDR_results/ time series the checks may read
+        instead of system/.
+        """
+        case_dir = Path(case_dir)
+        input_hash = input_hash or hash_case_inputs(case_dir)
+        tdr_files = [case_dir / "TDR_results" / name for name in (DEMAND_FILE, FUELS_FILE, VARIABILITY_FILE)]
+        tdr_files = [path for path in tdr_files if path.is_file()]
+        if not tdr_files:
+            return input_hash
+        h = hashlib.sha256(input_hash.encode())
+        for path in tdr_files:
+            h.update(path.name.encode())
+            hash_file_into(h, path)
+        return h.hexdigest()
+
+    def _cache_path(self, input_hash):
+        return self.cache_dir / f"{input_hash}.json" if self.cache_dir is not None else None
+
+    def _load(self, input_hash):
+        path = self._cache_path(input_hash)
+        if path is None or not path.exists():
+            return None
+        try:
+            with path.open("r") as f:
+                report = json.load(f)
+        except (OSError, json.JSONDecodeError):
+            return None
+        return report if report.get("version") == PREFLIGHT_VERSION else None
+
+    def _store(self, input_hash, report):
+        path = self._cache_path(input_hash)
+        if path is None:
+            return
+        os.makedirs(path.parent, exist_ok=True)
+        tmp_path = path.with_suffix(f".{os.getpid()}.tmp")
+        with tmp_path.open("w") as f:
+            json.dump({**report, "version": PREFLIGHT_VERSION}, f)
+        os.replace(tmp_path, path)
+
+
+##########################################
+            # REPORTING #
+##########################################
+
+def count_issues(reports, level):
+    return sum(1 for report in reports.values() for i in report["issues"] if i["level"] == level)
+
+
+def print_reports(reports):
+    for scen, report in reports.items():
+        summary = report["summary"]
+        peak = sum(d["peak_mw"] for d in summary["demand"])
+        errors = [i for i in report["issues"] if i["level"] == "error"]
+        warnings = [i for i in report["issues"] if i["level"] == "warning"]
+        print(f"[{scen}] Preflight{' (cached)' if report['cached'] else ''}: {summary['zones']} zone(s), "
+              f"{summary['timesteps']} timesteps, {summary['n_resources']} resources, {summary['lines']} lines, "
+              f"sum of zonal peaks {peak:,.0f} MW; {len(errors)} error(s), {len(warnings)} warning(s)")
+        for i in errors + warnings:
+            print(f"[{scen}]   {i['level'].upper()}: {i['message']}")
+
+
+def write_reports(reports, out_dir: Path):
+    """
+    Write the preflight summaries of all scenarios to out_dir: demand by
+    zone, resources by zone and technology, and every issue, as CSVs, plus
+    the full reports as preflight.json.
+    """
+    out_dir = Path(out_dir)
+    os.makedirs(out_dir, exist_ok=True)
+    demand, resources, issues = [], [], []
+    for scen, report in reports.items():
+        demand += [{"scenario": scen, **row} for row in report["summary"]["demand"]]
+        resources += [{"scenario": scen, **row} for row in report["summary"]["resources"]]
+        issues += [{"scenario": scen, **i} for i in report["issues"]]
+    pd.DataFrame(demand, columns=["scenario", "zone", "peak_mw", "annual_mwh"]).to_csv(
+        out_dir / "demand_by_zone.csv", index=False)
+    pd.DataFrame(resources, columns=["scenario", "zone", "tech", "resources", "existing_mw"]).to_csv(
+        out_dir / "resources_by_zone_tech.csv", index=False)
+    pd.DataFrame(issues, columns=["scenario", "level", "message"]).to_csv(out_dir / "issues.csv", index=False)
+    with (out_dir / "preflight.json").open("w") as f:
+        json.dump(reports, f, indent=2)
+
+
+def preflight_cases(cases, output_root, input_hashes=None, out_dir=None):
+    """
+    Check and summarize the given (scenario, case_dir) pairs, print the
+    results and optionally write them to out_dir. Returns the reports.
+    """
+    t0 = time.perf_counter()
+    preflight = Preflight(output_root)
+    reports = preflight.run(cases, input_hashes)
+    print_reports(reports)
+    n_cached = sum(1 for report in reports.values() if report["cached"])
+    print(f"Preflight: {len(reports)} case(s) checked in {time.perf_counter() - t0:.2f} s "
+          f"({n_cached} from cache, {preflight.files_read} input file(s) read)")
+    if out_dir is not None:
+        write_reports(reports, out_dir)
+    return reports
+
+
+if __name__ == "__main__":
+    # Check GenX cases without running anything:
+    #   python src/preflight.py                  (the scenarios in simulation_settings.json)
+    #   python src/preflight.py path/to/case ...
+    parser = argparse.ArgumentParser(description="Validate and summarize GenX input cases.")
+    parser.add_argument("cases", nargs="*", type=Path, help="GenX case folders (default: the configured scenarios).")
+    parser.add_argument("--no-cache", action="store_true", help="Check every case again.")
+    args = parser.parse_args()
+
+    project_root = Path(__file__).resolve().parents[1]
+    with (project_root / "input" / "simulation_settings.json").open("r") as f:
+        settings = json.load(f)
+    if args.cases:
+        cases = [(case.name, case) for case in args.cases]
+    else:
+        inputs_dir = project_root / settings["genx"]["genx_inputs_dir"]
+        cases = [(scen, inputs_dir / scen) for scen in settings["genx"]["scenarios"]]
+    output_root = None if args.no_cache else project_root / settings.get("save_path", "output")
+
+    reports = preflight_cases(cases, output_root)
+    sys.exit(1 if count_issues(reports, "error") else 0)
@@ -0,0 +1,206 @@
+import csv
+import datetime
+import json
+import os
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+
+try:
+    import resource
+except ImportError:  # Windows: no getrusage, peak RSS is not reported
+    resource = None
+
+
+##########################################
+          # MEMORY #
+##########################################
+
+def peak_rss_mb(children=False):
+    """
+    Peak resident set size of this process (or of its finished child
+    processes, e.g. Julia) in MB, or None where getrusage is unavailable.
+    """
+    if resource is None:
+        return None
+    who = resource.RUSAGE_CHILDREN if children else resource.RUSAGE_SELF
+    peak = resource.getrusage(who).ru_maxrss
+    # ru_maxrss is in bytes on macOS, in KB on Linux
+    return peak / 1e6 if sys.platform == "darwin" else peak / 1e3
+
+
+##########################################
+          # TIMING SPANS #
+##########################################
+
+class Profiler:
+    """
+    Collects nested timing spans and counters.
+
+    Spans are plain dicts (name, start as a Unix timestamp, seconds, pid,
+    tid, parent, attrs), so a worker process can return profiler.spans with
+    its results and the main process merges them (see merge).
+
+        with profiler.span("harvest", scenario="s1") as attrs:
+            stats = harvest_scenario(...)
+            attrs["bytes_copied"] = stats["bytes_copied"]
+    """
+
+    def __init__(self, enabled=True):
+        self.enabled = enabled
+        self.spans = []
+        self.counters = {}
+        self._local = threading.local()
+        self._lock = threading.Lock()
+
+    def _stack(self):
+        if not hasattr(self._local, "stack"):
+            self._local.stack = []
+        return self._local.stack
+
+    @contextmanager
+    def span(self, name, **attrs):
+        """
+        Time the enclosed block. Yields the span's attrs dict so the block
+        can attach results (bytes copied, figures, ...). The peak RSS of this
+        process when the span ends is recorded as attrs["peak_rss_mb"].
+        """
+        if not self.enabled:
+            yield attrs
+            return
+
+        stack = self._stack()
+        parent = stack[-1] if stack else None
+        stack.append(name)
+        start = time.time()
+        t0 = time.perf_counter()
+        try:
+            yield attrs
+        finally:
+            stack.pop()
+            attrs["peak_rss_mb"] = peak_rss_mb()
+            self.add_span(name, start, time.perf_counter() - t0, parent=parent, **attrs)
+
+    def add_span(self, name, start, seconds, parent=None, pid=None, tid=None, **attrs):
+        """
+        Record a span measured elsewhere (a GenX solve, a figure rendered in
+        a render worker, ...).
+        """
+        if not self.enabled:
+            return
+        with self._lock:
+            self.spans.append({
+                "name": name,
+                "start": start,
+                "seconds": seconds,
+                "pid": os.getpid() if pid is None else pid,
+                "tid": threading.get_ident() if tid is None else tid,
+                "parent": parent,
+                "attrs": attrs,
+            })
+
+    def count(self, name, value=1):
+        """Add value to a run-wide counter (bytes_copied, figures_rendered, ...)."""
+        if not self.enabled:
+            return
+        with self._lock:
+            self.counters[name] = self.counters.get(name, 0) + value
+
+    def merge(self, spans=None, counters=None):
+        """Add spans/counters collected by another process."""
+        if not self.enabled:
+            return
+        with self._lock:
+            self.spans.extend(spans or [])
+            for name, value in (counters or {}).items():
+                self.counters[name] = self.counters.get(name, 0) + value
+
+
+##########################################
+        # GENX RUN INFORMATION #
+##########################################
+
+def read_system_summary(results_dir):
+    """
+    Hardware/software info GenX writes to results/system_summary.yml
+    (CPU_NAME, CPU_THREADS, JULIA_VERSION, GENX_VERSION, ...), as a dict.
+    The file is flat "KEY: value" lines, so no YAML parser is needed.
+    """
+    path = Path(results_dir) / "system_summary.yml"
+    if not path.exists():
+        return None
+    summary = {}
+    with path.open("r") as f:
+        for line in f:
+            key, sep, value = line.partition(":")
+            if sep:
+                summary[key.strip()] = value.strip().strip('"')
+    return summary
+
+
+def read_solver_status(results_dir):
+    """
+    Solver status, solve wall time (s) and objective from results/status.csv.
+    """
+    path = Path(results_dir) / "status.csv"
+    if not path.exists():
+        return None
+    with path.open("r", newline="") as f:
+        row = next(csv.DictReader(f), None)
+    if row is None:
+        return None
+    status = {"status": row.get("Status")}
+    for key, column in (("solve_seconds", "Solve"), ("objective", "Objval")):
+        try:
+            status[key] = float(row.get(column))
+        except (TypeError, ValueError):
+            status[key] = None
+    return status
+
+
+##########################################
+            # OUTPUT FILES #
+##########################################
+
+def write_profile(path, profiler, scenarios=None):
+    """
+    Write profile.json: every span, the counters, peak RSS of this process
+    and of its finished children (worker pools, Julia), and per-scenario
+    GenX info (solver status/time, system_summary.yml).
+    """
+    profile = {
+        "created": datetime.datetime.now().isoformat(timespec="seconds"),
+        "peak_rss_mb": {"main": peak_rss_mb(), "children": peak_rss_mb(children=True)},
+        "counters": profiler.counters,
+        "scenarios": scenarios or {},
+        "spans": sorted(profiler.spans, key=lambda s: s["start"]),
+    }
+    with Path(path).open("w") as f:
+        json.dump(profile, f, indent=2, default=str)
+    print(f"Profile written to {path}")
+
+
+def write_chrome_trace(path, profiler):
+    """
+    Write the spans in Chrome trace event format (open in chrome://tracing
+    or https://ui.perfetto.dev).
+    """
+    spans = profiler.spans
+    t0 = min((s["start"] for s in spans), default=0.0)
+    events = [
+        {
+            "name": s["name"],
+            "ph": "X",
+            "ts": (s["start"] - t0) * 1e6,
+            "dur": s["seconds"] * 1e6,
+            "pid": s["pid"],
+            "tid": s["tid"],
+            "args": s["attrs"],
+        }
+        for s in spans
+    ]
+    with Path(path).open("w") as f:
+        json.dump({"traceEvents": events, "displayTimeUnit": "ms"}, f, default=str)
+    print(f"Chrome trace written to {path}")
@@ -0,0 +1,211 @@
+import io
+import multiprocessing
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+from matplotlib.figure import Figure
+
+
+##########################################
+            # PLOT JOBS #
+##########################################
+
+def line_job(filename, series, fig_size, dpi, title="", xlabel="", ylabel="",
+             x_ticks=None, x_labels=None, legend=None, bbox_inches=None):
+    """
+    Describe a line plot as plain, picklable data.
+
+    series: list of dicts with keys "y" (1-D array) and optional "x",
+            "label", "color".
+    legend: None for no legend, or a dict of Axes.legend kwargs.
+    """
+    return {
+        "kind": "line",
+        "filename": str(filename),
+        "series": [
+            {**s, "y": np.asarray(s["y"]), "x": None if s.get("x") is None else np.asarray(s["x"])}
+            for s in series
+        ],
+        "fig_size": list(fig_size),
+        "dpi": dpi,
+        "title": title,
+        "xlabel": xlabel,
+        "ylabel": ylabel,
+        "x_ticks": None if x_ticks is None else list(x_ticks),
+        "x_labels": None if x_labels is None else [str(label) for label in x_labels],
+        "legend": legend,
+        "bbox_inches": bbox_inches,
+    }
+
+
+def barh_job(filename, labels, values, fig_size, dpi, title="", xlabel="", color="tab:blue"):
+    """
+    Describe a horizontal bar chart as plain, picklable data.
+    """
+    return {
+        "kind": "barh",
+        "filename": str(filename),
+        "labels": [str(label) for label in labels],
+        "values": np.asarray(values),
+        "fig_size": list(fig_size),
+        "dpi": dpi,
+        "title": title,
+        "xlabel": xlabel,
+        "color": color,
+    }
+
+
+def grouped_barh_job(filename, labels, groups, fig_size, dpi, title="", xlabel=""):
+    """
+    Describe a horizontal bar chart with one bar per group (e.g. scenario)
+    for every label, as plain, picklable data.
+
+    groups: dict of group name -> values (same length as labels).
+    """
+    return {
+        "kind": "grouped_barh",
+        "filename": str(filename),
+        "labels": [str(label) for label in labels],
+        "groups": {str(name): np.asarray(values) for name, values in groups.items()},
+        "fig_size": list(fig_size),
+        "dpi": dpi,
+        "title": title,
+        "xlabel": xlabel,
+    }
+
+
+##########################################
+            # RENDERING #
+##########################################
+
+def _draw_line(ax, job):
+    for s in job["series"]:
+        y = s["y"]
+        x = s["x"] if s.get("x") is not None else np.arange(len(y))
+        ax.plot(x, y, label=s.get("label"), color=s.get("color"))
+
+    if job["x_ticks"] is not None:
+        ax.set_xticks(job["x_ticks"])
+        ax.set_xticklabels(job["x_labels"], rotation=45)
+    if job["legend"] is not None:
+        ax.legend(**job["legend"])
+
+
+def _draw_barh(ax, job):
+    ax.barh(job["labels"], job["values"], color=job["color"])
+
+
+def _draw_grouped_barh(ax, job):
+    n_groups = max(1, len(job["groups"]))
+    height = 0.8 / n_groups
+    positions = np.arange(len(job["labels"]))
+    for i, (name, values) in enumerate(job["groups"].items()):
+        ax.barh(positions + (i - (n_groups - 1) / 2) * height, values, height=height, label=name)
+    ax.set_yticks(positions)
+    ax.set_yticklabels(job["labels"])
+    ax.legend(fontsize="small")
+
+
+def _save_job(job, target, **savefig_kwargs):
+    """
+    Draw one plot job with the object-oriented Agg API (no pyplot, no
+    global figure state) and save it to target (a path or a file object).
+    """
+    fig = Figure(figsize=job["fig_size"])
+    FigureCanvasAgg(fig)
+    ax = fig.add_subplot()
+    ax.set_title(job["title"])
+    ax.set_xlabel(job["xlabel"])
+    ax.grid(False)
+
+    if job["kind"] == "line":
+        ax.set_ylabel(job["ylabel"])
+        _draw_line(ax, job)
+        fig.savefig(target, dpi=job["dpi"], bbox_inches=job["bbox_inches"], **savefig_kwargs)
+    elif job["kind"] in ("barh", "grouped_barh"):
+        if job["kind"] == "barh":
+            _draw_barh(ax, job)
+        else:
+            _draw_grouped_barh(ax, job)
+        fig.tight_layout()
+        fig.savefig(target, dpi=job["dpi"], **savefig_kwargs)
+    else:
+        raise ValueError(f"Unknown plot job kind '{job['kind']}'")
+
+
+def render_job(job):
+    """
+    Render one plot job to its file. Returns {"filename", "seconds",
+    "start", "pid"} (start as a Unix timestamp, for profiling).
+    """
+    start = time.time()
+    t0 = time.perf_counter()
+    _save_job(job, job["filename"])
+    return {"filename": job["filename"], "seconds": time.perf_counter() - t0, "start": start, "pid": os.getpid()}
+
+
+def render_job_bytes(job, format="png"):
+    """Render one plot job in memory; returns the encoded image."""
+    buffer = io.BytesIO()
+    _save_job(job, buffer, format=format)
+    return buffer.getvalue()
+
+
+def render_jobs(jobs):
+    """
+    Render a list of plot jobs in this process, one after another.
+    Returns the list of {"filename", "seconds"} timings.
+    """
+    timings = []
+    for job in jobs:
+        timing = render_job(job)
+        print(f"Saved: {timing['filename']} ({timing['seconds']:.2f} s)")
+        timings.append(timing)
+    return timings
+
+
+class RenderQueue:
+    """
+    Process pool that renders plot jobs in parallel.
+    Workers use the "spawn" start method and only ever touch the Agg
+    Figure API, so they share no plotting state.
+    """
+
+    def __init__(self, max_workers):
+        self.pool = ProcessPoolExecutor(
+            max_workers=max(1, int(max_workers)),
+            mp_context=multiprocessing.get_context("spawn"),
+        )
+        self.futures = []
+
+    def submit(self, jobs, tag=None):
+        """
+        Queue jobs for rendering; tag (e.g. the scenario name) is returned
+        with each timing so results can be grouped later.
+        """
+        for job in jobs:
+            self.futures.append((tag, self.pool.submit(render_job, job)))
+
+    def collect(self):
+        """
+        Wait for every queued job and shut the pool down.
+        Returns a list of timings (dicts with filename, seconds, tag, and
+        error if the figure failed to render).
+        """
+        timings = []
+        try:
+            for tag, fut in self.futures:
+                try:
+                    timing = fut.result()
+                    print(f"Saved: {timing['filename']} ({timing['seconds']:.2f} s)")
+                except Exception as e:
+                    timing = {"filename": None, "seconds": None, "error": str(e)}
+                    print(f"Warning: failed to render a figure for {tag}: {e}")
+                timing["tag"] = tag
+                timings.append(timing)
+        finally:
+            self.pool.shutdown()
+        return timings
@@ -0,0 +1,339 @@
+import hashlib
+import json
+import os
+import re
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+try:
+    import pyarrow as pa
+    import pyarrow.feather as feather
+except ImportError:  # pyarrow is optional: without it we parse the CSV every time
+    pa = None
+    feather = None
+
+
+# Folder (inside each results/ directory) that holds the columnar copies
+CACHE_DIR_NAME = ".columnar"
+MANIFEST_NAME = "manifest.json"
+
+# GenX time-series rows are labelled t1, t2, ... ; anything above them
+# ("Zone", "AnnualSum", "Segment", ...) is a header row.
+TIMESTEP_RE = re.compile(r"^t\d+$")
+
+# How far down a file we look for the first timestep row before deciding
+# it is a plain table (capacity.csv, costs.csv, ...)
+MAX_HEADER_ROWS = 20
+
+# Timestep rows per chunk when streaming a result file (see iter_genx_csv)
+DEFAULT_CHUNK_ROWS = 2000
+
+_warned_no_pyarrow = False
+
+
+##########################################
+          # CSV PARSING #
+##########################################
+
+def count_header_rows(csv_path):
+    """
+    Return the number of GenX header rows between the column header and the
+    first timestep row (e.g. 2 for power.csv: "Zone" and "AnnualSum";
+    1 for emissions.csv: "AnnualSum"; 0 for flow.csv).
+
+    Returns None if the file has no timestep rows (a plain table).
+    """
+    with open(csv_path, "r") as f:
+        f.readline()  # column header
+        for i in range(MAX_HEADER_ROWS + 1):
+            line = f.readline()
+            if line == "":
+                return None
+            label = line.split(",", 1)[0].strip().strip('"')
+            if TIMESTEP_RE.match(label):
+                return i
+    return None
+
+
+def parse_genx_csv(csv_path, float32=False):
+    """
+    Parse a GenX result CSV into (data, header).
+
+    For time-series files (power.csv, emissions.csv, flow.csv, ...):
+    - data: one row per timestep (index t1, t2, ...), all columns float.
+    - header: the GenX header rows ("Zone", "AnnualSum", ...) as a small
+      numeric DataFrame with the same columns, or an empty frame.
+
+    For plain tables (capacity.csv, costs.csv, ...) data is the table as
+    pandas reads it and header is None.
+    """
+    csv_path = Path(csv_path)
+    n_header = count_header_rows(csv_path)
+
+    if n_header is None:
+        return pd.read_csv(csv_path), None
+
+    dtype = np.float32 if float32 else np.float64
+    header = read_genx_header(csv_path, n_header)
+
+    # Timesteps: skip the header rows and parse every value column as float
+    columns = pd.read_csv(csv_path, nrows=0).columns
+    data = pd.read_csv(
+        csv_path,
+        skiprows=range(1, n_header + 1),
+        index_col=0,
+        dtype={c: dtype for c in columns[1:]},
+    )
+    header.columns = data.columns
+    return data, header
+
+
+def read_genx_header(csv_path, n_header=None):
+    """
+    Read only the GenX header rows ("Zone", "AnnualSum", ...) of a
+    time-series CSV as a small numeric DataFrame (columns = resources/zones).
+    Returns None for plain tables.
+    """
+    if n_header is None:
+        n_header = count_header_rows(csv_path)
+    if n_header is None:
+        return None
+    header = pd.read_csv(csv_path, nrows=n_header, index_col=0)
+    return header.apply(pd.to_numeric, errors="coerce")
+
+
+##########################################
+          # COLUMNAR CACHE #
+##########################################
+
+def file_sha256(path, chunk_size=1 << 20):
+    """
+    Return the hex sha256 of a file, read in chunks.
+    """
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def _cache_dir(csv_path):
+    return Path(csv_path).parent / CACHE_DIR_NAME
+
+
+def _read_manifest(cache_dir):
+    manifest_path = cache_dir / MANIFEST_NAME
+    if not manifest_path.exists():
+        return {}
+    try:
+        with manifest_path.open("r") as f:
+            return json.load(f)
+    except (OSError, json.JSONDecodeError):
+        return {}
+
+
+def _write_manifest(cache_dir, manifest):
+    # Write to a temp file first so a crash never leaves a half-written manifest
+    manifest_path = cache_dir / MANIFEST_NAME
+    tmp_path = manifest_path.with_suffix(".json.tmp")
+    with tmp_path.open("w") as f:
+        json.dump(manifest, f, indent=2)
+    os.replace(tmp_path, manifest_path)
+
+
+def _write_frame(df, path, index_name):
+    # The index is stored as a named column (restored on read).
+    # Written uncompressed so later reads can be memory-mapped.
+    # Written to a temp file and renamed over, never truncated in place.
+    table = pa.Table.from_pandas(df.rename_axis(index_name), preserve_index=True)
+    tmp_path = Path(path).with_suffix(".tmp")
+    feather.write_feather(table, str(tmp_path), compression="uncompressed")
+    os.replace(tmp_path, path)
+
+
+def _read_frame(path, columns=None, index_name=None):
+    if columns is not None and index_name is not None:
+        columns = [index_name] + [c for c in columns if c != index_name]
+    table = feather.read_table(str(path), columns=columns, memory_map=True)
+    df = table.to_pandas()
+    if index_name is not None and df.index.name != index_name:
+        df = df.set_index(index_name)
+    return df
+
+
+def _cache_entry_is_valid(entry, csv_path, stat, dtype_name):
+    """
+    A cache entry is valid if the file's size/mtime match, or if they changed
+    but the content hash did not (e.g. after a plain copy).
+    """
+    if entry is None or entry.get("dtype") != dtype_name:
+        return False
+    if entry["size"] != stat.st_size:
+        return False
+    if entry["mtime_ns"] == stat.st_mtime_ns:
+        return True
+    return entry["sha256"] == file_sha256(csv_path)
+
+
+def ingest_genx_csv(csv_path, float32=False, force=False):
+    """
+    Make sure a columnar copy of csv_path exists in <results>/.columnar/
+    and is up to date. Returns the manifest entry for the file.
+    """
+    csv_path = Path(csv_path)
+    cache_dir = _cache_dir(csv_path)
+    os.makedirs(cache_dir, exist_ok=True)
+
+    dtype_name = "float32" if float32 else "float64"
+    manifest = _read_manifest(cache_dir)
+    entry = manifest.get(csv_path.name)
+    stat = csv_path.stat()
+
+    if not force and _cache_entry_is_valid(entry, csv_path, stat, dtype_name):
+        if entry["mtime_ns"] != stat.st_mtime_ns:
+            entry["mtime_ns"] = stat.st_mtime_ns
+            _write_manifest(cache_dir, manifest)
+        return entry
+
+    data, header = parse_genx_csv(csv_path, float32=float32)
+    stem = csv_path.stem
+    label = pd.read_csv(csv_path, nrows=0).columns[0]
+
+    if header is None:
+        _write_frame(data, cache_dir / f"{stem}.feather", "__row__")
+        kind = "table"
+    else:
+        _write_frame(data, cache_dir / f"{stem}.feather", label)
+        _write_frame(header, cache_dir / f"{stem}.header.feather", label)
+        kind = "timeseries"
+
+    entry = {
+        "size": stat.st_size,
+        "mtime_ns": stat.st_mtime_ns,
+        "sha256": file_sha256(csv_path),
+        "dtype": dtype_name,
+        "kind": kind,
+        "label": label,
+    }
+    manifest[csv_path.name] = entry
+    _write_manifest(cache_dir, manifest)
+    return entry
+
+
+def load_genx_result(csv_path, columns=None, float32=False, use_cache=True):
+    """
+    Load a GenX result CSV as (data, header) -- see parse_genx_csv.
+
+    With use_cache (and pyarrow installed) the file is converted to a
+    columnar copy once; later loads are memory-mapped and only read the
+    requested columns. Without pyarrow the CSV is parsed directly.
+    """
+    global _warned_no_pyarrow
+    csv_path = Path(csv_path)
+
+    if not use_cache or feather is None:
+        if use_cache and not _warned_no_pyarrow:
+            print("Warning: pyarrow is not installed; GenX results will be parsed from CSV every time.")
+            _warned_no_pyarrow = True
+        data, header = parse_genx_csv(csv_path, float32=float32)
+        if columns is not None:
+            data = data[list(columns)]
+            if header is not None:
+                header = header[list(columns)]
+        return data, header
+
+    entry = ingest_genx_csv(csv_path, float32=float32)
+    cache_dir = _cache_dir(csv_path)
+    stem = csv_path.stem
+
+    if entry["kind"] == "table":
+        data = _read_frame(cache_dir / f"{stem}.feather", columns, "__row__")
+        data.index.name = None
+        return data, None
+
+    data = _read_frame(cache_dir / f"{stem}.feather", columns, entry["label"])
+    header = _read_frame(cache_dir / f"{stem}.header.feather", columns, entry["label"])
+    return data, header
+
+
+def ingest_results_dir(results_dir, float32=False):
+    """
+    Convert every CSV in a GenX results/ directory to its columnar copy.
+    Does nothing (besides a warning) when pyarrow is not installed.
+    """
+    if feather is None:
+        print("Warning: pyarrow is not installed; skipping columnar ingest.")
+        return {}
+    entries = {}
+    for csv_path in sorted(Path(results_dir).glob("*.csv")):
+        entries[csv_path.name] = ingest_genx_csv(csv_path, float32=float32)
+    return entries
+
+
+##########################################
+            # STREAMING #
+##########################################
+
+def _valid_cache_entry(csv_path, float32=False):
+    """
+    The manifest entry of csv_path if its columnar copy is up to date,
+    without (re)building it. None otherwise.
+    """
+    if feather is None:
+        return None
+    csv_path = Path(csv_path)
+    entry = _read_manifest(_cache_dir(csv_path)).get(csv_path.name)
+    dtype_name = "float32" if float32 else "float64"
+    if _cache_entry_is_valid(entry, csv_path, csv_path.stat(), dtype_name) and entry["kind"] == "timeseries":
+        return entry
+    return None
+
+
+def iter_genx_csv(csv_path, columns=None, chunk_rows=DEFAULT_CHUNK_ROWS, float32=False, use_cache=True):
+    """
+    Stream the timestep rows of a GenX time-series CSV (power.csv,
+    charge.csv, flow.csv, ...) as float DataFrames of at most chunk_rows rows
+    (index t1, t2, ...). Only `columns` are parsed if given, so memory is
+    bounded by chunk_rows x columns whatever the file size.
+
+    If an up-to-date columnar copy exists (see ingest_genx_csv) the chunks
+    are sliced from the memory-mapped copy; otherwise the CSV is read in
+    chunks with explicit float dtypes. Header rows are skipped -- read them
+    with read_genx_header.
+    """
+    csv_path = Path(csv_path)
+
+    entry = _valid_cache_entry(csv_path, float32) if use_cache else None
+    if entry is not None:
+        label = entry["label"]
+        read_columns = None if columns is None else [label] + [c for c in columns if c != label]
+        table = feather.read_table(str(_cache_dir(csv_path) / f"{csv_path.stem}.feather"),
+                                   columns=read_columns, memory_map=True)
+        for start in range(0, table.num_rows, chunk_rows):
+            chunk = table.slice(start, chunk_rows).to_pandas()
+            if chunk.index.name != label:
+                chunk = chunk.set_index(label)
+            yield chunk
+        return
+
+    n_header = count_header_rows(csv_path)
+    if n_header is None:
+        raise ValueError(f"{csv_path} has no timestep rows; load it with load_genx_result instead.")
+
+    all_columns = pd.read_csv(csv_path, nrows=0).columns
+    label = all_columns[0]
+    value_columns = list(all_columns[1:]) if columns is None else list(columns)
+    dtype = np.float32 if float32 else np.float64
+
+    reader = pd.read_csv(
+        csv_path,
+        skiprows=range(1, n_header + 1),
+        usecols=[label] + value_columns,
+        index_col=label,
+        dtype={c: dtype for c in value_columns},
+        chunksize=chunk_rows,
+    )
+    for chunk in reader:
+        yield chunk[value_columns]
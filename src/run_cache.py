@@ -0,0 +1,131 @@
+import datetime
+import hashlib
+import json
+import os
+from pathlib import Path
+
+
+# GenX case folders whose contents define a solve
+INPUT_TREES = ["system", "resources", "policies", "settings"]
+
+# Julia environment files that pin the GenX/solver versions
+JULIA_PROJECT_FILES = ["Project.toml", "Manifest.toml", "JuliaManifest.toml"]
+
+# Index file under the output root: input hash -> harvested scenario folder
+CACHE_INDEX_NAME = ".run_cache.json"
+
+
+##########################################
+            # HASHING #
+##########################################
+
+def hash_file_into(h, path):
+    """Feed a file's contents into the hashlib object h, in 1 MB chunks."""
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            h.update(chunk)
+
+
+def hash_case_inputs(case_dir: Path):
+    """
+    Content hash of a GenX case's input trees (system/, resources/,
+    policies/, settings/). File names are part of the hash; hidden files and
+    folders (.ipynb_checkpoints, ...) are ignored since GenX never reads them.
+    """
+    case_dir = Path(case_dir)
+    h = hashlib.sha256()
+    for tree in INPUT_TREES:
+        root = case_dir / tree
+        if not root.is_dir():
+            continue
+        for dirpath, dirnames, files in os.walk(root):
+            dirnames[:] = sorted(d for d in dirnames if not d.startswith("."))
+            for name in sorted(files):
+                if name.startswith("."):
+                    continue
+                path = Path(dirpath) / name
+                h.update(path.relative_to(case_dir).as_posix().encode())
+                h.update(b"\0")
+                hash_file_into(h, path)
+                h.update(b"\0")
+    return h.hexdigest()
+
+
+def julia_project_identity(julia_exe, julia_project):
+    """
+    Identify the Julia install + environment: the executable path and the
+    contents of the project's Project.toml / Manifest.toml. A GenX or solver
+    upgrade changes the Manifest and therefore invalidates the cache.
+    """
+    h = hashlib.sha256()
+    h.update(str(julia_exe).encode())
+    h.update(b"\0")
+    project_dir = Path(julia_project).expanduser()
+    for name in JULIA_PROJECT_FILES:
+        path = project_dir / name
+        if path.is_file():
+            h.update(name.encode())
+            hash_file_into(h, path)
+    return h.hexdigest()
+
+
+def run_cache_key(case_dir, julia_exe, julia_project, inputs_hash=None):
+    """
+    Cache key of a solve: the case's input hash (pass inputs_hash if it was
+    already computed) combined with the Julia environment.
+    """
+    if inputs_hash is None:
+        inputs_hash = hash_case_inputs(case_dir)
+    h = hashlib.sha256()
+    h.update(inputs_hash.encode())
+    h.update(julia_project_identity(julia_exe, julia_project).encode())
+    return h.hexdigest()
+
+
+##########################################
+            # CACHE INDEX #
+##########################################
+
+class RunCache:
+    """
+    Maps the input hash of a GenX case to the output/<timestamp>/<scenario>
+    folder that already holds its harvested results.
+    """
+
+    def __init__(self, output_root: Path):
+        self.output_root = Path(output_root)
+        self.index_path = self.output_root / CACHE_INDEX_NAME
+        self.entries = {}
+        if self.index_path.exists():
+            try:
+                with self.index_path.open("r") as f:
+                    self.entries = json.load(f)
+            except (OSError, json.JSONDecodeError):
+                print(f"Warning: ignoring unreadable run cache {self.index_path}")
+
+    def lookup(self, key):
+        """
+        Return the folder with cached results for key, or None if there is
+        no entry or its results have since been deleted.
+        """
+        entry = self.entries.get(key)
+        if entry is None:
+            return None
+        cached_dir = self.output_root / entry["output_dir"]
+        if not (cached_dir / "results").is_dir():
+            return None
+        return cached_dir
+
+    def record(self, key, scenario, scenario_save_dir: Path):
+        self.entries[key] = {
+            "scenario": scenario,
+            "output_dir": Path(scenario_save_dir).relative_to(self.output_root).as_posix(),
+            "created": datetime.datetime.now().isoformat(timespec="seconds"),
+        }
+
+    def save(self):
+        os.makedirs(self.output_root, exist_ok=True)
+        tmp_path = self.index_path.with_suffix(".json.tmp")
+        with tmp_path.open("w") as f:
+            json.dump(self.entries, f, indent=2)
+        os.replace(tmp_path, self.index_path)
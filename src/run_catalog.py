@@ -0,0 +1,446 @@
+import argparse
+import datetime
+import json
+import os
+import sqlite3
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from aggregation import build_resource_index
+from profiling import read_solver_status
+from result_store import read_genx_header
+from sweep import read_settings_yml
+
+
+# SQLite file under the output root indexing every run in it
+CATALOG_NAME = ".run_catalog.sqlite"
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS runs (
+    run_id TEXT PRIMARY KEY,              -- output/<run_id> (the timestamp folder)
+    created TEXT,
+    comments TEXT,                        -- simulation_comments
+    simulation_settings TEXT              -- simulation_settings.json as JSON
+);
+CREATE TABLE IF NOT EXISTS scenarios (
+    run_id TEXT NOT NULL REFERENCES runs(run_id) ON DELETE CASCADE,
+    scenario TEXT NOT NULL,
+    output_dir TEXT,                      -- relative to the output root
+    input_hash TEXT,                      -- content hash of the GenX inputs
+    genx_status TEXT,                     -- OK, FAILED, CACHED, ... (NULL: GenX not run)
+    genx_seconds REAL,
+    solver_status TEXT,                   -- results/status.csv
+    solve_seconds REAL,
+    objective REAL,
+    PRIMARY KEY (run_id, scenario)
+);
+CREATE TABLE IF NOT EXISTS settings (
+    run_id TEXT NOT NULL,
+    scenario TEXT NOT NULL,               -- '' for simulation settings
+    source TEXT NOT NULL,                 -- 'run_settings' or 'simulation'
+    key TEXT NOT NULL,                    -- nested keys joined with '.'
+    value TEXT,
+    num REAL,                             -- value as a number, if it is one
+    PRIMARY KEY (run_id, scenario, source, key)
+);
+CREATE TABLE IF NOT EXISTS kpis (
+    run_id TEXT NOT NULL,
+    scenario TEXT NOT NULL,
+    kpi TEXT NOT NULL,                    -- 'emissions' or 'cost.<component>'
+    zone TEXT NOT NULL,                   -- GenX zone ID or 'Total'
+    value REAL,
+    PRIMARY KEY (run_id, scenario, kpi, zone)
+);
+CREATE TABLE IF NOT EXISTS capacity (
+    run_id TEXT NOT NULL,
+    scenario TEXT NOT NULL,
+    zone_id TEXT NOT NULL,
+    zone TEXT NOT NULL,
+    tech TEXT NOT NULL,
+    end_cap REAL,                         -- EndCap (MW), summed over units
+    PRIMARY KEY (run_id, scenario, zone_id, tech)
+);
+CREATE INDEX IF NOT EXISTS settings_by_key ON settings (key, num, value);
+CREATE INDEX IF NOT EXISTS kpis_by_kpi ON kpis (kpi, zone, value);
+CREATE INDEX IF NOT EXISTS capacity_by_tech ON capacity (tech, zone, end_cap);
+CREATE INDEX IF NOT EXISTS scenarios_by_hash ON scenarios (input_hash);
+"""
+
+TABLES = ["capacity", "kpis", "settings", "scenarios", "runs"]
+
+
+##########################################
+        # READING RUN OUTPUTS #
+##########################################
+
+def _number(value):
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def flatten_settings(settings, prefix=""):
+    """
+    {"genx": {"solver_threads": 0}} -> {"genx.solver_threads": 0}. Lists are
+    kept as JSON text.
+    """
+    flat = {}
+    for key, value in settings.items():
+        name = f"{prefix}{key}"
+        if isinstance(value, dict):
+            flat.update(flatten_settings(value, prefix=f"{name}."))
+        elif isinstance(value, list):
+            flat[name] = json.dumps(value)
+        else:
+            flat[name] = value
+    return flat
+
+
+def emissions_kpis(header):
+    """[(zone, annual emissions)] from the header rows of emissions.csv."""
+    if header is None or "AnnualSum" not in header.index:
+        return []
+    return [(str(zone), _number(value)) for zone, value in header.loc["AnnualSum"].items()]
+
+
+def cost_kpis(costs):
+    """[(cost component, zone, value)] from costs.csv ("Zone3" -> "3")."""
+    if costs is None:
+        return []
+    costs = costs.set_index(costs.columns[0])
+    rows = []
+    for component, values in costs.iterrows():
+        for column, value in values.items():
+            zone = str(column)
+            if zone.startswith("Zone"):
+                zone = zone[len("Zone"):]
+            rows.append((str(component), zone, _number(value)))
+    return rows
+
+
+def capacity_rows(table):
+    """
+    [(zone ID, zone, tech, EndCap)] from capacity.csv, summed over units
+    (zone/tech parsed from resource names as in aggregation.py).
+    """
+    if table is None:
+        return []
+    table = table[table["Resource"] != "Total"]
+    if table.empty:
+        return []
+    index = build_resource_index(table["Resource"], table["Zone"].to_numpy())
+    end_cap = pd.to_numeric(table["EndCap"], errors="coerce").fillna(0.0).to_numpy()
+    grouped = pd.DataFrame({
+        "zone_id": table["Zone"].astype(str).to_numpy(),
+        "zone": np.asarray(index.get_level_values("zone").astype(str)),
+        "tech": np.asarray(index.get_level_values("tech").astype(str)),
+        "end_cap": end_cap,
+    }).groupby(["zone_id", "zone", "tech"], sort=False)["end_cap"].sum()
+    return [(zone_id, zone, tech, float(cap)) for (zone_id, zone, tech), cap in grouped.items()]
+
+
+def read_scenario_kpis(results_dir):
+    """
+    {"emissions", "costs", "capacity"} KPI rows read from a results folder
+    (post-processing computes the same rows from the results it already
+    loaded; see outputs.py).
+    """
+    results_dir = Path(results_dir)
+    emissions_path = results_dir / "emissions.csv"
+    costs_path = results_dir / "costs.csv"
+    capacity_path = results_dir / "capacity.csv"
+    return {
+        "emissions": emissions_kpis(read_genx_header(emissions_path)) if emissions_path.exists() else [],
+        "costs": cost_kpis(pd.read_csv(costs_path)) if costs_path.exists() else [],
+        "capacity": capacity_rows(pd.read_csv(capacity_path)) if capacity_path.exists() else [],
+    }
+
+
+def read_metadata_settings(metadata_path):
+    """
+    The simulation settings block of a run's metadata.txt (for indexing runs
+    written before the catalog existed), or {}.
+    """
+    path = Path(metadata_path)
+    if not path.exists():
+        return {}
+    text = path.read_text()
+    start = text.find("=== Simulation Settings ===")
+    if start < 0:
+        return {}
+    block = text[start:].split("\n", 1)[1].split("\n===", 1)[0]
+    try:
+        return json.loads(block)
+    except json.JSONDecodeError:
+        return {}
+
+
+##########################################
+            # RUN CATALOG #
+##########################################
+
+class RunCatalog:
+    """
+    SQLite index of every run under the output root: settings, input hashes
+    and scalar KPIs (annual emissions, costs, end capacity) per scenario, so
+    past runs can be searched without reading their CSVs.
+
+        catalog = RunCatalog(project_root / "output")
+        catalog.find(scenario="s2", settings={"CO2Cap": 1}, max_emissions=1e6)
+    """
+
+    def __init__(self, output_root: Path):
+        self.output_root = Path(output_root)
+        self.path = self.output_root / CATALOG_NAME
+        os.makedirs(self.output_root, exist_ok=True)
+        self.db = sqlite3.connect(self.path)
+        self.db.row_factory = sqlite3.Row
+        self.db.execute("PRAGMA foreign_keys = ON")
+        self.db.executescript(SCHEMA)
+
+    def close(self):
+        self.db.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    # ----- writing -----
+
+    def record_run(self, run_id, simulation_settings, scenario_info=None, created=None):
+        """
+        Index output/<run_id>/: simulation settings plus, for every scenario
+        folder with a results/ folder, its run_settings.yml, status.csv and
+        KPIs. scenario_info optionally gives per-scenario {"input_hash",
+        "genx_status", "genx_seconds", "kpis"}; KPIs not given are read from
+        the results folder. Re-recording a run replaces it.
+        """
+        run_id = str(run_id)
+        run_dir = self.output_root / run_id
+        scenario_info = scenario_info or {}
+        created = created or datetime.datetime.now().isoformat(timespec="seconds")
+
+        with self.db:
+            for table in TABLES:
+                self.db.execute(f"DELETE FROM {table} WHERE run_id = ?", (run_id,))
+
+            self.db.execute(
+                "INSERT INTO runs VALUES (?, ?, ?, ?)",
+                (run_id, created, simulation_settings.get("simulation_comments"),
+                 json.dumps(simulation_settings)),
+            )
+            self._insert_settings(run_id, "", "simulation", flatten_settings(simulation_settings))
+
+            scenarios = sorted(
+                p.name for p in run_dir.iterdir() if (p / "results").is_dir()
+            ) if run_dir.is_dir() else []
+            for scen in scenarios:
+                self._record_scenario(run_id, scen, run_dir / scen / "results", scenario_info.get(scen, {}))
+
+        return scenarios
+
+    def _insert_settings(self, run_id, scenario, source, settings):
+        self.db.executemany(
+            "INSERT INTO settings VALUES (?, ?, ?, ?, ?, ?)",
+            [
+                (run_id, scenario, source, key, None if value is None else str(value), _number(value))
+                for key, value in settings.items()
+            ],
+        )
+
+    def _record_scenario(self, run_id, scen, results_dir, info):
+        solver = read_solver_status(results_dir) or {}
+        self.db.execute(
+            "INSERT INTO scenarios VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            (run_id, scen, f"{run_id}/{scen}", info.get("input_hash"), info.get("genx_status"),
+             info.get("genx_seconds"), solver.get("status"), solver.get("solve_seconds"), solver.get("objective")),
+        )
+
+        run_settings_path = results_dir / "run_settings.yml"
+        if run_settings_path.exists():
+            self._insert_settings(run_id, scen, "run_settings", read_settings_yml(run_settings_path))
+
+        scenario_kpis = info.get("kpis") or read_scenario_kpis(results_dir)
+        kpis = [(run_id, scen, "emissions", zone, value) for zone, value in scenario_kpis["emissions"]]
+        kpis += [(run_id, scen, f"cost.{component}", zone, value)
+                 for component, zone, value in scenario_kpis["costs"]]
+        self.db.executemany("INSERT OR REPLACE INTO kpis VALUES (?, ?, ?, ?, ?)", kpis)
+
+        self.db.executemany(
+            "INSERT INTO capacity VALUES (?, ?, ?, ?, ?, ?)",
+            [(run_id, scen, *row) for row in scenario_kpis["capacity"]],
+        )
+
+    def rebuild(self):
+        """
+        Index every output/<run_id>/ folder that holds scenario results,
+        taking simulation settings from its metadata.txt. Returns the run IDs.
+        """
+        indexed = []
+        for run_dir in sorted(p for p in self.output_root.iterdir() if p.is_dir() and not p.name.startswith(".")):
+            if not any((p / "results").is_dir() for p in run_dir.iterdir()):
+                continue
+            created = datetime.datetime.fromtimestamp(run_dir.stat().st_mtime).isoformat(timespec="seconds")
+            self.record_run(run_dir.name, read_metadata_settings(run_dir / "metadata.txt"), created=created)
+            indexed.append(run_dir.name)
+        return indexed
+
+    # ----- queries -----
+
+    def query(self, sql, params=()):
+        """Run any SQL against the catalog; returns a DataFrame."""
+        return pd.read_sql_query(sql, self.db, params=params)
+
+    def runs(self):
+        return self.query(
+            "SELECT r.run_id, r.created, r.comments, COUNT(s.scenario) AS scenarios "
+            "FROM runs r LEFT JOIN scenarios s USING (run_id) GROUP BY r.run_id ORDER BY r.run_id"
+        )
+
+    def find(self, scenario=None, settings=None, min_emissions=None, max_emissions=None,
+             max_cost=None, input_hash=None, status=None):
+        """
+        Scenarios matching every given condition, with their total annual
+        emissions and total cost.
+
+        settings: {key: value}, matched against run_settings.yml keys and
+        simulation settings (nested keys joined with '.'); numbers compare
+        numerically, so {"CO2Cap": 1} matches "CO2Cap: 1".
+        """
+        sql = [
+            "SELECT s.run_id, s.scenario, s.genx_status, s.solver_status, s.solve_seconds, s.objective,",
+            "       e.value AS emissions, c.value AS total_cost, s.input_hash",
+            "FROM scenarios s",
+            "LEFT JOIN kpis e ON e.run_id = s.run_id AND e.scenario = s.scenario",
+            "                AND e.kpi = 'emissions' AND e.zone = 'Total'",
+            "LEFT JOIN kpis c ON c.run_id = s.run_id AND c.scenario = s.scenario",
+            "                AND c.kpi = 'cost.cTotal' AND c.zone = 'Total'",
+            "WHERE 1 = 1",
+        ]
+        params = []
+        if scenario is not None:
+            sql.append("AND s.scenario = ?")
+            params.append(scenario)
+        if input_hash is not None:
+            sql.append("AND s.input_hash LIKE ?")
+            params.append(f"{input_hash}%")
+        if status is not None:
+            sql.append("AND (s.genx_status = ? OR s.solver_status = ?)")
+            params += [status, status]
+        if min_emissions is not None:
+            sql.append("AND e.value >= ?")
+            params.append(min_emissions)
+        if max_emissions is not None:
+            sql.append("AND e.value <= ?")
+            params.append(max_emissions)
+        if max_cost is not None:
+            sql.append("AND c.value <= ?")
+            params.append(max_cost)
+        for key, value in (settings or {}).items():
+            number = _number(value)
+            match = "num = ?" if number is not None else "value = ?"
+            sql.append(
+                "AND EXISTS (SELECT 1 FROM settings k WHERE k.run_id = s.run_id "
+                f"AND k.scenario IN (s.scenario, '') AND k.key = ? AND k.{match})"
+            )
+            params += [key, number if number is not None else str(value)]
+        sql.append("ORDER BY s.run_id, s.scenario")
+        return self.query("\n".join(sql), params)
+
+    def kpis(self, run_id, scenario=None):
+        """Every KPI of a run (or one of its scenarios) as a long table."""
+        sql = "SELECT scenario, kpi, zone, value FROM kpis WHERE run_id = ?"
+        params = [str(run_id)]
+        if scenario is not None:
+            sql += " AND scenario = ?"
+            params.append(scenario)
+        return self.query(sql + " ORDER BY scenario, kpi, zone", params)
+
+    def capacity(self, run_id=None, scenario=None, tech=None, by="tech"):
+        """
+        End capacity summed by tech (by="tech") or zone/tech (by="zone_tech"),
+        one row per run/scenario.
+        """
+        group = "tech" if by == "tech" else "zone, tech"
+        sql = f"SELECT run_id, scenario, {group}, SUM(end_cap) AS end_cap FROM capacity WHERE 1 = 1"
+        params = []
+        for column, value in (("run_id", run_id), ("scenario", scenario), ("tech", tech)):
+            if value is not None:
+                sql += f" AND {column} = ?"
+                params.append(str(value))
+        return self.query(f"{sql} GROUP BY run_id, scenario, {group} ORDER BY run_id, scenario, {group}", params)
+
+
+def _parse_setting(text):
+    key, sep, value = text.partition("=")
+    if not sep:
+        raise argparse.ArgumentTypeError(f"Expected KEY=VALUE, got '{text}'")
+    return key, value
+
+
+if __name__ == "__main__":
+    # Query the run catalog, e.g.:
+    #   python src/run_catalog.py find --scenario s2 --setting CO2Cap=1 --max-emissions 1e6
+    #   python src/run_catalog.py kpis 202501011200 --scenario s1
+    #   python src/run_catalog.py sql "SELECT * FROM capacity WHERE tech LIKE '%wind%'"
+    #   python src/run_catalog.py rebuild
+    project_root = Path(__file__).resolve().parents[1]
+    with (project_root / "input" / "simulation_settings.json").open("r") as f:
+        default_output = project_root / json.load(f).get("save_path", "output")
+
+    parser = argparse.ArgumentParser(description="Search past runs without reading their CSVs.")
+    parser.add_argument("--output", type=Path, default=default_output, help="Output root holding the catalog.")
+    commands = parser.add_subparsers(dest="command", required=True)
+    commands.add_parser("runs", help="List indexed runs.")
+    find = commands.add_parser("find", help="Find scenarios by settings and KPIs.")
+    find.add_argument("--scenario")
+    find.add_argument("--setting", type=_parse_setting, action="append", default=[], metavar="KEY=VALUE")
+    find.add_argument("--min-emissions", type=float)
+    find.add_argument("--max-emissions", type=float)
+    find.add_argument("--max-cost", type=float)
+    find.add_argument("--input-hash", help="Input hash (or a prefix of it).")
+    find.add_argument("--status", help="GenX or solver status, e.g. OPTIMAL.")
+    kpis = commands.add_parser("kpis", help="All KPIs of a run.")
+    kpis.add_argument("run_id")
+    kpis.add_argument("--scenario")
+    capacity = commands.add_parser("capacity", help="End capacity by tech or zone/tech.")
+    capacity.add_argument("--run-id")
+    capacity.add_argument("--scenario")
+    capacity.add_argument("--tech")
+    capacity.add_argument("--by", choices=["tech", "zone_tech"], default="tech")
+    sql = commands.add_parser("sql", help="Run a SQL query against the catalog.")
+    sql.add_argument("query")
+    commands.add_parser("rebuild", help="Index every run folder under the output root.")
+    args = parser.parse_args()
+
+    t0 = time.perf_counter()
+    with RunCatalog(args.output) as catalog:
+        if args.command == "rebuild":
+            indexed = catalog.rebuild()
+            print(f"Indexed {len(indexed)} run(s) into {catalog.path}")
+            sys.exit(0)
+        if args.command == "runs":
+            table = catalog.runs()
+        elif args.command == "find":
+            table = catalog.find(
+                scenario=args.scenario, settings=dict(args.setting), min_emissions=args.min_emissions,
+                max_emissions=args.max_emissions, max_cost=args.max_cost, input_hash=args.input_hash,
+                status=args.status,
+            )
+        elif args.command == "kpis":
+            table = catalog.kpis(args.run_id, args.scenario)
+        elif args.command == "capacity":
+            table = catalog.capacity(args.run_id, args.scenario, args.tech, args.by)
+        else:
+            table = catalog.query(args.query)
+
+    with pd.option_context("display.max_rows", 200, "display.width", 200):
+        print(table.to_string(index=False) if len(table) else "No matches.")
+    print(f"({len(table)} row(s), {(time.perf_counter() - t0) * 1000:.0f} ms)")
@@ -0,0 +1,452 @@
+import json
+import os
+from functools import cached_property
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from aggregation import grouped_sum, build_resource_index
+from plot_functions import comparison_plot_jobs
+from render import render_jobs
+from result_store import load_genx_result
+
+
+##########################################
+          # LABELLED ARRAYS #
+##########################################
+
+class CubeArray:
+    """
+    A NumPy array with named axes and a list of labels per axis, e.g.
+    dims ("scenario", "zone", "time") with
+    coords {"scenario": ["s1", "s2"], "zone": [...], "time": ["t1", ...]}.
+    """
+
+    def __init__(self, values, dims, coords):
+        self.values = values
+        self.dims = tuple(dims)
+        self.coords = {dim: list(coords[dim]) for dim in self.dims}
+
+    def __repr__(self):
+        shape = ", ".join(f"{dim}: {n}" for dim, n in zip(self.dims, self.values.shape))
+        return f"CubeArray({shape})"
+
+    def axis(self, dim):
+        return self.dims.index(dim)
+
+    def sel(self, **labels):
+        """
+        Pick one label along one or more axes; those axes are dropped.
+        """
+        values = self.values
+        dims = list(self.dims)
+        for dim, label in labels.items():
+            ax = dims.index(dim)
+            values = np.take(values, self.coords[dim].index(label), axis=ax)
+            dims.pop(ax)
+        return CubeArray(values, dims, self.coords)
+
+    def sum(self, dim, weights=None):
+        """
+        Sum over one axis, ignoring NaNs (missing timesteps). weights, if
+        given, must broadcast against values (e.g. time weights of shape
+        (scenario, 1, time)).
+        """
+        values = self.values if weights is None else self.values * weights
+        ax = self.axis(dim)
+        dims = [d for d in self.dims if d != dim]
+        return CubeArray(np.nansum(values, axis=ax), dims, self.coords)
+
+    def delta(self, baseline):
+        """
+        Difference of every scenario to the baseline scenario, in one
+        broadcast subtraction.
+        """
+        ax = self.axis("scenario")
+        base = np.take(self.values, [self.coords["scenario"].index(baseline)], axis=ax)
+        return CubeArray(self.values - base, self.dims, self.coords)
+
+    def to_frame(self):
+        """
+        2-D arrays only: a DataFrame with the first axis as rows.
+        """
+        if len(self.dims) != 2:
+            raise ValueError(f"to_frame needs a 2-D array, got dims {self.dims}")
+        row_dim, col_dim = self.dims
+        return pd.DataFrame(
+            np.asarray(self.values),
+            index=pd.Index(self.coords[row_dim], name=row_dim, tupleize_cols=False),
+            columns=pd.Index(self.coords[col_dim], name=col_dim, tupleize_cols=False),
+        )
+
+
+def _union(label_lists):
+    """Union of label lists, in first-appearance order."""
+    return list(dict.fromkeys(label for labels in label_lists for label in labels))
+
+
+def _stack(frames, rows, columns, dtype):
+    """
+    Stack per-scenario frames (rows x columns) into one (scenario, column, row)
+    array. Columns missing from a scenario are 0 (e.g. a resource that was
+    not built); rows missing from a scenario are NaN.
+    """
+    out = np.full((len(frames), len(columns), len(rows)), np.nan, dtype=dtype)
+    for i, df in enumerate(frames):
+        if df is None:
+            continue
+        aligned = df.reindex(columns=columns, fill_value=0.0).reindex(index=rows)
+        out[i] = aligned.to_numpy(dtype=dtype).T
+    return out
+
+
+def _zone_id(label):
+    """'3', 3, 'Zone3' -> 3; anything else is returned unchanged."""
+    text = str(label)
+    if text.startswith("Zone"):
+        text = text[len("Zone"):]
+    try:
+        return int(float(text))
+    except ValueError:
+        return label
+
+
+##########################################
+          # SCENARIO CUBE #
+##########################################
+
+class ScenarioCube:
+    """
+    All scenarios of a run in one set of arrays, so scenarios can be compared
+    with vectorized operations instead of reloading each one:
+
+      power      (scenario, zone, tech, time)
+      emissions  (scenario, zone, time)
+      prices     (scenario, zone, time)
+      capacity   (scenario, zone, tech)      EndCap, MW
+      costs      (scenario, cost, zone)      "Total" plus one column per zone
+
+    Each array is built on first use from the per-scenario results (through
+    the columnar cache, see result_store.load_genx_result). Zones use the
+    same names as the power plots (NY_Z_A, PJM_EMAC, ...) in every array.
+
+    With store_dir, every array is also written there as <name>.npy and
+    memory-mapped back read-only, so other processes (render workers,
+    notebooks via load_cube_array) share the same pages instead of copies.
+    """
+
+    def __init__(self, results_dirs, float32=False, use_cache=True, store_dir=None):
+        """
+        results_dirs: {scenario: path of its results/ folder}, in plot order.
+        """
+        self.results_dirs = {scen: Path(d) for scen, d in results_dirs.items()}
+        self.scenarios = list(self.results_dirs)
+        self.float32 = float32
+        self.use_cache = use_cache
+        self.dtype = np.float32 if float32 else np.float64
+        self.store_dir = None if store_dir is None else Path(store_dir)
+
+    def _load(self, name):
+        """
+        Load results/<name>.csv for every scenario: [(data, header) or (None, None)].
+        """
+        loaded = []
+        for scen in self.scenarios:
+            csv_path = self.results_dirs[scen] / f"{name}.csv"
+            if csv_path.exists():
+                loaded.append(load_genx_result(csv_path, float32=self.float32, use_cache=self.use_cache))
+            else:
+                print(f"[{scen}] Warning: {csv_path} not found; its {name} values are left empty.")
+                loaded.append((None, None))
+        return loaded
+
+    def _share(self, name, cube):
+        """
+        Write cube to store_dir/<name>.npy (+ labels in <name>.json) and
+        return it memory-mapped. No-op without store_dir.
+        """
+        if self.store_dir is None:
+            return cube
+
+        os.makedirs(self.store_dir, exist_ok=True)
+        array_path = self.store_dir / f"{name}.npy"
+        tmp_path = self.store_dir / f".{name}.npy.tmp"
+        with tmp_path.open("wb") as f:
+            np.save(f, np.ascontiguousarray(cube.values))
+        os.replace(tmp_path, array_path)
+
+        with (self.store_dir / f"{name}.json").open("w") as f:
+            json.dump({"dims": cube.dims, "coords": {d: [str(c) for c in cube.coords[d]] for d in cube.dims}}, f)
+
+        return CubeArray(np.load(array_path, mmap_mode="r"), cube.dims, cube.coords)
+
+    # ----- resources and zones -----
+
+    @cached_property
+    def _power(self):
+        return self._load("power")
+
+    @cached_property
+    def resources(self):
+        """
+        (zone, tech, unit) MultiIndex over the union of power.csv resources
+        of all scenarios (see aggregation.build_resource_index).
+        """
+        names, zone_ids = [], {}
+        for data, header in self._power:
+            if data is None:
+                continue
+            for col in data.columns:
+                if col == "Total" or col in zone_ids:
+                    continue
+                names.append(col)
+                zone_ids[col] = header.loc["Zone", col] if header is not None and "Zone" in header.index else None
+        ids = None if any(v is None for v in zone_ids.values()) else [zone_ids[c] for c in names]
+        return build_resource_index(names, ids), names, ids
+
+    @cached_property
+    def zone_names(self):
+        """
+        {GenX zone ID: zone name}, from the Zone row of power.csv.
+        """
+        index, _, ids = self.resources
+        if ids is None:
+            return {}
+        zones = index.get_level_values("zone")
+        return {int(i): str(z) for i, z in zip(ids, zones)}
+
+    def _zone_label(self, label):
+        return self.zone_names.get(_zone_id(label), str(label))
+
+    # ----- time-series cubes -----
+
+    @cached_property
+    def power_by_resource(self):
+        """Power per resource: (scenario, resource, time)."""
+        _, names, _ = self.resources
+        frames = [data for data, _ in self._power]
+        time = _union([df.index for df in frames if df is not None])
+        values = _stack(frames, time, names, self.dtype)
+        return CubeArray(values, ("scenario", "resource", "time"),
+                         {"scenario": self.scenarios, "resource": names, "time": time})
+
+    @cached_property
+    def power(self):
+        """
+        Power summed over units: (scenario, zone, tech, time). Zone/tech
+        pairs that do not exist are 0.
+        """
+        index, _, _ = self.resources
+        by_resource = self.power_by_resource.values
+        n_scen, n_res, n_time = by_resource.shape
+        zones = list(index.levels[0])
+        techs = list(index.levels[1])
+
+        # One grouped sum over resources for all scenarios and timesteps at once
+        codes = index.codes[0].astype(np.int64) * len(techs) + index.codes[1].astype(np.int64)
+        flat = by_resource.transpose(0, 2, 1).reshape(n_scen * n_time, n_res)
+        sums = grouped_sum(flat, codes, len(zones) * len(techs))
+        values = sums.reshape(n_scen, n_time, len(zones), len(techs)).transpose(0, 2, 3, 1)
+
+        cube = CubeArray(values, ("scenario", "zone", "tech", "time"), {
+            "scenario": self.scenarios,
+            "zone": zones,
+            "tech": techs,
+            "time": self.power_by_resource.coords["time"],
+        })
+        return self._share("power", cube)
+
+    def _zone_timeseries(self, name):
+        frames = []
+        for data, _ in self._load(name):
+            if data is not None:
+                data = data.drop(columns=["Total"], errors="ignore")
+                data.columns = [self._zone_label(c) for c in data.columns]
+            frames.append(data)
+        present = [df for df in frames if df is not None]
+        zones = _union([df.columns for df in present])
+        time = _union([df.index for df in present])
+        cube = CubeArray(_stack(frames, time, zones, self.dtype), ("scenario", "zone", "time"),
+                         {"scenario": self.scenarios, "zone": zones, "time": time})
+        return self._share(name, cube)
+
+    @cached_property
+    def emissions(self):
+        """Emissions per zone: (scenario, zone, time)."""
+        return self._zone_timeseries("emissions")
+
+    @cached_property
+    def prices(self):
+        """Energy prices per zone: (scenario, zone, time)."""
+        return self._zone_timeseries("prices")
+
+    def time_weights(self, time):
+        """
+        Per-timestep weights (results/time_weights.csv) aligned to the time
+        labels of a cube: shape (scenario, time). 1 where a scenario has no
+        weights file (no time-domain reduction).
+        """
+        weights = np.ones((len(self.scenarios), len(time)))
+        for i, (data, _) in enumerate(self._load("time_weights")):
+            if data is None:
+                continue
+            by_label = pd.Series(data["Weight"].to_numpy(), index=[f"t{int(t)}" for t in data["Time"]])
+            weights[i] = by_label.reindex(time).fillna(1.0).to_numpy()
+        return weights
+
+    # ----- table cubes -----
+
+    @cached_property
+    def capacity(self):
+        """End-of-period capacity (EndCap): (scenario, zone, tech)."""
+        tables = []
+        for data, _ in self._load("capacity"):
+            if data is not None:
+                data = data[data["Resource"] != "Total"]
+            tables.append(data)
+
+        present = [t for t in tables if t is not None]
+        all_rows = pd.concat(present).drop_duplicates("Resource")
+        index = build_resource_index(all_rows["Resource"], all_rows["Zone"].to_numpy())
+        zones = list(index.levels[0])
+        techs = list(index.levels[1])
+        position = pd.Series(
+            index.codes[0].astype(np.int64) * len(techs) + index.codes[1].astype(np.int64),
+            index=all_rows["Resource"].to_numpy(),
+        )
+
+        values = np.zeros((len(self.scenarios), len(zones) * len(techs)), dtype=self.dtype)
+        for i, table in enumerate(tables):
+            if table is None:
+                values[i] = np.nan
+                continue
+            end_cap = pd.to_numeric(table["EndCap"], errors="coerce").fillna(0.0).to_numpy()
+            np.add.at(values[i], position.loc[table["Resource"].to_numpy()].to_numpy(), end_cap)
+
+        cube = CubeArray(values.reshape(len(self.scenarios), len(zones), len(techs)),
+                         ("scenario", "zone", "tech"),
+                         {"scenario": self.scenarios, "zone": zones, "tech": techs})
+        return self._share("capacity", cube)
+
+    @cached_property
+    def costs(self):
+        """System cost components (costs.csv): (scenario, cost, zone)."""
+        frames = []
+        for data, _ in self._load("costs"):
+            if data is not None:
+                data = data.set_index("Costs")
+                data.columns = ["Total" if c == "Total" else self._zone_label(c) for c in data.columns]
+                data = data.apply(pd.to_numeric, errors="coerce")
+            frames.append(data)
+        present = [df for df in frames if df is not None]
+        zones = _union([df.columns for df in present])
+        costs = _union([df.index for df in present])
+        # _stack puts the columns (zones) second; swap to (scenario, cost, zone)
+        values = _stack(frames, costs, zones, self.dtype).transpose(0, 2, 1)
+        cube = CubeArray(values, ("scenario", "cost", "zone"),
+                         {"scenario": self.scenarios, "cost": costs, "zone": zones})
+        return self._share("costs", cube)
+
+    # ----- delta tables -----
+
+    def _delta_table(self, cube, baseline):
+        """
+        cube: (scenario, rows). Returns rows x [scenarios..., "<scen> - <baseline>"...].
+        """
+        frame = cube.to_frame().T
+        frame.columns.name = None
+        deltas = cube.delta(baseline).to_frame().T
+        for scen in self.scenarios:
+            if scen != baseline:
+                frame[f"{scen} - {baseline}"] = deltas[scen]
+        return frame
+
+    def capacity_delta(self, baseline, by="tech"):
+        """
+        EndCap per tech (by="tech") or per zone/tech pair (by="zone_tech"),
+        with each scenario's difference to the baseline. Rows that are 0 in
+        every scenario are dropped.
+        """
+        if by == "tech":
+            cube = self.capacity.sum("zone")
+        elif by == "zone_tech":
+            cap = self.capacity
+            n_scen, n_zone, n_tech = cap.values.shape
+            rows = list(pd.MultiIndex.from_product([cap.coords["zone"], cap.coords["tech"]]))
+            cube = CubeArray(np.asarray(cap.values).reshape(n_scen, n_zone * n_tech),
+                             ("scenario", "zone_tech"), {"scenario": self.scenarios, "zone_tech": rows})
+        else:
+            raise ValueError(f"Unknown capacity grouping '{by}' (expected 'tech' or 'zone_tech').")
+
+        table = self._delta_table(cube, baseline)
+        if by == "zone_tech":
+            table.index = pd.MultiIndex.from_tuples(table.index, names=["zone", "tech"])
+        return table[(table[self.scenarios] != 0).any(axis=1)]
+
+    def emissions_delta(self, baseline):
+        """
+        Annual emissions per zone (timesteps weighted by time_weights.csv)
+        plus a Total row, with each scenario's difference to the baseline.
+        """
+        emissions = self.emissions
+        weights = self.time_weights(emissions.coords["time"])[:, None, :]
+        annual = emissions.sum("time", weights=weights)
+        table = self._delta_table(annual, baseline)
+        table.loc["Total"] = table.sum(axis=0)
+        return table
+
+    def cost_delta(self, baseline):
+        """
+        System cost components (cTotal, cFix, cVar, ...) with each
+        scenario's difference to the baseline.
+        """
+        return self._delta_table(self.costs.sel(zone="Total"), baseline)
+
+
+def load_cube_array(store_dir, name):
+    """
+    Open an array written by ScenarioCube(store_dir=...) memory-mapped,
+    e.g. load_cube_array("output/<timestamp>/comparison/cube", "power").
+    """
+    store_dir = Path(store_dir)
+    with (store_dir / f"{name}.json").open("r") as f:
+        labels = json.load(f)
+    return CubeArray(np.load(store_dir / f"{name}.npy", mmap_mode="r"), labels["dims"], labels["coords"])
+
+
+##########################################
+        # COMPARISON OUTPUTS #
+##########################################
+
+def write_scenario_comparison(results_dirs, comparison_dir, baseline, plot_settings, sim_id,
+                              float32=False, use_cache=True):
+    """
+    Build the scenario cube for a run and write to comparison_dir:
+    - capacity_delta.csv, capacity_delta_by_zone.csv, emissions_delta.csv,
+      cost_delta.csv: one column per scenario plus "<scen> - <baseline>".
+    - plots/: side-by-side comparison plots (see plot_functions.comparison_plot_jobs).
+    - cube/: the arrays as memory-mappable .npy files (see load_cube_array).
+    Returns the ScenarioCube.
+    """
+    comparison_dir = Path(comparison_dir)
+    plots_dir = comparison_dir / "plots"
+    os.makedirs(plots_dir, exist_ok=True)
+
+    if baseline not in results_dirs:
+        raise KeyError(f"comparison_baseline '{baseline}' is not one of the scenarios {list(results_dirs)}.")
+
+    cube = ScenarioCube(results_dirs, float32=float32, use_cache=use_cache, store_dir=comparison_dir / "cube")
+
+    tables = {
+        "capacity_delta.csv": cube.capacity_delta(baseline),
+        "capacity_delta_by_zone.csv": cube.capacity_delta(baseline, by="zone_tech"),
+        "emissions_delta.csv": cube.emissions_delta(baseline),
+        "cost_delta.csv": cube.cost_delta(baseline),
+    }
+    for name, table in tables.items():
+        table.to_csv(comparison_dir / name)
+        print(f"Saved: {comparison_dir / name}")
+
+    render_jobs(comparison_plot_jobs(cube, plot_settings, plots_dir, sim_id, baseline))
+    return cube
@@ -0,0 +1,509 @@
+import argparse
+import copy
+import json
+import os
+import socketserver
+import sys
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from urllib.parse import parse_qs, unquote, urlparse
+
+import numpy as np
+import pandas as pd
+
+from main import load_plot_settings
+from outputs import OUTPUTS, RESULTS, ScenarioResults
+from render import render_job_bytes
+from result_store import ingest_results_dir
+
+
+DEFAULT_PORT = 8765
+DEFAULT_MEMORY_MB = 1024
+
+# Seconds between scans of the output root for new runs
+DEFAULT_WATCH_INTERVAL = 2.0
+
+# Written at the very end of a main.py run: a run folder is only picked up
+# once it exists, so half-harvested scenarios are never read
+RUN_COMPLETE_MARKER = "metadata.txt"
+
+IMAGE_TYPES = {"png": "image/png", "svg": "image/svg+xml", "pdf": "application/pdf"}
+
+
+##########################################
+            # MEMORY BUDGET #
+##########################################
+
+def estimate_nbytes(value, depth=3):
+    """
+    Approximate memory held by a result: DataFrames, arrays and the
+    DataFrames/arrays inside tuples, dicts and plain objects (e.g. the
+    ResourceAggregates of power.csv), a few levels deep.
+    """
+    if isinstance(value, (pd.DataFrame, pd.Series)):
+        return int(value.memory_usage(deep=True).sum()) if isinstance(value, pd.DataFrame) \
+            else int(value.memory_usage(deep=True))
+    if isinstance(value, pd.Index):
+        return int(value.memory_usage(deep=True))
+    if isinstance(value, np.ndarray):
+        return int(value.nbytes)
+    if isinstance(value, (str, bytes)):
+        return len(value)
+    if depth == 0:
+        return 0
+    if isinstance(value, (list, tuple)):
+        return sum(estimate_nbytes(v, depth - 1) for v in value)
+    if isinstance(value, dict):
+        return sum(estimate_nbytes(v, depth - 1) for v in value.values())
+    if hasattr(value, "__dict__"):
+        return sum(estimate_nbytes(v, depth - 1) for v in vars(value).values())
+    return 0
+
+
+class LRUCache:
+    """
+    Thread-safe least-recently-used cache with a byte budget. Entries are
+    put with their size; once the total exceeds max_bytes, the least
+    recently used entries are dropped (an entry larger than the budget is
+    not kept at all). Putting an existing key again updates its size, so
+    an entry that grows (results loaded lazily) is re-accounted.
+    """
+
+    def __init__(self, max_bytes):
+        self.max_bytes = max_bytes
+        self.entries = OrderedDict()  # key -> (value, nbytes)
+        self.nbytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            if key not in self.entries:
+                self.misses += 1
+                return None
+            self.entries.move_to_end(key)
+            self.hits += 1
+            return self.entries[key][0]
+
+    def put(self, key, value, nbytes):
+        with self._lock:
+            if key in self.entries:
+                self.nbytes -= self.entries.pop(key)[1]
+            if nbytes > self.max_bytes:
+                return
+            self.entries[key] = (value, nbytes)
+            self.nbytes += nbytes
+            while self.nbytes > self.max_bytes:
+                _, (_, dropped) = self.entries.popitem(last=False)
+                self.nbytes -= dropped
+                self.evictions += 1
+
+    def discard(self, match):
+        """Drop every entry whose key satisfies match(key)."""
+        with self._lock:
+            for key in [k for k in self.entries if match(k)]:
+                self.nbytes -= self.entries.pop(key)[1]
+
+    def stats(self):
+        with self._lock:
+            kinds = {}
+            for key, (_, nbytes) in self.entries.items():
+                kind = kinds.setdefault(key[0], {"entries": 0, "mb": 0.0})
+                kind["entries"] += 1
+                kind["mb"] += nbytes / 1e6
+            return {
+                "entries": len(self.entries),
+                "mb": round(self.nbytes / 1e6, 1),
+                "budget_mb": round(self.max_bytes / 1e6, 1),
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "by_kind": {k: {"entries": v["entries"], "mb": round(v["mb"], 1)} for k, v in kinds.items()},
+            }
+
+
+##########################################
+          # RESULTS SERVICE #
+##########################################
+
+def _merge(base, overrides):
+    """Deep-merge overrides into a copy of base."""
+    merged = copy.deepcopy(base)
+    for key, value in (overrides or {}).items():
+        if isinstance(value, dict) and isinstance(merged.get(key), dict):
+            merged[key] = _merge(merged[key], value)
+        else:
+            merged[key] = value
+    return merged
+
+
+class ResultsService:
+    """
+    The state a long-lived post-processing service keeps warm:
+    - the settings files, reread only when they change on disk;
+    - the runs found under the output root (see scan);
+    - parsed scenario results (outputs.ScenarioResults, loaded lazily as
+      plots ask for them) and rendered figures, in one LRU cache with a
+      memory budget.
+
+    Figures are rendered from the same plot jobs main.py builds (see
+    outputs.OUTPUTS), with plot settings optionally overridden per request.
+    """
+
+    def __init__(self, project_root: Path, output_root: Path, memory_mb=DEFAULT_MEMORY_MB, warm=True):
+        self.project_root = Path(project_root)
+        self.output_root = Path(output_root)
+        self.cache = LRUCache(int(memory_mb * 1e6))
+        self.warm = warm
+        self.runs = {}  # run_id -> {scenario: scenario folder}
+        self.scratch = Path(tempfile.mkdtemp(prefix="genx_server_"))
+        self._settings_mtimes = None
+        self._settings_lock = threading.Lock()
+        self._scan_lock = threading.Lock()
+        self._scenario_locks = {}
+        self.reload_settings()
+
+    # ----- settings -----
+
+    def _settings_files(self):
+        files = [self.project_root / "input" / "simulation_settings.json"]
+        files += sorted((self.project_root / "input" / "plot_settings").glob("*.json"))
+        return files
+
+    def reload_settings(self):
+        """
+        Reread simulation_settings.json and plot_settings/*.json if any of
+        them changed. A change of simulation settings drops the cached
+        results, which were loaded with the old ones.
+        """
+        with self._settings_lock:
+            mtimes = {str(p): p.stat().st_mtime_ns for p in self._settings_files()}
+            if mtimes == self._settings_mtimes:
+                return False
+            with (self.project_root / "input" / "simulation_settings.json").open("r") as f:
+                simulation_settings = json.load(f)
+            if self._settings_mtimes is not None and simulation_settings != self.simulation_settings:
+                self.cache.discard(lambda key: True)
+            self.simulation_settings = simulation_settings
+            self.plot_settings = load_plot_settings(self.project_root)
+            self._settings_mtimes = mtimes
+            return True
+
+    # ----- runs -----
+
+    def scan(self):
+        """
+        Pick up new runs (and drop deleted ones) under the output root. Only
+        finished runs (with metadata.txt) are taken; with warm=True their
+        result CSVs are converted to columnar copies right away, so the
+        first plot request reads those instead of parsing CSVs.
+        Returns the (run_id, scenario) pairs added.
+        """
+        added = []
+        with self._scan_lock:
+            found = set()
+            if self.output_root.is_dir():
+                for run_dir in sorted(self.output_root.iterdir()):
+                    if not run_dir.is_dir() or run_dir.name.startswith("."):
+                        continue
+                    found.add(run_dir.name)
+                    if run_dir.name in self.runs or not (run_dir / RUN_COMPLETE_MARKER).exists():
+                        continue
+                    scenarios = {
+                        p.name: p for p in sorted(run_dir.iterdir()) if (p / "results").is_dir()
+                    }
+                    if not scenarios:
+                        continue
+                    self.runs[run_dir.name] = scenarios
+                    added += [(run_dir.name, scen) for scen in scenarios]
+
+            for run_id in [r for r in self.runs if r not in found]:
+                del self.runs[run_id]
+                self.cache.discard(lambda key: key[1] == run_id)
+                print(f"Run {run_id} removed")
+
+        for run_id, scen in added:
+            if self.warm and self.simulation_settings.get("use_result_cache", 1) == 1:
+                # Never alongside a request loading (and caching) the same files
+                with self._lock_for((run_id, scen)):
+                    ingest_results_dir(self.runs[run_id][scen] / "results",
+                                       float32=self.simulation_settings.get("result_cache_float32", 0) == 1)
+        if added:
+            new_runs = sorted({run_id for run_id, _ in added})
+            print(f"Ingested {len(added)} scenario(s) from run(s) {', '.join(new_runs)}")
+        return added
+
+    def run_list(self):
+        """{run_id: [scenarios]}, copied under the scan lock (the watcher may be adding runs)."""
+        with self._scan_lock:
+            return {run: list(scens) for run, scens in self.runs.items()}
+
+    def scenario_dir(self, run_id, scen):
+        if run_id not in self.runs:
+            self.scan()
+        try:
+            return self.runs[run_id][scen]
+        except KeyError:
+            raise KeyError(f"No scenario '{scen}' in run '{run_id}'") from None
+
+    def _lock_for(self, key):
+        with self._scan_lock:
+            return self._scenario_locks.setdefault(key, threading.Lock())
+
+    def results(self, run_id, scen):
+        """The cached ScenarioResults of one scenario (created on first use)."""
+        key = ("results", run_id, scen)
+        results = self.cache.get(key)
+        if results is None:
+            results = ScenarioResults(scen, self.scenario_dir(run_id, scen), self.simulation_settings)
+            self.cache.put(key, results, 0)
+        return results
+
+    def _account(self, run_id, scen, results):
+        nbytes = sum(estimate_nbytes(results.__dict__[name]) for name in RESULTS if name in results.__dict__)
+        self.cache.put(("results", run_id, scen), results, nbytes)
+
+    # ----- figures -----
+
+    def _settings_key(self, output, plot_overrides):
+        section = OUTPUTS[output]["plot_settings"]
+        return json.dumps([self.plot_settings.get(section), plot_overrides or {}], sort_keys=True, default=str)
+
+    def plot_jobs(self, run_id, scen, output, plot_overrides=None):
+        """
+        Build the plot jobs of one output (e.g. "power plot") of one
+        scenario, with plot_overrides merged into its plot settings file.
+        Returns {figure name: job}; cached per settings, so the other
+        figures of the same plot need no rebuild.
+        """
+        if output not in OUTPUTS or "plot_settings" not in OUTPUTS[output]:
+            plots = [name for name, entry in OUTPUTS.items() if "plot_settings" in entry]
+            raise KeyError(f"Unknown plot '{output}' (expected one of: {', '.join(plots)})")
+        self.reload_settings()
+        key = ("jobs", run_id, scen, output, self._settings_key(output, plot_overrides))
+        jobs = self.cache.get(key)
+        if jobs is not None:
+            return jobs
+
+        section = OUTPUTS[output]["plot_settings"]
+        plot_settings = dict(self.plot_settings)
+        plot_settings[section] = _merge(plot_settings.get(section, {}), plot_overrides)
+
+        scratch = self.scratch / run_id / scen
+
+        def scratch_dir(*parts):
+            path = scratch.joinpath(*parts)
+            os.makedirs(path, exist_ok=True)
+            return path
+
+        ctx = {
+            "simulation_settings": self.simulation_settings,
+            "plot_settings": plot_settings,
+            "sim_id": f"{run_id}_{scen}",
+            "plot_dir": lambda kind: scratch_dir("plots", kind),
+            "summary_dir": lambda: scratch_dir("summary"),
+        }
+        # One scenario's results are loaded by one request at a time
+        with self._lock_for((run_id, scen)):
+            results = self.results(run_id, scen)
+            jobs = OUTPUTS[output]["build"](results, ctx).get("plot_jobs", [])
+            self._account(run_id, scen, results)
+        jobs = {Path(job["filename"]).stem.replace(f"{run_id}_{scen}_", "", 1): job for job in jobs}
+        self.cache.put(key, jobs, estimate_nbytes(jobs, depth=5))
+        return jobs
+
+    def figure(self, run_id, scen, output, name, plot_overrides=None, format="png"):
+        """
+        One rendered figure (encoded bytes), from the cache when the same
+        figure was rendered before with the same settings.
+        """
+        if output not in OUTPUTS or "plot_settings" not in OUTPUTS[output]:
+            return self.plot_jobs(run_id, scen, output)  # raises KeyError listing the plots
+        self.reload_settings()
+        key = ("figure", run_id, scen, output, name, format, self._settings_key(output, plot_overrides))
+        image = self.cache.get(key)
+        if image is None:
+            jobs = self.plot_jobs(run_id, scen, output, plot_overrides)
+            if name not in jobs:
+                raise KeyError(f"No figure '{name}' in {output} (available: {', '.join(jobs)})")
+            image = render_job_bytes(jobs[name], format=format)
+            self.cache.put(key, image, len(image))
+        return image
+
+    def watch(self, interval=DEFAULT_WATCH_INTERVAL, stop=None):
+        """Scan the output root now and every `interval` seconds until stop is set."""
+        stop = stop or threading.Event()
+        while True:
+            try:
+                self.scan()
+            except OSError as e:
+                print(f"Warning: scanning {self.output_root} failed: {e}")
+            if stop.wait(interval):
+                return
+
+
+##########################################
+              # HTTP API #
+##########################################
+
+def _output_name(text):
+    """URL path part -> output name ("power-plot" or "power%20plot" -> "power plot")."""
+    return unquote(text).replace("-", " ").replace("_", " ")
+
+
+class RequestHandler(BaseHTTPRequestHandler):
+    """
+    GET  /runs                                    runs and their scenarios
+    GET  /runs/<run>/<scenario>                   plots available, results loaded
+    GET  /figures/<run>/<scenario>/<plot>         figure names of one plot
+    GET  /plot/<run>/<scenario>/<plot>/<figure>   the figure (?format=svg,
+                                                  ?settings=<JSON overrides>)
+    POST /plot/<run>/<scenario>/<plot>/<figure>   same, overrides as the JSON body
+    GET  /stats                                   cache statistics
+    POST /reload                                  rescan runs, reread settings
+    """
+
+    service = None  # ResultsService, set by serve()
+
+    def address_string(self):
+        # Unix sockets have no client address
+        return self.client_address[0] if self.client_address else "local"
+
+    def _send(self, status, body, content_type="application/json"):
+        if content_type == "application/json":
+            body = json.dumps(body, indent=2, default=str).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _route(self, overrides=None):
+        url = urlparse(self.path)
+        parts = [p for p in url.path.split("/") if p]
+        query = parse_qs(url.query)
+        service = self.service
+        t0 = time.perf_counter()
+        try:
+            if parts == ["runs"]:
+                service.scan()
+                return self._send(200, service.run_list())
+            if parts == ["stats"]:
+                return self._send(200, {"runs": len(service.runs), "cache": service.cache.stats()})
+            if parts == ["reload"]:
+                return self._send(200, {"settings_changed": service.reload_settings(),
+                                        "added": service.scan()})
+            if len(parts) == 3 and parts[0] == "runs":
+                service.scenario_dir(parts[1], parts[2])
+                results = service.cache.get(("results", parts[1], parts[2]))
+                return self._send(200, {
+                    "plots": [name for name, entry in OUTPUTS.items() if "plot_settings" in entry],
+                    "loaded": results.loaded if results is not None else [],
+                })
+            if len(parts) == 4 and parts[0] == "figures":
+                jobs = service.plot_jobs(parts[1], parts[2], _output_name(parts[3]), overrides)
+                return self._send(200, list(jobs))
+            if len(parts) == 5 and parts[0] == "plot":
+                if overrides is None and "settings" in query:
+                    overrides = json.loads(query["settings"][0])
+                image_format = query.get("format", ["png"])[0]
+                if image_format not in IMAGE_TYPES:
+                    return self._send(400, {"error": f"Unknown format '{image_format}'"})
+                image = service.figure(parts[1], parts[2], _output_name(parts[3]), unquote(parts[4]),
+                                       overrides, image_format)
+                self._send(200, image, IMAGE_TYPES[image_format])
+                print(f"{self.command} {url.path} ({(time.perf_counter() - t0) * 1000:.0f} ms)")
+                return None
+            return self._send(404, {"error": f"Unknown path {url.path}", "usage": self.__doc__})
+        except KeyError as e:
+            return self._send(404, {"error": str(e.args[0]) if e.args else str(e)})
+        except (ValueError, FileNotFoundError) as e:
+            return self._send(400, {"error": str(e)})
+        except (BrokenPipeError, ConnectionResetError):
+            return None  # the client went away; nobody to answer
+        except Exception as e:
+            # Anything else (e.g. a figure that fails to render) still gets an answer
+            print(f"{self.command} {url.path} failed: {type(e).__name__}: {e}")
+            return self._send(500, {"error": f"{type(e).__name__}: {e}"})
+
+    def do_GET(self):
+        self._route()
+
+    def do_POST(self):
+        length = int(self.headers.get("Content-Length") or 0)
+        body = self.rfile.read(length) if length else b""
+        try:
+            overrides = json.loads(body) if body else None
+        except json.JSONDecodeError as e:
+            return self._send(400, {"error": f"Body is not JSON: {e}"})
+        self._route(overrides)
+
+    def log_message(self, format, *args):
+        pass  # figure requests print their own timing line
+
+
+def serve(service, port=DEFAULT_PORT, host="127.0.0.1", socket_path=None, watch_interval=DEFAULT_WATCH_INTERVAL):
+    """
+    Serve the HTTP API on host:port (or on a Unix socket) until interrupted,
+    watching the output root for new runs in the background.
+    """
+    RequestHandler.service = service
+    if socket_path is not None:
+        if os.path.exists(socket_path):
+            os.unlink(socket_path)
+
+        class UnixHTTPServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+            daemon_threads = True
+
+        server = UnixHTTPServer(socket_path, RequestHandler)
+        where = socket_path
+    else:
+        server = ThreadingHTTPServer((host, port), RequestHandler)
+        where = f"http://{host}:{port}"
+
+    stop = threading.Event()
+    watcher = threading.Thread(target=service.watch, args=(watch_interval, stop), daemon=True)
+    watcher.start()
+    print(f"Serving {service.output_root} on {where} (cache budget {service.cache.max_bytes / 1e6:.0f} MB)")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        stop.set()
+        server.server_close()
+        if socket_path is not None and os.path.exists(socket_path):
+            os.unlink(socket_path)
+
+
+if __name__ == "__main__":
+    # Keep parsed results and rendered figures in memory between requests:
+    #   python src/server.py
+    #   curl -o power.png localhost:8765/plot/<run>/s1/power-plot/Power_Zone-NY_Z_A_ByTech
+    project_root = Path(__file__).resolve().parents[1]
+    with (project_root / "input" / "simulation_settings.json").open("r") as f:
+        default_output = project_root / json.load(f).get("save_path", "output")
+
+    parser = argparse.ArgumentParser(description="Serve plots of past runs from warm in-memory caches.")
+    parser.add_argument("--output", type=Path, default=default_output, help="Output root to serve and watch.")
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--socket", help="Serve on this Unix socket instead of TCP.")
+    parser.add_argument("--memory-mb", type=float, default=DEFAULT_MEMORY_MB,
+                        help="Memory budget of the results and figure cache.")
+    parser.add_argument("--watch-interval", type=float, default=DEFAULT_WATCH_INTERVAL,
+                        help="Seconds between scans for new runs.")
+    parser.add_argument("--no-warm", action="store_true",
+                        help="Do not convert new runs' CSVs to columnar copies on arrival.")
+    args = parser.parse_args()
+
+    if args.socket is not None and not hasattr(socketserver, "UnixStreamServer"):
+        sys.exit("Unix sockets are not available on this platform; use --port.")
+    service = ResultsService(project_root, args.output, memory_mb=args.memory_mb, warm=not args.no_warm)
+    serve(service, port=args.port, host=args.host, socket_path=args.socket, watch_interval=args.watch_interval)
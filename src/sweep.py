@@ -0,0 +1,329 @@
+import argparse
+import itertools
+import json
+import os
+import shutil
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from harvest import GENX_OUTPUT_DIRS
+
+
+# Written into every generated case: its parameter values. Also marks the
+# folder as generated, so it may be deleted and regenerated.
+CASE_MARKER = "sweep_case.json"
+
+# Overview of all cases of a sweep, in the sweep folder
+MANIFEST_NAME = "sweep.csv"
+
+LINK_MODES = ("symlink", "hardlink", "copy")
+
+
+##########################################
+          # PARAMETER SETS #
+##########################################
+
+def _grid_values(param):
+    if "values" in param:
+        return list(param["values"])
+    if "range" in param:
+        low, high = param["range"]
+        return list(np.linspace(low, high, param.get("points", 3)))
+    raise ValueError(f"Sweep parameter '{param['name']}' needs 'values' or 'range'.")
+
+
+def expand_sweep(parameters, method="grid", samples=10, seed=0):
+    """
+    List of {parameter name: value}, one per case.
+
+    - "grid": every combination of the parameters' "values" (a "range"
+      [low, high] is split into "points" values, default 3).
+    - "lhs": Latin hypercube of `samples` cases. Every parameter's range is
+      cut into `samples` equal strata and each stratum is used exactly once;
+      a "values" list is sampled the same way over its positions.
+    """
+    names = [p["name"] for p in parameters]
+    if method == "grid":
+        return [dict(zip(names, combo)) for combo in itertools.product(*(_grid_values(p) for p in parameters))]
+
+    if method != "lhs":
+        raise ValueError(f"Unknown sweep method '{method}' (expected 'grid' or 'lhs').")
+
+    rng = np.random.default_rng(seed)
+    columns = {}
+    for param in parameters:
+        u = (rng.permutation(samples) + rng.random(samples)) / samples
+        if "range" in param:
+            low, high = param["range"]
+            columns[param["name"]] = list(low + u * (high - low))
+        elif "values" in param:
+            values = list(param["values"])
+            columns[param["name"]] = [values[int(x * len(values))] for x in u]
+        else:
+            raise ValueError(f"Sweep parameter '{param['name']}' needs 'values' or 'range'.")
+    return [{name: columns[name][i] for name in names} for i in range(samples)]
+
+
+##########################################
+            # FILE EDITS #
+##########################################
+
+def _targets(param):
+    """The file edits a parameter drives: its "targets" list, or itself."""
+    return param.get("targets", [param])
+
+
+def _python_value(value):
+    """NumPy scalars -> plain Python (for JSON and YAML text)."""
+    return value.item() if isinstance(value, np.generic) else value
+
+
+def edit_csv(table, target, value):
+    """
+    Set (mode "set", default) or multiply (mode "scale") target["column"]
+    of a CSV table read as text. "where" ({column: value or [values]})
+    limits the edit to matching rows. Untouched cells keep their exact text.
+    """
+    column = target["column"]
+    if column not in table.columns:
+        raise KeyError(f"{target['file']}: no column '{column}'.")
+    rows = np.ones(len(table), dtype=bool)
+    for where_column, allowed in target.get("where", {}).items():
+        allowed = allowed if isinstance(allowed, list) else [allowed]
+        rows &= table[where_column].isin([str(a) for a in allowed]).to_numpy()
+
+    if target.get("mode", "set") == "scale":
+        current = pd.to_numeric(table.loc[rows, column], errors="coerce")
+        table.loc[rows, column] = [f"{v:.12g}" for v in current * float(value)]
+    else:
+        table.loc[rows, column] = str(_python_value(value))
+    return table
+
+
+def read_settings_yml(path):
+    """Top-level "Key: value" pairs of a GenX settings file."""
+    settings = {}
+    if not Path(path).exists():
+        return settings
+    with Path(path).open("r") as f:
+        for line in f:
+            if line.startswith((" ", "\t", "#")):
+                continue
+            key, sep, value = line.split("#", 1)[0].partition(":")
+            if sep:
+                settings[key.strip()] = value.strip().strip('"')
+    return settings
+
+
+def edit_settings_yml(text, key, value):
+    """
+    Set a top-level "Key: value" line of a GenX settings file (added if
+    missing); every other line is kept as is.
+    """
+    value = _python_value(value)
+    if isinstance(value, bool):
+        value = str(value).lower()
+    lines = text.splitlines()
+    for i, line in enumerate(lines):
+        if not line.startswith((" ", "\t", "#")) and line.split(":", 1)[0].strip() == key:
+            lines[i] = f"{key}: {value}"
+            break
+    else:
+        lines.append(f"{key}: {value}")
+    return "\n".join(lines) + "\n"
+
+
+def write_edited_files(base_case, case_dir, case_values, parameters):
+    """
+    Write every file a parameter edits into case_dir, with the case's
+    values applied. Returns the set of relative paths written.
+    """
+    edits = {}
+    for param in parameters:
+        for target in _targets(param):
+            edits.setdefault(target["file"], []).append((target, case_values[param["name"]]))
+
+    for rel_path, file_edits in edits.items():
+        source = base_case / rel_path
+        dest = case_dir / rel_path
+        os.makedirs(dest.parent, exist_ok=True)
+        if source.suffix in (".yml", ".yaml"):
+            text = source.read_text()
+            for target, value in file_edits:
+                text = edit_settings_yml(text, target["key"], value)
+            dest.write_text(text)
+        else:
+            table = pd.read_csv(source, dtype=str, keep_default_na=False)
+            for target, value in file_edits:
+                table = edit_csv(table, target, value)
+            table.to_csv(dest, index=False)
+    return set(edits)
+
+
+##########################################
+          # CASE MATERIALIZATION #
+##########################################
+
+def _link(source, dest, link):
+    """
+    Symlink (relative, so the project folder can move) or hardlink dest to
+    source; copies when links are not possible (other device, Windows
+    without symlink rights, ...).
+    """
+    try:
+        if link == "symlink":
+            os.symlink(os.path.relpath(source, dest.parent), dest)
+            return "linked"
+        if link == "hardlink":
+            os.link(source, dest)
+            return "linked"
+    except OSError:
+        pass
+    shutil.copy2(source, dest)
+    return "copied"
+
+
+def _clear_case(case_dir, keep_outputs):
+    """
+    Remove the inputs of an earlier generated case folder. Its GenX output
+    folders are kept if keep_outputs, so results of a solve that was not
+    harvested yet survive (see genx_runner.completed_solve).
+    Returns the number of output folders kept.
+    """
+    kept = 0
+    for item in case_dir.iterdir():
+        if item.name == CASE_MARKER:
+            continue  # rewritten last, so an interrupted rebuild can be redone
+        if item.is_dir() and not item.is_symlink():
+            if keep_outputs and item.name in GENX_OUTPUT_DIRS:
+                kept += 1
+                continue
+            shutil.rmtree(item)
+        else:
+            item.unlink()
+    return kept
+
+
+def materialize_case(base_case, case_dir, case_values, parameters, link="symlink"):
+    """
+    Build one GenX case folder: files edited by the parameters are written,
+    every other input file is linked to the base case. Folders are real, so
+    GenX writes its results into the case folder, never into the base case.
+    GenX output folders (results/, TDR_results/, ...) of the base case are
+    not carried over.
+
+    An existing generated case is rebuilt in place: its inputs are written
+    and linked again, and its GenX output folders are kept when its
+    parameter values have not changed (deleted otherwise, since they belong
+    to other inputs). Returns {"written", "linked", "copied", "kept"} counts.
+    """
+    base_case = Path(base_case).resolve()
+    case_dir = Path(case_dir)
+    case_values = {k: _python_value(v) for k, v in case_values.items()}
+    kept = 0
+    if case_dir.exists():
+        marker_path = case_dir / CASE_MARKER
+        if not marker_path.exists():
+            raise FileExistsError(f"{case_dir} exists and was not generated by a sweep; not overwriting it.")
+        try:
+            with marker_path.open("r") as f:
+                previous_values = json.load(f)
+        except (OSError, json.JSONDecodeError):
+            previous_values = None
+        kept = _clear_case(case_dir, previous_values == json.loads(json.dumps(case_values)))
+    os.makedirs(case_dir, exist_ok=True)
+
+    written = write_edited_files(base_case, case_dir, case_values, parameters)
+    counts = {"written": len(written), "linked": 0, "copied": 0, "kept": kept}
+
+    for root, dirnames, files in os.walk(base_case):
+        rel_root = Path(root).relative_to(base_case)
+        if rel_root == Path("."):
+            dirnames[:] = [d for d in dirnames if d not in GENX_OUTPUT_DIRS]
+        dirnames[:] = [d for d in dirnames if not d.startswith(".")]
+        os.makedirs(case_dir / rel_root, exist_ok=True)
+        for name in files:
+            rel_path = (rel_root / name).as_posix()
+            if name.startswith(".") or rel_path in written:
+                continue
+            counts[_link(Path(root) / name, case_dir / rel_root / name, link)] += 1
+
+    with (case_dir / CASE_MARKER).open("w") as f:
+        json.dump(case_values, f, indent=2)
+    return counts
+
+
+def generate_sweep(sweep_cfg, genx_inputs_dir: Path):
+    """
+    Expand the "sweep" section of simulation_settings.json into GenX case
+    folders under <sweep_dir>/<name>/<name>_<i>. Returns (sweep folder,
+    list of case names), ready for run_genx_cases.
+    """
+    genx_inputs_dir = Path(genx_inputs_dir)
+    name = sweep_cfg.get("name", "sweep")
+    base_case = genx_inputs_dir / sweep_cfg["base_case"]
+    sweep_root = genx_inputs_dir / sweep_cfg.get("sweep_dir", "sweeps") / name
+    parameters = sweep_cfg["parameters"]
+    link = sweep_cfg.get("link", "symlink")
+    if link not in LINK_MODES:
+        raise ValueError(f"Unknown sweep link mode '{link}' (expected one of {', '.join(LINK_MODES)}).")
+    if not base_case.is_dir():
+        raise FileNotFoundError(f"Sweep base case not found: {base_case}")
+
+    cases = expand_sweep(
+        parameters,
+        method=sweep_cfg.get("method", "grid"),
+        samples=sweep_cfg.get("samples", 10),
+        seed=sweep_cfg.get("seed", 0),
+    )
+    width = len(str(len(cases) - 1))
+
+    t0 = time.perf_counter()
+    os.makedirs(sweep_root, exist_ok=True)
+    totals = {"written": 0, "linked": 0, "copied": 0, "kept": 0}
+    manifest = []
+    for i, case_values in enumerate(cases):
+        case_name = f"{name}_{i:0{width}d}"
+        counts = materialize_case(base_case, sweep_root / case_name, case_values, parameters, link)
+        for key in totals:
+            totals[key] += counts[key]
+        manifest.append({"case": case_name, **{k: _python_value(v) for k, v in case_values.items()}})
+
+    # Remove generated cases that are no longer part of the sweep
+    case_names = {row["case"] for row in manifest}
+    for stale in sweep_root.iterdir():
+        if stale.is_dir() and stale.name not in case_names and (stale / CASE_MARKER).exists():
+            shutil.rmtree(stale)
+
+    pd.DataFrame(manifest).to_csv(sweep_root / MANIFEST_NAME, index=False)
+    print(f"Sweep '{name}': {len(cases)} case(s) from {base_case.name} in {sweep_root} "
+          f"({totals['written']} files written, {totals['linked']} linked, {totals['copied']} copied, "
+          f"{totals['kept']} GenX output folder(s) kept; "
+          f"{time.perf_counter() - t0:.1f} s)")
+    return sweep_root, [row["case"] for row in manifest]
+
+
+if __name__ == "__main__":
+    # Generate the sweep cases defined in simulation_settings.json without
+    # running GenX, e.g. to inspect them first:
+    #   python src/sweep.py
+    parser = argparse.ArgumentParser(description="Generate the GenX cases of the sweep in simulation_settings.json.")
+    parser.add_argument("--list", action="store_true", help="Only print the parameter values of each case.")
+    args = parser.parse_args()
+
+    project_root = Path(__file__).resolve().parents[1]
+    with (project_root / "input" / "simulation_settings.json").open("r") as f:
+        settings = json.load(f)
+    sweep_cfg = settings.get("sweep")
+    if not sweep_cfg:
+        raise SystemExit("simulation_settings.json has no 'sweep' section.")
+
+    if args.list:
+        cases = expand_sweep(sweep_cfg["parameters"], sweep_cfg.get("method", "grid"),
+                             sweep_cfg.get("samples", 10), sweep_cfg.get("seed", 0))
+        print(pd.DataFrame(cases).to_string())
+    else:
+        generate_sweep(sweep_cfg, project_root / settings["genx"]["genx_inputs_dir"])
@@ -0,0 +1,217 @@
+import argparse
+import os
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+
+# Zone names of the NYS model, in GenX zone ID order. Bigger synthetic
+# systems continue with PJM_Z<n> (same two-token shape as PJM_EMAC).
+BASE_ZONES = [
+    "NENG_Rest", "NY_Z_A", "NY_Z_B", "NY_Z_C&E", "NY_Z_D", "NY_Z_F",
+    "NY_Z_G-I", "NY_Z_J", "NY_Z_K", "PJM_EMAC", "PJM_Rest",
+]
+
+TECHS = [
+    "conventional_hydroelectric", "conventional_steam_coal", "natural_gas_fired_combined_cycle",
+    "natural_gas_fired_combustion_turbine", "natural_gas_steam_turbine", "nuclear",
+    "onshore_wind_turbine", "landbasedwind_class1_moderate", "utilitypv_class1_moderate",
+    "solar_photovoltaic", "battery_moderate", "hydroelectric_pumped_storage", "biomass",
+    "small_hydroelectric", "distributed_generation",
+]
+
+# Rows written per to_csv call, so generating a large case never holds the
+# whole table in memory
+WRITE_CHUNK_ROWS = 2000
+
+# Benchmark scales: zones, resources, hours
+SCALES = {
+    "small": {"zones": 11, "resources": 200, "hours": 8760},
+    "medium": {"zones": 30, "resources": 1000, "hours": 8760},
+    "large": {"zones": 100, "resources": 10000, "hours": 8760},
+    "multiyear": {"zones": 100, "resources": 10000, "hours": 3 * 8760},
+}
+
+
+##########################################
+          # NAMES AND SHAPES #
+##########################################
+
+def zone_names(n_zones):
+    return [BASE_ZONES[i] if i < len(BASE_ZONES) else f"PJM_Z{i + 1}" for i in range(n_zones)]
+
+
+def resource_table(n_zones, n_resources, rng):
+    """
+    Synthetic resources as a DataFrame (Resource, Zone, tech, capacity),
+    named <zone>_<tech>_<unit> like PowerGenome/GenX resources.
+    """
+    zones = zone_names(n_zones)
+    zone_ids = np.sort(rng.integers(0, n_zones, n_resources))
+    zone_ids[:n_zones] = np.arange(min(n_zones, n_resources))  # every zone has a resource
+    zone_ids.sort()
+    techs = rng.integers(0, len(TECHS), n_resources)
+
+    names, seen = [], {}
+    for z, t in zip(zone_ids, techs):
+        base = f"{zones[z]}_{TECHS[t]}"
+        seen[base] = seen.get(base, 0) + 1
+        names.append(f"{base}_{seen[base]}")
+
+    return pd.DataFrame({
+        "Resource": names,
+        "Zone": zone_ids + 1,
+        "tech": [TECHS[t] for t in techs],
+        "capacity": rng.gamma(2.0, 250.0, n_resources).round(1),
+    })
+
+
+def _profiles(n_rows, start, capacity, phase, rng):
+    """
+    Hourly values for rows [start, start + n_rows): a daily cycle (one phase
+    per column) plus noise from rng, scaled by capacity.
+    """
+    hours = np.arange(start, start + n_rows)[:, None]
+    cycle = 0.5 + 0.4 * np.sin(2 * np.pi * hours / 24 + phase)
+    noise = rng.uniform(-0.1, 0.1, (n_rows, len(phase)))
+    return np.clip(cycle + noise, 0, 1) * capacity
+
+
+def _write_timeseries(path, label, columns, header_rows, n_hours, make_chunk):
+    """
+    Write a GenX time-series CSV: column header, header rows
+    ({label: values}), then t1 .. t<n_hours>, streamed in chunks.
+    make_chunk(start, n_rows) returns the (n_rows, len(columns)) values.
+    """
+    with open(path, "w", newline="") as f:
+        f.write(",".join([label] + [str(c) for c in columns]) + "\n")
+        for row_label, values in header_rows.items():
+            f.write(",".join([row_label] + [repr(float(v)) if not isinstance(v, str) else v for v in values]) + "\n")
+        for start in range(0, n_hours, WRITE_CHUNK_ROWS):
+            n_rows = min(WRITE_CHUNK_ROWS, n_hours - start)
+            chunk = pd.DataFrame(
+                make_chunk(start, n_rows),
+                index=[f"t{i}" for i in range(start + 1, start + n_rows + 1)],
+            )
+            chunk.to_csv(f, header=False, float_format="%.6g")
+
+
+##########################################
+          # CASE GENERATOR #
+##########################################
+
+def generate_results(results_dir, n_zones=11, n_resources=200, n_hours=8760, seed=0):
+    """
+    Write a synthetic GenX results/ folder with the real file layouts:
+    power.csv (Zone + AnnualSum header rows, Total column), emissions.csv
+    (AnnualSum row), flow.csv (no header rows), capacity.csv (with a Total
+    row), time_weights.csv, status.csv and run_settings.yml.
+
+    Returns the resource table. No Julia needed.
+    """
+    results_dir = Path(results_dir)
+    os.makedirs(results_dir, exist_ok=True)
+    rng = np.random.default_rng(seed)
+    resources = resource_table(n_zones, n_resources, rng)
+    capacity = resources["capacity"].to_numpy()
+    n_lines = max(1, n_zones - 1)
+    power_phase = rng.uniform(0, 2 * np.pi, n_resources)
+    emissions_phase = rng.uniform(0, 2 * np.pi, n_zones)
+    flow_phase = rng.uniform(0, 2 * np.pi, n_lines)
+
+    # power.csv: the Total column and AnnualSum row need a first pass over
+    # the same deterministic values, so each chunk is regenerated from its seed
+    def power_chunk(start, n_rows):
+        chunk_rng = np.random.default_rng([seed, start])
+        values = _profiles(n_rows, start, capacity, power_phase, chunk_rng)
+        return np.column_stack([values, values.sum(axis=1)])
+
+    annual = np.zeros(n_resources + 1)
+    for start in range(0, n_hours, WRITE_CHUNK_ROWS):
+        annual += power_chunk(start, min(WRITE_CHUNK_ROWS, n_hours - start)).sum(axis=0)
+
+    _write_timeseries(
+        results_dir / "power.csv", "Resource", list(resources["Resource"]) + ["Total"],
+        {"Zone": list(resources["Zone"].astype(str)) + ["n/a"], "AnnualSum": annual},
+        n_hours, power_chunk,
+    )
+
+    # emissions.csv: one column per zone ID plus Total
+    zone_intensity = rng.uniform(0.05, 0.5, n_zones)
+
+    def emissions_chunk(start, n_rows):
+        chunk_rng = np.random.default_rng([seed, start, 1])
+        values = _profiles(n_rows, start, 1000.0 * zone_intensity, emissions_phase, chunk_rng)
+        return np.column_stack([values, values.sum(axis=1)])
+
+    annual = np.zeros(n_zones + 1)
+    for start in range(0, n_hours, WRITE_CHUNK_ROWS):
+        annual += emissions_chunk(start, min(WRITE_CHUNK_ROWS, n_hours - start)).sum(axis=0)
+
+    _write_timeseries(
+        results_dir / "emissions.csv", "Zone", [str(z) for z in range(1, n_zones + 1)] + ["Total"],
+        {"AnnualSum": annual}, n_hours, emissions_chunk,
+    )
+
+    # flow.csv: one column per line, no header rows
+    line_limits = rng.uniform(200, 3000, n_lines)
+
+    def flow_chunk(start, n_rows):
+        chunk_rng = np.random.default_rng([seed, start, 2])
+        return _profiles(n_rows, start, 2 * line_limits, flow_phase, chunk_rng) - line_limits
+
+    _write_timeseries(results_dir / "flow.csv", "Line", [str(i) for i in range(1, n_lines + 1)], {},
+                      n_hours, flow_chunk)
+
+    # capacity.csv: plain table with a Total row
+    capacity_table = pd.DataFrame({
+        "Resource": resources["Resource"],
+        "Zone": resources["Zone"],
+        "Retrofit_Id": "None",
+        "StartCap": capacity,
+        "RetCap": 0.0,
+        "NewCap": 0.0,
+        "EndCap": capacity,
+    })
+    total = pd.DataFrame([{"Resource": "Total", "Zone": "n/a", "Retrofit_Id": "n/a", "StartCap": capacity.sum(),
+                           "RetCap": 0.0, "NewCap": 0.0, "EndCap": capacity.sum()}])
+    pd.concat([capacity_table, total]).to_csv(results_dir / "capacity.csv", index=False)
+
+    pd.DataFrame({"Time": np.arange(1, n_hours + 1), "Weight": 1.0}).to_csv(
+        results_dir / "time_weights.csv", index=False
+    )
+    with open(results_dir / "status.csv", "w") as f:
+        f.write("Status,Solve,Objval\nOPTIMAL,0.0,0.0\n")
+    with open(results_dir / "run_settings.yml", "w") as f:
+        f.write(f"# synthetic case: {n_zones} zones, {n_resources} resources, {n_hours} hours, seed {seed}\n")
+
+    return resources
+
+
+def generate_scale(case_dir, scale, seed=0):
+    """
+    Write a synthetic case for one of SCALES into <case_dir>/results.
+    """
+    spec = SCALES[scale]
+    return generate_results(Path(case_dir) / "results", spec["zones"], spec["resources"], spec["hours"], seed)
+
+
+if __name__ == "__main__":
+    # Write a synthetic case, e.g.:
+    #   python src/synthetic_results.py /tmp/synthetic/s1 --scale medium
+    parser = argparse.ArgumentParser(description="Write synthetic GenX-shaped results (no Julia needed).")
+    parser.add_argument("case_dir", help="Case folder; results are written to <case_dir>/results.")
+    parser.add_argument("--scale", choices=sorted(SCALES), default="small")
+    parser.add_argument("--zones", type=int, help="Override the scale's number of zones.")
+    parser.add_argument("--resources", type=int, help="Override the scale's number of resources.")
+    parser.add_argument("--hours", type=int, help="Override the scale's number of timesteps.")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    spec = dict(SCALES[args.scale])
+    for key in ("zones", "resources", "hours"):
+        if getattr(args, key) is not None:
+            spec[key] = getattr(args, key)
+    generate_results(Path(args.case_dir) / "results", spec["zones"], spec["resources"], spec["hours"], args.seed)
+    print(f"Wrote {spec['zones']} zones / {spec['resources']} resources / {spec['hours']} hours to {args.case_dir}")
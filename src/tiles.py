@@ -0,0 +1,199 @@
+import base64
+import json
+import os
+import re
+import shutil
+from pathlib import Path
+
+import numpy as np
+
+from decimation import PERIOD_HOURS
+
+
+# Pyramid levels: name and hours per point. The hourly level stores the
+# values; coarser levels store min, mean and max of each period.
+LEVELS = [("hourly", 1), ("daily", PERIOD_HOURS["daily"]), ("weekly", PERIOD_HOURS["weekly"])]
+LEVEL_CHANNELS = {1: ["value"]}
+AGGREGATE_CHANNELS = ["min", "mean", "max"]
+
+# Points per tile along time, at every level
+DEFAULT_TILE_POINTS = 2048
+
+# Chronological hours expanded at a time for levels that cannot be built
+# from the representative periods of a time-domain-reduced run directly
+EXPAND_BLOCK_HOURS = 24 * 7 * 4
+
+# Written next to the tiles; a copy of src/tile_viewer.html
+VIEWER_TEMPLATE = Path(__file__).resolve().parent / "tile_viewer.html"
+VIEWER_NAME = "viewer.html"
+INDEX_NAME = "index"
+
+
+# Tiles are float32 (little-endian) arrays of shape (channels, series,
+# points). Browsers do not let a page opened from disk fetch() other files,
+# so each tile is wrapped in a one-line script the viewer loads with a
+# <script> tag:  GenXTiles.add("<key>", "<base64 of the float32 bytes>");
+# read_tile() decodes them in Python.
+
+
+##########################################
+            # PYRAMID #
+##########################################
+
+def _channels(step):
+    return LEVEL_CHANNELS.get(step, AGGREGATE_CHANNELS)
+
+
+def pyramid_level(values, step):
+    """
+    One pyramid level of a (points, series) array: the values themselves for
+    step 1, otherwise min / mean / max of every `step` points (the last
+    period may be shorter), for all series in one reshape. Returns an array
+    of shape (channels, series, periods).
+    """
+    values = np.asarray(values, dtype=np.float32)
+    if step == 1:
+        return values.T[None, :, :]
+    n, n_series = values.shape
+    n_periods = -(-n // step)
+    padded = np.full((n_periods * step, n_series), np.nan, dtype=np.float32)
+    padded[:n] = values
+    periods = padded.reshape(n_periods, step, n_series)
+    with np.errstate(all="ignore"):
+        levels = np.stack([np.nanmin(periods, axis=1), np.nanmean(periods, axis=1), np.nanmax(periods, axis=1)])
+    return np.ascontiguousarray(levels.transpose(0, 2, 1))
+
+
+def reduced_level(values, step, period_map):
+    """
+    A pyramid level of the chronological year of a time-domain-reduced run,
+    from its modeled values (representative periods) without expanding them
+    to the year. Returns (level, points): the level is built over the
+    representative periods and points (or None) gives, for every point of
+    the chronological level, its column in it.
+
+    When a representative period is a whole number of steps (always true
+    for the hourly level) every period is reduced once and the map picks the
+    results; otherwise the year is expanded and reduced a block of hours at a
+    time.
+    """
+    period_steps, remainder = divmod(period_map.timesteps_per_period, step)
+    if remainder == 0:
+        points = (period_map.rep_period_index[:, None] * period_steps + np.arange(period_steps)).ravel()
+        return pyramid_level(values, step), points
+    block = step * max(1, EXPAND_BLOCK_HOURS // step)
+    hour_index = period_map.hour_index
+    parts = [pyramid_level(np.asarray(values)[hour_index[start:start + block]], step)
+             for start in range(0, len(hour_index), block)]
+    return np.concatenate(parts, axis=2), None
+
+
+def _safe_name(text):
+    return re.sub(r"[^A-Za-z0-9_-]+", "_", text).strip("_") or "group"
+
+
+def write_group(out_dir, group, series_names, values, tile_points=DEFAULT_TILE_POINTS, period_map=None):
+    """
+    Write every level of one group of series (e.g. power by zone and
+    technology) as tiles under out_dir/<group>/. With a period_map the
+    values are the modeled timesteps of a time-domain-reduced run and the
+    tiles follow the chronological year (see reduced_level). Returns the
+    group's index entry and the bytes written.
+    """
+    group_id = _safe_name(group)
+    group_dir = Path(out_dir) / group_id
+    os.makedirs(group_dir, exist_ok=True)
+    n_points = len(values) if period_map is None else period_map.n_hours
+    entry = {"id": group_id, "name": group, "series": [str(s) for s in series_names], "levels": []}
+    nbytes = 0
+
+    for level_name, step in LEVELS:
+        if step > 1 and n_points <= step:
+            continue  # a single period: nothing coarser to show
+        if period_map is None:
+            level, points = pyramid_level(values, step), None
+        else:
+            level, points = reduced_level(values, step, period_map)
+        n_level = level.shape[2] if points is None else len(points)
+        n_tiles = -(-n_level // tile_points)
+        for tile in range(n_tiles):
+            tile_range = slice(tile * tile_points, (tile + 1) * tile_points)
+            data = level[:, :, tile_range] if points is None else level[:, :, points[tile_range]]
+            data = np.ascontiguousarray(data).astype("<f4")
+            payload = base64.b64encode(data.tobytes()).decode("ascii")
+            key = f"{group_id}/{level_name}/{tile}"
+            text = f'GenXTiles.add("{key}", "{payload}");\n'
+            (group_dir / f"{level_name}_{tile}.js").write_text(text)
+            nbytes += len(text)
+        entry["levels"].append({
+            "name": level_name,
+            "step": step,
+            "points": n_level,
+            "tiles": n_tiles,
+            "channels": _channels(step),
+        })
+    return entry, nbytes
+
+
+def export_tiles(out_dir, groups, n_hours, title="", chronological=True, tile_points=DEFAULT_TILE_POINTS,
+                 period_map=None):
+    """
+    Write a tiled, multi-resolution copy of the given series and the offline
+    viewer to out_dir (replaced if it exists).
+
+    groups: {group name: DataFrame or (series names, 2-D array)}, timesteps
+    on axis 0; all groups share the time axis of n_hours points.
+    chronological: True if point i is hour i of the year; False for
+    representative periods.
+    period_map: a time_domain.PeriodMap to tile the modeled series of a
+    time-domain-reduced run over the chronological year (n_hours is then
+    period_map.n_hours).
+
+    Returns {"bytes", "files", "series"}.
+    """
+    out_dir = Path(out_dir)
+    if out_dir.exists():
+        shutil.rmtree(out_dir)
+    os.makedirs(out_dir)
+
+    index = {"title": title, "hours": int(n_hours), "chronological": chronological,
+             "tile_points": tile_points, "groups": []}
+    total_bytes = 0
+    n_series = 0
+    for group, data in groups.items():
+        if data is None:
+            continue
+        if hasattr(data, "columns"):
+            names, values = [str(c) for c in data.columns], data.to_numpy()
+        else:
+            names, values = data
+        entry, nbytes = write_group(out_dir, group, names, values, tile_points, period_map)
+        index["groups"].append(entry)
+        total_bytes += nbytes
+        n_series += len(names)
+
+    index_text = json.dumps(index, indent=1)
+    (out_dir / f"{INDEX_NAME}.json").write_text(index_text)
+    (out_dir / f"{INDEX_NAME}.js").write_text(f"GenXTiles.index({index_text});\n")
+    shutil.copyfile(VIEWER_TEMPLATE, out_dir / VIEWER_NAME)
+
+    files = sum(1 for _ in out_dir.rglob("*") if _.is_file())
+    return {"bytes": total_bytes, "files": files, "series": n_series}
+
+
+def read_tile(path):
+    """
+    Decode one tile file back to its float32 array (channels, series,
+    points), using the level shape recorded in index.json next to it.
+    """
+    path = Path(path)
+    root = path.parents[1]
+    with (root / f"{INDEX_NAME}.json").open("r") as f:
+        index = json.load(f)
+    text = path.read_text()
+    key, payload = re.match(r'GenXTiles\.add\("([^"]+)", "([^"]*)"\);', text).groups()
+    group_id, level_name, _ = key.split("/")
+    group = next(g for g in index["groups"] if g["id"] == group_id)
+    level = next(lv for lv in group["levels"] if lv["name"] == level_name)
+    data = np.frombuffer(base64.b64decode(payload), dtype="<f4")
+    return data.reshape(len(level["channels"]), len(group["series"]), -1)
@@ -0,0 +1,121 @@
+import calendar
+from functools import cached_property
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+
+# Where GenX leaves the period map of a time-domain-reduced run, relative to
+# the scenario output folder (the TDR_results/ folder is harvested with the
+# results, see harvest.GENX_OUTPUT_DIRS)
+PERIOD_MAP_LOCATIONS = ["TDR_results/Period_map.csv", "results/Period_map.csv"]
+
+HOURS_PER_YEAR = 8760
+
+
+##########################################
+          # PERIOD MAP #
+##########################################
+
+class PeriodMap:
+    """
+    Maps the modeled timesteps of a time-domain-reduced GenX run back to the
+    chronological year.
+
+    With TDR, GenX models n_rep representative periods of
+    timesteps_per_period hours each (t1 .. t<n_rep * timesteps_per_period>),
+    and Period_map.csv says which representative period stands in for each
+    chronological period (Period_Index -> Rep_Period_Index).
+    """
+
+    def __init__(self, rep_period_index, timesteps_per_period):
+        """
+        rep_period_index: 1-based representative period for every
+        chronological period, in chronological order.
+        """
+        self.rep_period_index = np.asarray(rep_period_index, dtype=np.int64) - 1
+        self.timesteps_per_period = int(timesteps_per_period)
+        self.n_rep = int(self.rep_period_index.max()) + 1
+        self.n_periods = len(self.rep_period_index)
+
+    @classmethod
+    def from_csv(cls, period_map_csv, n_timesteps):
+        """
+        Read Period_map.csv. n_timesteps is the number of modeled timesteps
+        (rows of power.csv), from which the period length follows.
+        """
+        period_map = pd.read_csv(period_map_csv).sort_values("Period_Index")
+        rep_index = period_map["Rep_Period_Index"].to_numpy()
+        n_rep = int(rep_index.max())
+        if n_timesteps % n_rep != 0:
+            raise ValueError(
+                f"{period_map_csv}: {n_timesteps} modeled timesteps do not split into "
+                f"{n_rep} representative periods."
+            )
+        return cls(rep_index, n_timesteps // n_rep)
+
+    @property
+    def n_hours(self):
+        return self.n_periods * self.timesteps_per_period
+
+    @cached_property
+    def hour_index(self):
+        """
+        For every chronological hour, the 0-based modeled timestep that
+        represents it (length n_hours). Built once and shared by every series.
+        """
+        offsets = np.arange(self.timesteps_per_period)
+        return (self.rep_period_index[:, None] * self.timesteps_per_period + offsets).ravel()
+
+    def expand(self, values):
+        """
+        Chronological series for a modeled series (or 2-D array with
+        timesteps on axis 0), by fancy indexing with hour_index.
+        """
+        values = np.asarray(values)
+        return values[self.hour_index]
+
+
+def find_period_map(scenario_dir):
+    """
+    Path of the scenario's Period_map.csv, or None if the run did not use
+    time-domain reduction.
+    """
+    for rel_path in PERIOD_MAP_LOCATIONS:
+        path = Path(scenario_dir) / rel_path
+        if path.exists():
+            return path
+    return None
+
+
+##########################################
+          # WEIGHTED TOTALS #
+##########################################
+
+def weighted_totals(df, weights=None):
+    """
+    Sum over timesteps of each column of a GenX time series, weighted by
+    time_weights.csv (each modeled hour counted for the hours it stands
+    for). Unweighted if weights is None.
+    """
+    values = df.to_numpy()
+    w = np.ones(len(values)) if weights is None else np.asarray(weights, dtype=float)[:len(values)]
+    return pd.Series(np.nansum(values * w[:, None], axis=0), index=df.columns)
+
+
+##########################################
+          # CHRONOLOGICAL AXIS #
+##########################################
+
+def chronological_axis(n_hours):
+    """
+    Tick positions and labels for a chronological series: month starts for
+    a full (non-leap) year, otherwise day numbers roughly every month.
+    """
+    if n_hours == HOURS_PER_YEAR:
+        days = np.cumsum([0] + [calendar.monthrange(2001, m)[1] for m in range(1, 12)])
+        return list(days * 24), list(calendar.month_abbr[1:])
+    step = max(24, (n_hours // 12) // 24 * 24)
+    ticks = list(range(0, n_hours, step))
+    return ticks, [f"Day {t // 24 + 1}" for t in ticks]
@@ -0,0 +1,51 @@
+import os
+import stat
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "src"))
+
+from executors import LocalhostExecutor  # noqa: E402
+
+
+# Stands in for Julia: "solves" the case given as the last argument, and
+# records the folder it ran in and the case path it was given
+FAKE_JULIA = """#!/bin/sh
+for arg; do case_dir="$arg"; done
+echo "$(pwd) $case_dir" >> "{calls}"
+[ -d "$case_dir/system" ] || exit 3
+mkdir -p "$case_dir/results"
+echo "Zone,Total" > "$case_dir/results/power.csv"
+"""
+
+
+def _case(root):
+    case_dir = root / "cases" / "s1"
+    os.makedirs(case_dir / "system")
+    (case_dir / "system" / "Demand_data.csv").write_text("Time_Index,Demand_MW_z1\n1,10\n")
+    return case_dir
+
+
+def _julia(root):
+    calls = root / "calls.txt"
+    julia = root / "julia"
+    julia.write_text(FAKE_JULIA.format(calls=calls))
+    julia.chmod(julia.stat().st_mode | stat.S_IEXEC)
+    return julia, calls
+
+
+def test_relative_workdir(tmp_path, monkeypatch):
+    # A relative workdir (like the SSH default "genx_runs", relative to the
+    # remote home) must not be resolved a second time inside itself
+    monkeypatch.chdir(tmp_path)
+    case_dir = _case(tmp_path)
+    julia, calls = _julia(tmp_path)
+    executor = LocalhostExecutor(1, str(julia), str(tmp_path / "env"), workdir="genx_runs", retries=0)
+
+    result = executor.run_case("s1", case_dir, tmp_path / "s1.log")
+
+    assert result["status"] == "OK", (tmp_path / "s1.log").read_text()
+    cwd, case_arg = calls.read_text().split()
+    assert Path(cwd).parent == tmp_path / "genx_runs" and case_arg == "."
+    assert (case_dir / "results" / "power.csv").exists()
+    assert list((tmp_path / "genx_runs").iterdir()) == []  # remote copy removed
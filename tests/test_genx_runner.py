@@ -0,0 +1,38 @@
+import os
+import stat
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "src"))
+
+from genx_runner import run_scenarios  # noqa: E402
+
+
+# Stands in for a persistent Julia worker: solves one case, then crashes
+# in the middle of the next one
+CRASHING_WORKER = """#!/bin/sh
+echo started >> "{starts}"
+echo GENX_READY
+read line
+printf 'GENX_DONE\\tOK\\t0.5\\n'
+read line
+exit 1
+"""
+
+
+def test_dead_persistent_worker_is_replaced(tmp_path):
+    julia = tmp_path / "julia"
+    starts = tmp_path / "starts.txt"
+    julia.write_text(CRASHING_WORKER.format(starts=starts))
+    julia.chmod(julia.stat().st_mode | stat.S_IEXEC)
+    cases = []
+    for scen in ("a", "b", "c"):
+        os.makedirs(tmp_path / scen)
+        cases.append((scen, tmp_path / scen))
+
+    results = run_scenarios(cases, str(julia), str(tmp_path / "env"), tmp_path / "logs",
+                            max_parallel=1, persistent=True)
+
+    # b crashed its worker; c runs on a new one instead of the dead one
+    assert {scen: r["status"] for scen, r in results.items()} == {"a": "OK", "b": "FAILED", "c": "OK"}
+    assert len(starts.read_text().split()) == 2
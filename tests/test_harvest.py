@@ -0,0 +1,45 @@
+import os
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "src"))
+
+from harvest import STORE_DIR_NAME, harvest_scenario  # noqa: E402
+
+
+def _case(root):
+    case_dir = root / "case"
+    for folder in ("system", "results"):
+        os.makedirs(case_dir / folder)
+    (case_dir / "system" / "Demand_data.csv").write_text("Time_Index,Demand_MW_z1\n1,10\n")
+    (case_dir / "results" / "power.csv").write_text("Resource,a\nt1,1\n")
+    (case_dir / "notes.txt").write_text("original\n")  # not a GenX output folder: stays in the case
+    return case_dir
+
+
+def test_dedupe_never_links_files_live_in_the_case(tmp_path):
+    case_dir = _case(tmp_path)
+    out_dir = tmp_path / "output" / "run" / "s1"
+    os.makedirs(out_dir)
+    store = tmp_path / "output" / STORE_DIR_NAME
+
+    harvest_scenario(case_dir, out_dir, "move", store_root=store)
+    assert (case_dir / "notes.txt").exists() and not (case_dir / "results").exists()
+
+    # Rewriting the case's file in place must not reach the harvested copy
+    # or the store object it shares with other runs
+    with open(case_dir / "notes.txt", "w") as f:
+        f.write("edited\n")
+    assert (out_dir / "notes.txt").read_text() == "original\n"
+    assert sorted(p.read_text() for p in store.rglob("*") if p.is_file()) == ["Resource,a\nt1,1\n", "original\n"]
+
+
+def test_copy_mode_counts_copies(tmp_path):
+    case_dir = _case(tmp_path)
+    out_dir = tmp_path / "out"
+    os.makedirs(out_dir)
+
+    stats = harvest_scenario(case_dir, out_dir, "copy")
+
+    assert stats["copied"] == 2 and stats["bytes_copied"] > 0
+    assert (out_dir / "results" / "power.csv").exists()
@@ -0,0 +1,44 @@
+import os
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "src"))
+
+from planner import solver_threads_applied  # noqa: E402
+from run_cache import hash_case_inputs  # noqa: E402
+from sweep import generate_sweep  # noqa: E402
+
+
+HIGHS_SETTINGS = "Method: ipm\nthreads: 0\n"
+
+
+@pytest.mark.parametrize("link", ["hardlink", "symlink"])
+def test_thread_edit_leaves_linked_settings_alone(tmp_path, link):
+    base = tmp_path / "inputs" / "base"
+    for folder in ("system", "settings", "policies"):
+        os.makedirs(base / folder)
+    (base / "policies" / "CO2_cap.csv").write_text("Network_zones,CO_2_Max_Mtons\nz1,5\n")
+    (base / "settings" / "highs_settings.yml").write_text(HIGHS_SETTINGS)
+    sweep_root, cases = generate_sweep({
+        "name": "cap", "base_case": "base", "link": link,
+        "parameters": [{"name": "cap", "file": "policies/CO2_cap.csv", "column": "CO_2_Max_Mtons",
+                        "values": [1, 2]}],
+    }, tmp_path / "inputs")
+
+    base_settings = base / "settings" / "highs_settings.yml"
+    first, second = (sweep_root / case / "settings" / "highs_settings.yml" for case in cases)
+    hash_before = hash_case_inputs(sweep_root / cases[1])
+
+    # Two cases of the sweep solving at once, with different thread counts
+    with solver_threads_applied(first, "threads", 4), solver_threads_applied(second, "threads", 2):
+        assert "threads: 4" in first.read_text() and "threads: 2" in second.read_text()
+        assert base_settings.read_text() == HIGHS_SETTINGS
+
+    assert base_settings.read_text() == first.read_text() == second.read_text() == HIGHS_SETTINGS
+    if link == "hardlink":
+        assert os.path.samefile(base_settings, first) and os.path.samefile(base_settings, second)
+    else:
+        assert first.is_symlink() and second.is_symlink()
+    assert hash_case_inputs(sweep_root / cases[1]) == hash_before
@@ -0,0 +1,117 @@
+import json
+import os
+import stat
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "src"))
+
+from genx_runner import COMPLETE_MARKER, completed_solve  # noqa: E402
+from main import run_genx_cases  # noqa: E402
+from sweep import generate_sweep  # noqa: E402
+
+
+# Stands in for Julia: "solves" the case given as the last argument by
+# writing a results/ folder (results_1/ if there already is one, like
+# GenX), and records which case it solved
+FAKE_JULIA = """#!/bin/sh
+for arg; do case_dir="$arg"; done
+out="$case_dir/results"
+if [ -d "$out" ]; then out="$case_dir/results_1"; fi
+mkdir -p "$out"
+echo "Zone,Total" > "$out/power.csv"
+basename "$case_dir" >> "{solved_log}"
+"""
+
+
+@pytest.fixture
+def project(tmp_path):
+    inputs = tmp_path / "inputs"
+    base = inputs / "base"
+    for folder in ("system", "settings", "policies", "resources"):
+        os.makedirs(base / folder)
+    (base / "system" / "Demand_data.csv").write_text("Time_Index,Demand_MW_z1\n1,10\n2,12\n")
+    (base / "policies" / "CO2_cap.csv").write_text("Network_zones,CO_2_Max_Mtons\nz1,5\n")
+    (base / "settings" / "genx_settings.yml").write_text("Solver: HiGHS\nTimeDomainReduction: 0\n")
+
+    solved_log = tmp_path / "solved.txt"
+    julia = tmp_path / "julia"
+    julia.write_text(FAKE_JULIA.format(solved_log=solved_log))
+    julia.chmod(julia.stat().st_mode | stat.S_IEXEC)
+
+    settings = {
+        "save_path": "output",
+        "genx": {
+            "julia_executable": str(julia),
+            "project": str(tmp_path / "env"),
+            "genx_inputs_dir": "inputs",
+            "max_parallel_scenarios": 2,
+            "warm_start": 0,
+        },
+    }
+    sweep_cfg = {
+        "name": "cap",
+        "base_case": "base",
+        "parameters": [{"name": "cap", "file": "policies/CO2_cap.csv", "column": "CO_2_Max_Mtons",
+                        "values": [1.0, 2.0, 3.0]}],
+    }
+    return {"root": tmp_path, "inputs": inputs, "settings": settings, "sweep": sweep_cfg, "solved_log": solved_log}
+
+
+def _solved(project):
+    path = project["solved_log"]
+    return sorted(path.read_text().split()) if path.exists() else []
+
+
+def _run(project, scenarios, sweep_root):
+    return run_genx_cases(project["settings"], project["root"], log_dir=project["root"] / "logs",
+                          scenarios=scenarios, genx_inputs_dir=sweep_root)
+
+
+def test_interrupted_sweep_resumes(project):
+    # First run: two cases solve, then the run stops before they are
+    # harvested and before the third case starts
+    sweep_root, cases = generate_sweep(project["sweep"], project["inputs"])
+    results = _run(project, cases[:2], sweep_root)
+    assert all(r["status"] == "OK" for r in results.values())
+    assert all((sweep_root / case / "results" / COMPLETE_MARKER).exists() for case in cases[:2])
+
+    # Second run regenerates the sweep, as main.py does, and resumes
+    sweep_root, cases = generate_sweep(project["sweep"], project["inputs"])
+    for case in cases[:2]:
+        assert completed_solve(case, sweep_root / case, "log") is not None
+    results = _run(project, cases, sweep_root)
+
+    assert _solved(project) == sorted(cases)  # every case solved exactly once
+    assert [results[case].get("resumed", False) for case in cases] == [True, True, False]
+    assert all(r["status"] == "OK" for r in results.values())
+
+
+def test_changed_sweep_values_discard_results(project):
+    sweep_root, cases = generate_sweep(project["sweep"], project["inputs"])
+    _run(project, cases[:1], sweep_root)
+
+    project["sweep"]["parameters"][0]["values"] = [4.0, 2.0, 3.0]
+    sweep_root, cases = generate_sweep(project["sweep"], project["inputs"])
+
+    assert not (sweep_root / cases[0] / "results").exists()
+    assert completed_solve(cases[0], sweep_root / cases[0], "log") is None
+    assert json.loads((sweep_root / cases[0] / "sweep_case.json").read_text()) == {"cap": 4.0}
+
+
+def test_edited_inputs_invalidate_unharvested_results(project):
+    sweep_root, cases = generate_sweep(project["sweep"], project["inputs"])
+    _run(project, cases[:1], sweep_root)
+
+    # The base case changes under an unchanged sweep: the kept results
+    # belong to other inputs and must not be resumed
+    (project["inputs"] / "base" / "system" / "Demand_data.csv").write_text("Time_Index,Demand_MW_z1\n1,11\n2,12\n")
+    sweep_root, cases = generate_sweep(project["sweep"], project["inputs"])
+    assert completed_solve(cases[0], sweep_root / cases[0], "log") is None
+
+    results = _run(project, cases[:1], sweep_root)
+    assert results[cases[0]]["status"] == "OK" and not results[cases[0]].get("resumed")
+    assert _solved(project) == [cases[0], cases[0]]
+    assert not (sweep_root / cases[0] / "results_1").exists()